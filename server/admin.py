@@ -4,15 +4,20 @@ Provides admin login and dashboard for managing contacts/analytics
 """
 import os
 from functools import wraps
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify
+from flask import Blueprint, Response, render_template, request, redirect, url_for, session, flash, jsonify, abort
 from datetime import datetime
 from db import (
-    get_contact_messages,
+    get_contact_messages_page,
+    get_contact_message,
     mark_message_read,
-    get_unread_count,
+    bulk_update_contacts,
+    contact_filter,
     get_analytics_summary,
-    get_db_stats
+    get_dashboard_data,
+    window_from_args
 )
+import export
+from search import search_messages
 
 admin = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -64,36 +69,74 @@ def logout():
 @admin.route('/dashboard')
 @login_required
 def dashboard():
-    """Admin dashboard"""
-    analytics = get_analytics_summary()
-    db_stats = get_db_stats()
-    unread = get_unread_count()
+    """Admin dashboard (queries run concurrently, counters cached briefly)"""
+    try:
+        data = get_dashboard_data(**window_from_args(request.args))
+    except ValueError as e:
+        flash(str(e), 'error')
+        data = get_dashboard_data()
     
     return render_template('admin/dashboard.html',
-        analytics=analytics,
-        db_stats=db_stats,
-        unread_count=unread
+        analytics=data['analytics'],
+        db_stats=data['db_stats'],
+        unread_count=data['unread_count']
     )
 
 
 @admin.route('/messages')
 @login_required
 def messages():
-    """View contact messages"""
-    page = request.args.get('page', 1, type=int)
+    """View or search (?q=) contact messages (keyset paginated via opaque cursors)"""
     per_page = 20
-    skip = (page - 1) * per_page
     unread_only = request.args.get('unread', 'false').lower() == 'true'
+    cursor = request.args.get('cursor')
+    direction = 'prev' if request.args.get('dir') == 'prev' else 'next'
+    query = request.args.get('q', '').strip()[:200]
     
-    messages_list = get_contact_messages(limit=per_page, skip=skip, unread_only=unread_only)
+    if query:
+        try:
+            results = search_messages(query, limit=per_page, cursor=cursor, unread_only=unread_only)
+        except ValueError:
+            flash('Invalid page cursor', 'error')
+            return redirect(url_for('admin.messages', q=query, unread='true' if unread_only else None))
+        if results['source'] == 'scan':
+            flash('Search index unavailable: showing unranked matches, newest first', 'warning')
+        return render_template('admin/messages.html',
+            search=results,
+            query=query,
+            messages=[],
+            next_cursor=results['next_cursor'],
+            prev_cursor=None,
+            unread_only=unread_only
+        )
+    
+    try:
+        page = get_contact_messages_page(limit=per_page, cursor=cursor,
+                                         direction=direction, unread_only=unread_only)
+    except ValueError:
+        flash('Invalid page cursor', 'error')
+        return redirect(url_for('admin.messages', unread='true' if unread_only else None))
     
     return render_template('admin/messages.html',
-        messages=messages_list,
-        page=page,
+        messages=page['messages'],
+        next_cursor=page['next_cursor'],
+        prev_cursor=page['prev_cursor'],
         unread_only=unread_only
     )
 
 
+@admin.route('/messages/<message_id>')
+@login_required
+def message_detail(message_id):
+    """View a single message in full"""
+    message = get_contact_message(message_id)
+    if message is None:
+        flash('Message not found', 'error')
+        return redirect(url_for('admin.messages'))
+    
+    return render_template('admin/message.html', msg=message)
+
+
 @admin.route('/messages/<message_id>/read', methods=['POST'])
 @login_required
 def mark_read(message_id):
@@ -108,9 +151,89 @@ def mark_read(message_id):
     return redirect(url_for('admin.messages'))
 
 
+BULK_MESSAGES = {
+    'mark_read': 'marked as read',
+    'mark_replied': 'marked as replied',
+    'delete': 'deleted',
+}
+
+
+@admin.route('/messages/bulk', methods=['POST'])
+@login_required
+def bulk_messages():
+    """
+    Mark read/replied or delete many messages in one database round trip.
+
+    Form fields (or a JSON body with the same keys): action, then either
+    ids (selected messages) or scope=filter with status/window/start/end.
+    A search query (q) only allows selected messages.
+    """
+    wants_json = request.is_json or request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    data = (request.get_json(silent=True) or {}) if request.is_json else request.form
+    ids = data.get('ids') if request.is_json else request.form.getlist('ids')
+    action = data.get('action')
+    search_query = (data.get('q') or '').strip()
+    
+    try:
+        if data.get('scope') == 'filter' and search_query:
+            # The filter would cover every message, not just the search hits
+            raise ValueError('Select the search results to apply this to')
+        if data.get('scope') == 'filter':
+            query = contact_filter(status=data.get('status') or None, **window_from_args(data, default='all'))
+        elif not ids:
+            raise ValueError('No messages selected')
+        else:
+            query = contact_filter(ids=ids)
+        changed = bulk_update_contacts(action, query)
+    except ValueError as e:
+        error, status = str(e), 400
+    else:
+        error, status = (None, 200) if changed is not None else ('Database unavailable', 503)
+    
+    if wants_json:
+        if error:
+            return jsonify({'success': False, 'error': error}), status
+        return jsonify({'success': True, 'changed': changed})
+    
+    if error:
+        flash(error, 'error')
+    else:
+        flash(f"{changed} message{'s' if changed != 1 else ''} {BULK_MESSAGES[action]}", 'success')
+    return redirect(url_for('admin.messages', q=search_query or None,
+                            unread='true' if data.get('unread') == 'true' else None))
+
+
+@admin.route('/export/<name>.<fmt>')
+@login_required
+def export_collection(name, fmt):
+    """Stream contacts or page views as NDJSON/CSV (filters: status, window/start/end)"""
+    if name not in export.EXPORTS or fmt not in export.FORMATS:
+        abort(404)
+    try:
+        query = export.export_query(name, status=request.args.get('status') or None,
+                                    **window_from_args(request.args, default='all'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if not export.is_available(name):
+        return jsonify({'success': False, 'error': 'Database unavailable'}), 503
+    
+    return Response(
+        export.stream(name, fmt, query),
+        mimetype=export.FORMATS[fmt],
+        headers={
+            'Content-Disposition': f'attachment; filename="{export.filename(name, fmt)}"',
+            'Cache-Control': 'no-store',
+        }
+    )
+
+
 @admin.route('/analytics')
 @login_required
 def analytics():
     """View detailed analytics"""
-    summary = get_analytics_summary()
+    try:
+        summary = get_analytics_summary(**window_from_args(request.args))
+    except ValueError as e:
+        flash(str(e), 'error')
+        summary = get_analytics_summary()
     return render_template('admin/analytics.html', analytics=summary)
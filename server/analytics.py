@@ -0,0 +1,186 @@
+"""
+Analytics Ingestion Pipeline
+Buffers page views per worker and writes them to MongoDB in batches
+"""
+import os
+import queue
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Callable, Optional
+
+from db import log_page_views
+
+logger = logging.getLogger('app.analytics')
+
+# Wakes the flusher immediately on shutdown
+_STOP = object()
+
+
+class PageViewPipeline:
+    """
+    Bounded in-memory queue drained by a single background flusher.
+
+    A batch is written with one insert_many as soon as it reaches
+    `batch_size` documents or `flush_interval` seconds after its first
+    document, whichever comes first. When the queue is full new views are
+    dropped and counted instead of blocking the request thread.
+    """
+
+    def __init__(self, writer: Callable[[List[Dict[str, Any]]], int],
+                 max_queue: int = 10000, batch_size: int = 200,
+                 flush_interval: float = 2.0):
+        self._writer = writer
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._pid: Optional[int] = None
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    # ============== Producer Side ==============
+
+    def record(self, data: Dict[str, Any]) -> bool:
+        """Queue a page view; returns False if it was dropped"""
+        q = self._ensure_started()
+        data.setdefault('timestamp', datetime.utcnow())
+        try:
+            q.put_nowait(data)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def _ensure_started(self) -> queue.Queue:
+        """Start the flusher lazily, once per process (safe across fork)"""
+        if self._pid == os.getpid():
+            return self._queue
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked worker inherits the parent's queue but not its thread
+                self._queue = queue.Queue(maxsize=self.max_queue)
+                self._stopping.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name='analytics-flusher', daemon=True
+                )
+                self._thread.start()
+                self._pid = os.getpid()
+        return self._queue
+
+    # ============== Flusher ==============
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+
+    def _next_batch(self) -> List[Dict[str, Any]]:
+        """Block for the first view, then collect until size or time threshold"""
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+        if first is _STOP:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                break
+            batch.append(item)
+        return batch
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        try:
+            # 0 when the database is unavailable (no URI, breaker open, connecting)
+            stored = self._writer(batch) or 0
+            with self._lock:
+                self.written += stored
+                self.failed += len(batch) - stored
+                if stored:
+                    self.batches += 1
+            if stored < len(batch):
+                logger.warning(f"Dropped {len(batch) - stored} of {len(batch)} page views: database unavailable")
+        except Exception as e:
+            with self._lock:
+                self.failed += len(batch)
+            logger.error(f"Failed to write {len(batch)} page views: {e}")
+
+    # ============== Lifecycle ==============
+
+    def flush(self):
+        """Synchronously write everything currently queued"""
+        if self._pid != os.getpid():
+            return
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                continue
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def close(self, timeout: float = 5.0):
+        """Stop the flusher and write any remaining views (worker shutdown)"""
+        if self._pid != os.getpid():
+            return
+        self._stopping.set()
+        try:
+            self._queue.put_nowait(_STOP)
+        except queue.Full:
+            pass
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+        self._pid = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Pipeline counters for this worker"""
+        return {
+            'queued': self._queue.qsize() if self._pid == os.getpid() else 0,
+            'enqueued': self.enqueued,
+            'dropped': self.dropped,
+            'written': self.written,
+            'failed': self.failed,
+            'batches': self.batches,
+        }
+
+
+page_views = PageViewPipeline(
+    writer=log_page_views,
+    max_queue=int(os.getenv('ANALYTICS_QUEUE_SIZE', 10000)),
+    batch_size=int(os.getenv('ANALYTICS_BATCH_SIZE', 200)),
+    flush_interval=float(os.getenv('ANALYTICS_FLUSH_INTERVAL', 2.0)),
+)
+
+atexit.register(page_views.close)
@@ -2,15 +2,20 @@
 REST API Blueprint
 Provides JSON API endpoints for the portfolio
 """
-from flask import Blueprint, jsonify, request
+import json
+import hashlib
+from functools import lru_cache
+from flask import Blueprint, Response, jsonify, request
 from functools import wraps
 from datetime import datetime
 from db import (
     get_contact_messages,
     get_analytics_summary,
-    get_db_stats,
-    is_connected as db_connected
+    window_from_args,
+    breaker_state
 )
+from catalog import ProjectCatalog
+from health import prober
 
 api = Blueprint('api', __name__, url_prefix='/api')
 
@@ -18,13 +23,15 @@ api = Blueprint('api', __name__, url_prefix='/api')
 START_TIME = datetime.utcnow()
 
 
-def json_response(data, status=200):
-    """Standardized JSON response"""
-    return jsonify({
+def json_response(data, status=200, timestamp=True):
+    """Standardized JSON response (timestamp omitted for cacheable bodies)"""
+    payload = {
         'success': status < 400,
         'data': data,
-        'timestamp': datetime.utcnow().isoformat()
-    }), status
+    }
+    if timestamp:
+        payload['timestamp'] = datetime.utcnow().isoformat()
+    return jsonify(payload), status
 
 
 def error_response(message, status=400):
@@ -36,6 +43,30 @@ def error_response(message, status=400):
     }), status
 
 
+class PreparedResponse:
+    """JSON response serialized once at startup and validated by a strong ETag"""
+    __slots__ = ('body', 'etag', 'status')
+
+    def __init__(self, data, status=200):
+        self.body = json.dumps(
+            {'success': status < 400, 'data': data},
+            separators=(',', ':'),
+            sort_keys=True
+        ).encode('utf-8')
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.status = status
+
+    def to_response(self):
+        """Serve the cached body, or 304 if the client already has it"""
+        if request.if_none_match.contains(self.etag):
+            response = Response(status=304)
+        else:
+            response = Response(self.body, status=self.status, mimetype='application/json')
+        response.set_etag(self.etag)
+        response.headers['Cache-Control'] = 'public, no-cache'
+        return response
+
+
 # ============== Projects API ==============
 
 PROJECTS = [
@@ -138,27 +169,97 @@ SKILLS = {
 }
 
 
+CATALOG = ProjectCatalog(PROJECTS)
+
+
+def _compute_stats():
+    """Portfolio statistics derived from the catalog and SKILLS"""
+    counts = CATALOG.category_counts()
+    return {
+        'projects_count': len(CATALOG),
+        'technologies_count': len(CATALOG.technologies),
+        'skills_count': sum(len(skills) for skills in SKILLS.values()),
+        'categories': {
+            'ai': counts.get('ai', 0),
+            'web': counts.get('web', 0),
+            'extension': counts.get('extension', 0),
+        }
+    }
+
+
+def _prepare_responses():
+    """Serialize every static content variant once; data only changes on deploy"""
+    prepared = {
+        'projects': PreparedResponse(PROJECTS),
+        'projects:none': PreparedResponse([]),
+        'skills': PreparedResponse(SKILLS),
+        'stats': PreparedResponse(_compute_stats()),
+    }
+    for category in CATALOG.by_category:
+        prepared[f'projects:{category}'] = PreparedResponse(CATALOG.filter(categories=[category]))
+    for project_id, project in CATALOG.by_id.items():
+        prepared[f'project:{project_id}'] = PreparedResponse(project)
+    for category, skills in SKILLS.items():
+        prepared[f'skills:{category}'] = PreparedResponse(skills)
+    return prepared
+
+
+PREPARED = _prepare_responses()
+
+
+def _list_arg(name):
+    """Read a repeatable, comma-separated query parameter"""
+    values = []
+    for raw in request.args.getlist(name):
+        values.extend(v.strip() for v in raw.split(',') if v.strip())
+    return tuple(values)
+
+
+@lru_cache(maxsize=256)
+def _filtered_projects(categories, technologies, match_all, query):
+    """Serialized result for a filter combination (bounded memo)"""
+    return PreparedResponse(CATALOG.filter(
+        categories=list(categories),
+        technologies=list(technologies),
+        match_all=match_all,
+        query=query
+    ))
+
+
 @api.route('/projects')
 def get_projects():
-    """Get all projects"""
-    category = request.args.get('category')
+    """
+    Get projects, optionally filtered.
+
+    Query params: category and tech (repeatable or comma-separated),
+    match=any|all (default any), q (prefix search over title/description).
+    """
+    categories = _list_arg('category')
+    technologies = _list_arg('tech')
+    match = request.args.get('match', 'any').lower()
+    query = request.args.get('q', '').strip()[:100]
+    
+    if match not in ('any', 'all'):
+        return error_response("match must be 'any' or 'all'", 400)
     
-    if category:
-        filtered = [p for p in PROJECTS if category in p['category']]
-        return json_response(filtered)
+    if not technologies and not query and len(categories) <= 1:
+        if categories:
+            key = f'projects:{categories[0].casefold()}'
+            return PREPARED.get(key, PREPARED['projects:none']).to_response()
+        return PREPARED['projects'].to_response()
     
-    return json_response(PROJECTS)
+    return _filtered_projects(categories, technologies, match == 'all', query).to_response()
 
 
 @api.route('/projects/<project_id>')
 def get_project(project_id):
     """Get single project by ID"""
-    project = next((p for p in PROJECTS if p['id'] == project_id), None)
+    prepared = PREPARED.get(f'project:{project_id}')
     
-    if project is None:
+    if prepared is None:
         return error_response('Project not found', 404)
     
-    return json_response(project)
+    return prepared.to_response()
 
 
 @api.route('/skills')
@@ -167,45 +268,42 @@ def get_skills():
     category = request.args.get('category')
     
     if category and category in SKILLS:
-        return json_response(SKILLS[category])
+        return PREPARED[f'skills:{category}'].to_response()
     
-    return json_response(SKILLS)
+    return PREPARED['skills'].to_response()
 
 
 @api.route('/stats')
 def get_stats():
     """Get portfolio statistics"""
-    stats = {
-        'projects_count': len(PROJECTS),
-        'technologies_count': len(set(
-            tech for p in PROJECTS for tech in p['tech_stack']
-        )),
-        'skills_count': sum(len(skills) for skills in SKILLS.values()),
-        'categories': {
-            'ai': len([p for p in PROJECTS if 'ai' in p['category']]),
-            'web': len([p for p in PROJECTS if 'web' in p['category']]),
-            'extension': len([p for p in PROJECTS if 'extension' in p['category']]),
-        }
-    }
-    return json_response(stats)
+    return PREPARED['stats'].to_response()
 
 
 # ============== Health Check ==============
 
-@api.route('/health')
-def health_check():
-    """Health check endpoint"""
+def _uptime():
     uptime_seconds = (datetime.utcnow() - START_TIME).total_seconds()
     hours = int(uptime_seconds // 3600)
     minutes = int((uptime_seconds % 3600) // 60)
+    return f'{hours}h {minutes}m'
+
+
+@api.route('/health')
+def health_check():
+    """Health check endpoint (served from the background probe snapshot)"""
+    snapshot = prober.snapshot()
     
     health = {
         'status': 'healthy',
-        'uptime': f'{hours}h {minutes}m',
+        'uptime': _uptime(),
         'version': '2.0.0',
         'database': {
-            'connected': db_connected(),
-            'stats': get_db_stats() if db_connected() else None
+            'connected': snapshot['connected'],
+            'stats': snapshot.get('stats'),
+            'checked_at': snapshot.get('checked_at'),
+            'age_seconds': snapshot['age_seconds'],
+            'stale': snapshot['stale'],
+            'breaker': breaker_state(),
         },
         'timestamp': datetime.utcnow().isoformat()
     }
@@ -213,10 +311,40 @@ def health_check():
     return json_response(health)
 
 
+@api.route('/health/live')
+def liveness_check():
+    """Liveness: the process is up and serving requests (no DB involved)"""
+    return json_response({'status': 'alive', 'uptime': _uptime()})
+
+
+@api.route('/health/ready')
+def readiness_check():
+    """Readiness: a fresh probe shows the database is reachable"""
+    snapshot = prober.snapshot()
+    ready = prober.is_ready()
+    
+    return json_response({
+        'status': 'ready' if ready else 'not_ready',
+        'database': {
+            'connected': snapshot['connected'],
+            'age_seconds': snapshot['age_seconds'],
+            'stale': snapshot['stale'],
+            'error': snapshot.get('error'),
+        }
+    }, 200 if ready else 503)
+
+
 # ============== Analytics (Protected) ==============
 
 @api.route('/analytics')
 def get_analytics():
-    """Get analytics data (would need auth in production)"""
-    summary = get_analytics_summary()
+    """
+    Get analytics data (would need auth in production)
+
+    Query params: window=24h|7d|30d|all|custom, start/end (ISO 8601).
+    """
+    try:
+        summary = get_analytics_summary(**window_from_args(request.args))
+    except ValueError as e:
+        return error_response(str(e), 400)
     return json_response(summary)
@@ -2,26 +2,39 @@
 Portfolio Backend - Flask Application
 Features: MongoDB, Rate Limiting, CSRF Protection, Admin Dashboard, Caching, Logging
 Refactored to serve React SPA from static/react
+
+Built by create_app(); MongoDB and mail libraries load on first use.
+Profile startup with: python benchmarks/startup.py
 """
 import os
-import re
+import time
+import atexit
 import logging
-import threading
-from datetime import datetime
-from functools import wraps
-
-from flask import Flask, render_template, send_from_directory, request, jsonify, make_response
-from flask_cors import CORS
-from flask_mail import Mail, Message as MailMessage
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
-from flask_wtf.csrf import CSRFProtect
-from flask_caching import Cache
+import logging.handlers
+
+from flask import Flask, current_app, g, request, jsonify
+from flask.logging import default_handler
 from dotenv import load_dotenv
 
-# Load environment variables
+from log_pipeline import DEFAULT_SAMPLE_RATES, JSONFormatter, LogPipeline, parse_sample_rates
+
+# Load environment variables (before the modules below read them at import)
 load_dotenv()
 
+from extensions import cors, csrf, cache, limiter
+from api import api
+from admin import admin
+from pages import pages
+from db import breaker_state, query_cache, warm_up as warm_up_db
+from health import prober
+from analytics import page_views
+from assets import AssetIndex, ShellCache, precompress_directory
+from mailer import dispatcher as mail_dispatcher
+from spool import contact_spool
+from metrics import registry as metrics, request_latency, bot_page_views
+import bots
+from duplicates import submission_filter
+
 # ============== Environment Validation ==============
 
 def validate_environment():
@@ -37,57 +50,39 @@ def validate_environment():
     if warnings:
         print(f"WARNING: Optional env vars not set: {', '.join(warnings)}")
 
-validate_environment()
-
 # ============== App Configuration ==============
 
-# Update static_folder to the React build directory
-# We set static_url_path to '/static' to avoid conflicts with SPA routing
-app = Flask(__name__, 
-            static_folder=os.path.join(os.path.dirname(__file__), 'static', 'react'), 
-            template_folder='templates')
-
-# Allow CORS for development and production (Vercel)
-CORS(app, resources={r"/*": {"origins": "*"}}) 
-
-app.secret_key = os.getenv('FLASK_SECRET_KEY', 'dev-fallback-secret-key')
-
-# Flask-Mail Configuration
-app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER')
-app.config['MAIL_PORT'] = int(os.getenv('MAIL_PORT', 587))
-app.config['MAIL_USE_TLS'] = os.getenv('MAIL_USE_TLS', 'True').lower() == 'true'
-app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME')
-app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
-app.config['MAIL_DEFAULT_SENDER'] = os.getenv('MAIL_DEFAULT_SENDER')
-app.config['MAIL_TIMEOUT'] = 10
-
-# Caching Configuration
-app.config['CACHE_TYPE'] = 'SimpleCache'
-app.config['CACHE_DEFAULT_TIMEOUT'] = 300
-
-# ============== Initialize Extensions ==============
-
-mail = Mail(app)
-csrf = CSRFProtect(app)
-cache = Cache(app)
-
-# Rate Limiting
-limiter = Limiter(
-    key_func=get_remote_address,
-    app=app,
-    default_limits=["200 per day", "50 per hour"],
-    storage_uri=os.getenv('RATELIMIT_STORAGE_URL', 'memory://')
-)
+def configure(app):
+    app.secret_key = os.getenv('FLASK_SECRET_KEY', 'dev-fallback-secret-key')
+
+    # Flask-Mail Configuration
+    app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER')
+    app.config['MAIL_PORT'] = int(os.getenv('MAIL_PORT', 587))
+    app.config['MAIL_USE_TLS'] = os.getenv('MAIL_USE_TLS', 'True').lower() == 'true'
+    app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME')
+    app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
+    app.config['MAIL_DEFAULT_SENDER'] = os.getenv('MAIL_DEFAULT_SENDER')
+    app.config['MAIL_TIMEOUT'] = 10
+
+    # Caching Configuration (one SQLite file shared by every worker on the host)
+    app.config['CACHE_TYPE'] = 'shared_cache.SQLiteCache'
+    app.config['CACHE_DEFAULT_TIMEOUT'] = 300
+    app.config['CACHE_THRESHOLD'] = int(os.getenv('CACHE_MAX_ENTRIES', 500))
+    app.config['CACHE_OPTIONS'] = {'max_bytes': int(os.getenv('CACHE_MAX_BYTES', 64 * 1024 * 1024))}
+    if os.getenv('CACHE_SQLITE_PATH'):
+        app.config['CACHE_SQLITE_PATH'] = os.getenv('CACHE_SQLITE_PATH')
 
 # ============== Logging Setup ==============
 
-def setup_logging():
-    """Configure structured logging"""
+def setup_logging(app):
+    """Configure structured logging (handlers run in a background listener thread)"""
     log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    handlers = []
     
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(logging.Formatter(log_format))
+    handlers.append(console_handler)
     
     if not app.debug:
         log_dir = os.path.join(os.path.dirname(__file__), 'logs')
@@ -99,193 +94,182 @@ def setup_logging():
             backupCount=5
         )
         file_handler.setLevel(logging.INFO)
-        file_handler.setFormatter(logging.Formatter(log_format))
-        app.logger.addHandler(file_handler)
+        file_handler.setFormatter(JSONFormatter())
+        handlers.append(file_handler)
     
-    app.logger.addHandler(console_handler)
+    pipeline = LogPipeline(
+        handlers,
+        max_queue=int(os.getenv('LOG_QUEUE_SIZE', 10_000)),
+        sample_rates=parse_sample_rates(os.getenv('LOG_SAMPLE_RATES', DEFAULT_SAMPLE_RATES)),
+        slow_ms=float(os.getenv('LOG_SLOW_MS', 1000)),
+    )
+    # Flask's default stderr handler would write synchronously in the request thread
+    app.logger.removeHandler(default_handler)
+    app.logger.addHandler(pipeline.handler)
     app.logger.setLevel(logging.INFO)
-
-import logging.handlers
-setup_logging()
-
-# ============== Import Blueprints ==============
-
-from api import api
-from admin import admin
-from db import save_contact_message, log_page_view, is_connected as db_connected
-
-# Register Blueprints
-app.register_blueprint(api)
-app.register_blueprint(admin)
-
-# Exempt API from CSRF
-csrf.exempt(api)
+    atexit.register(pipeline.close)
+    return pipeline
 
 # ============== Request Hooks ==============
 
-@app.before_request
-def log_request():
-    """Log incoming requests"""
-    if not request.path.startswith(('/assets', '/favicon.ico', '/vite.svg')):
-        app.logger.info(f"{request.method} {request.path} - {request.remote_addr}")
+def start_request_timer():
+    """Mark the request start for the access log"""
+    g.request_started = time.perf_counter()
+
+def log_request(response):
+    """Log finished requests with status and duration (queued, never blocks)"""
+    started = g.get('request_started')
+    duration_ms = (time.perf_counter() - started) * 1000 if started else 0.0
+    current_app.extensions['log_pipeline'].log_request(current_app.logger, request.method, request.path,
+                                                       response.status_code, duration_ms, request.remote_addr)
+    # Endpoint names, not paths, keep the number of series bounded
+    request_latency.observe(duration_ms / 1000, endpoint=request.endpoint or 'unmatched',
+                            method=request.method, status=response.status_code)
+    return response
 
-@app.after_request
 def log_page_view_analytics(response):
-    """Log page views for analytics"""
+    """Log page views for analytics (bots are only counted)"""
     if (response.status_code == 200 and 
         request.method == 'GET' and 
         not request.path.startswith(('/assets', '/api', '/admin', '/favicon.ico', '/vite.svg'))):
         
+        user_agent = request.user_agent.string
+        bot = bots.classify(user_agent)
+        if bot:
+            # Crawlers, uptime monitors, link previews: a counter, not a document
+            bot_page_views.inc(category=bot)
+            return response
+        
         # Capture request data synchronously (before losing context)
         page_data = {
             'page': request.endpoint or 'spa_route',
             'path': request.path,
             'referrer': request.referrer,
-            'user_agent': request.user_agent.string,
+            'user_agent': user_agent,
             'ip_address': request.remote_addr
         }
         
-        def log_async(data):
-            try:
-                log_page_view(data)
-            except Exception as e:
-                app.logger.error(f"Failed to log page view: {e}")
-        
-        thread = threading.Thread(target=log_async, args=(page_data,))
-        thread.start()
+        page_views.record(page_data)
     
     return response
 
-# ============== Static Files & SPA Support ==============
-
-@app.route('/assets/<path:filename>')
-def serve_assets(filename):
-    """Explicitly serve assets from the React build directory"""
-    return send_from_directory(os.path.join(app.static_folder, 'assets'), filename)
-
-@app.route('/vite.svg')
-def serve_vite_svg():
-    return send_from_directory(app.static_folder, 'vite.svg')
-
-@app.route('/favicon.ico')
-def serve_favicon():
-    return send_from_directory(app.static_folder, 'favicon.ico')
-
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve_spa(path):
-    """Serve the React SPA. Catch-all handles client-side routing."""
-    
-    # Check if the requested path starts with protected prefixes
-    if path.startswith(('api', 'admin')):
-        # This shouldn't be reached if blueprints match, but just in case
-        return make_response(jsonify({'error': 'Not found'}), 404)
-
-    # For everything else, serve index.html
-    # This allows React Router to handle the URL on the client side
-    return send_from_directory(app.static_folder, 'index.html')
-
-# ============== Contact Form Handler ==============
-
-def validate_email(email):
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
-
-@app.route('/contact', methods=['POST'])
-@csrf.exempt
-@limiter.limit("5 per minute")
-def contact():
-    """Handle contact form submissions"""
-    try:
-        if request.is_json:
-            data = request.get_json()
-        else:
-            data = request.form
-
-        name = data.get('name', '').strip()[:100]
-        email = data.get('email', '').strip()[:254]
-        subject = data.get('subject', '').strip()[:200]
-        message = data.get('message', '').strip()[:2000]
-        
-        if not all([name, email, subject, message]):
-            return jsonify({'success': False, 'message': 'All fields are required'}), 400
-        
-        if not validate_email(email):
-            return jsonify({'success': False, 'message': 'Invalid email format'}), 400
-        
-        contact_data = {
-            'name': name,
-            'email': email,
-            'subject': subject,
-            'message': message,
-            'ip_address': request.remote_addr,
-            'user_agent': request.user_agent.string
-        }
-        
-        # Database save (non-blocking failure)
-        try:
-            save_contact_message(contact_data)
-        except Exception as db_err:
-            app.logger.warning(f"Failed to save contact to DB: {db_err}")
-        
-        def send_email_async(app):
-            with app.app_context():
-                # Pre-flight check for mail configuration
-                mail_server = os.getenv('MAIL_SERVER')
-                mail_username = os.getenv('MAIL_USERNAME')
-                mail_password = os.getenv('MAIL_PASSWORD')
-                mail_sender = os.getenv('MAIL_DEFAULT_SENDER')
-                
-                if not all([mail_server, mail_username, mail_password, mail_sender]):
-                    app.logger.warning(f"Email skipped: Missing mail config (server={bool(mail_server)}, user={bool(mail_username)}, pass={bool(mail_password)}, sender={bool(mail_sender)})")
-                    return
-                
-                try:
-                    # Notification to owner
-                    msg = MailMessage(
-                        subject=f'Portfolio Contact: {subject}',
-                        recipients=[mail_sender],
-                        reply_to=email
-                    )
-                    msg.body = f"From: {name} ({email})\nSubject: {subject}\n\n{message}"
-                    mail.send(msg)
-                    app.logger.info(f"Email sent to owner from {email}")
-                    
-                    # Auto-reply to visitor
-                    ar = MailMessage(
-                        subject='Thanks for reaching out! - Shivam Singh',
-                        recipients=[email]
-                    )
-                    ar.body = f"Hi {name},\n\nThanks for your message regarding '{subject}'. I'll get back to you soon!\n\nBest,\nShivam"
-                    mail.send(ar)
-                    app.logger.info(f"Auto-reply sent to {email}")
-                except Exception as e:
-                    app.logger.error(f"Email send failed: {type(e).__name__}: {e}")
-        
-        threading.Thread(target=send_email_async, args=(app,)).start()
-        
-        return jsonify({'success': True, 'message': 'Message sent successfully!'})
-        
-    except Exception as e:
-        app.logger.error(f"Contact error: {e}")
-        return jsonify({'success': False, 'message': 'Internal error'}), 500
-
 # ============== Error Handlers ==============
 
-@app.errorhandler(429)
 def rate_limit_exceeded(e):
     return jsonify({'success': False, 'error': 'Rate limit exceeded'}), 429
 
+# ============== Metrics ==============
+
+metrics.register_stats('analytics', page_views.stats,
+                       counters=('enqueued', 'dropped', 'written', 'failed', 'batches'), gauges=('queued',))
+metrics.register_stats('bot_ua_cache', bots.stats, counters=('hits', 'misses'), gauges=('size',))
+metrics.register_stats('contact_filter', submission_filter.stats,
+                       counters=('checked', 'duplicates', 'near_duplicates'), gauges=('bloom_entries', 'signatures'))
+metrics.register_stats('mail', mail_dispatcher.stats,
+                       counters=('sent', 'retried', 'failed', 'recovered'), gauges=('pending',))
+metrics.register_stats('contact_spool', contact_spool.stats,
+                       counters=('appended', 'rejected', 'replayed', 'segments_replayed', 'replay_errors'))
+# The spool directory is shared, so every worker reports the same backlog
+metrics.register_stats('contact_spool', contact_spool.stats, gauges=('segments_pending',), aggregate='max')
+metrics.register_stats('cache', lambda: query_cache.stats()['process'],
+                       counters=('hits', 'misses', 'sets', 'evictions', 'expirations'))
+metrics.register_stats('cache', query_cache.stats, gauges=('entries', 'bytes'), aggregate='max')
+metrics.register_stats('db_breaker', lambda: dict(breaker_state(), open=int(breaker_state()['state'] != 'closed')),
+                       counters=('failures', 'trips', 'short_circuited', 'probes'), gauges=('open',), aggregate='max')
+
+# ============== Application Factory ==============
+
+def create_app():
+    """
+    Build the application (gunicorn -c gunicorn.conf.py "app:create_app()").
+
+    Opens no connections and starts no threads, so a preloading gunicorn
+    master can build it once and fork workers from it; warm_up() does the
+    per-process part.
+    """
+    validate_environment()
+
+    # Update static_folder to the React build directory
+    app = Flask(__name__, 
+                static_folder=os.path.join(os.path.dirname(__file__), 'static', 'react'), 
+                template_folder='templates')
+    configure(app)
+
+    cors.init_app(app)
+    csrf.init_app(app)
+    cache.init_app(app)
+    limiter.init_app(app)
+
+    request_log = setup_logging(app)
+    app.extensions['log_pipeline'] = request_log
+    metrics.register_stats('log', request_log.stats, counters=('queued', 'dropped', 'sampled_out'), gauges=('depth',))
+
+    mail_dispatcher.init_app(app)
+
+    # Register Blueprints
+    app.register_blueprint(api)
+    app.register_blueprint(admin)
+    app.register_blueprint(pages)
+
+    # Exempt API from CSRF
+    csrf.exempt(api)
+
+    app.before_request(start_request_timer)
+    app.after_request(log_request)
+    app.after_request(log_page_view_analytics)
+    app.register_error_handler(429, rate_limit_exceeded)
+
+    assets_dir = os.path.join(app.static_folder, 'assets')
+    # Build step normally does this (python assets.py); only fills in missing variants
+    if os.getenv('ASSETS_PRECOMPRESS', 'true').lower() == 'true':
+        try:
+            precompress_directory(assets_dir)
+        except OSError as e:
+            app.logger.warning(f"Asset precompression skipped: {e}")
+
+    app.extensions['asset_index'] = AssetIndex(assets_dir)
+    app.extensions['spa_shell'] = ShellCache(
+        os.path.join(app.static_folder, 'index.html'),
+        recheck_interval=float(os.getenv('SPA_SHELL_RECHECK_INTERVAL', 2.0))
+    )
+    return app
+
+# ============== Worker Warm-up ==============
+
+def warm_up(app) -> bool:
+    """
+    Per-process start-up, run before the process takes traffic (gunicorn's
+    post_worker_init hook, or __main__ below): connect to MongoDB and prime
+    the query cache, start the health prober, load the SPA shell and start
+    the contact spool and mail workers. Returns whether the database is
+    reachable.
+    """
+    started = time.perf_counter()
+    connected = warm_up_db()
+    # Readiness checks pass as soon as the worker is up
+    prober.start(timeout=5.0)
+    app.extensions['spa_shell'].refresh()
+    # Replays contact submissions spooled by a previous run
+    contact_spool.start()
+    if mail_dispatcher.is_configured():
+        # Picks up mail left in the outbox by a previous run
+        mail_dispatcher.start()
+    app.logger.info(f"Warm-up finished in {(time.perf_counter() - started) * 1000:.0f} ms "
+                    f"(database {'connected' if connected else 'offline'})")
+    return connected
+
 # ============== Main ==============
 
 if __name__ == '__main__':
+    app = create_app()
     port = int(os.environ.get('PORT', 5000))
     debug = os.getenv('FLASK_ENV') == 'development'
+    connected = warm_up(app)
     
     print(f"\n{'='*50}")
     print(f"  Portfolio Server Starting (SPA MODE)")
     print(f"  Port: {port}")
-    print(f"  Database: {'Connected' if db_connected() else 'Offline'}")
+    print(f"  Database: {'Connected' if connected else 'Offline'}")
     print(f"{'='*50}\n")
     
-    app.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=port, debug=debug)
@@ -0,0 +1,262 @@
+"""
+Static Asset Delivery
+Precompressed (.br/.gz) and long-cached serving of the Vite build output
+
+Run as a build step to compress ahead of time:
+    python assets.py [directory] [--force]
+"""
+import os
+import re
+import gzip
+import time
+import hashlib
+import mimetypes
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from flask import Response, abort, request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # Optional: fall back to gzip only
+    brotli = None
+
+logger = logging.getLogger('app.assets')
+
+DEFAULT_ASSETS_DIR = os.path.join(os.path.dirname(__file__), 'static', 'react', 'assets')
+
+# Vite emits content-hashed names such as vendor-three-DR8TZEmO.js
+HASHED_NAME_RE = re.compile(r'-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$')
+
+COMPRESSIBLE_EXTENSIONS = ('.js', '.mjs', '.css', '.html', '.svg', '.json', '.map', '.txt')
+MIN_COMPRESS_SIZE = 1024
+
+# Preference order when the client accepts several
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'public, no-cache'
+
+
+def available_encodings() -> List[str]:
+    """Content encodings this process can produce"""
+    return [enc for enc, _ in ENCODINGS if enc != 'br' or brotli is not None]
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compress bytes with maximum ratio (done once, so speed is secondary)"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    raise ValueError(f'Unsupported encoding: {encoding}')
+
+
+def is_compressible(filename: str) -> bool:
+    return filename.endswith(COMPRESSIBLE_EXTENSIONS)
+
+
+def is_hashed(filename: str) -> bool:
+    """Whether the filename carries a content hash (safe to cache forever)"""
+    return HASHED_NAME_RE.search(filename) is not None
+
+
+# ============== Precompression ==============
+
+def precompress_file(path: str, force: bool = False) -> List[str]:
+    """Write .br/.gz siblings for path if missing or stale; returns written paths"""
+    written = []
+    source_mtime = os.stat(path).st_mtime
+    data = None
+
+    for encoding, suffix in ENCODINGS:
+        if encoding not in available_encodings():
+            continue
+        target = path + suffix
+        if not force and os.path.exists(target) and os.stat(target).st_mtime >= source_mtime:
+            continue
+
+        if data is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+        compressed = compress(data, encoding)
+        # Not worth serving if it doesn't shrink the file
+        if len(compressed) >= len(data):
+            continue
+
+        # Write atomically: several workers may run this concurrently at startup
+        tmp = f'{target}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp, target)
+        written.append(target)
+
+    return written
+
+
+def precompress_directory(directory: str = DEFAULT_ASSETS_DIR, force: bool = False) -> Dict[str, int]:
+    """Precompress every compressible file in directory (recursively)"""
+    summary = {'files': 0, 'written': 0}
+    if not os.path.isdir(directory):
+        return summary
+
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not is_compressible(name) or os.path.getsize(os.path.join(root, name)) < MIN_COMPRESS_SIZE:
+                continue
+            summary['files'] += 1
+            summary['written'] += len(precompress_file(os.path.join(root, name), force=force))
+
+    return summary
+
+
+# ============== Serving ==============
+
+class AssetIndex:
+    """
+    Precompressed variants available per asset, scanned once at startup.
+
+    Files not seen at scan time are still served, just uncompressed.
+    """
+
+    def __init__(self, directory: str = DEFAULT_ASSETS_DIR):
+        self.directory = directory
+        self.variants: Dict[str, Dict[str, str]] = {}
+        self.refresh()
+
+    def refresh(self):
+        variants: Dict[str, Dict[str, str]] = {}
+        if os.path.isdir(self.directory):
+            for root, _, files in os.walk(self.directory):
+                present = set(files)
+                for name in files:
+                    if not is_compressible(name):
+                        continue
+                    rel = os.path.relpath(os.path.join(root, name), self.directory).replace(os.sep, '/')
+                    found = {enc: rel + suffix for enc, suffix in ENCODINGS if name + suffix in present}
+                    if found:
+                        variants[rel] = found
+        self.variants = variants
+
+    def negotiate(self, filename: str) -> Optional[str]:
+        """Best precompressed encoding for filename accepted by the client"""
+        found = self.variants.get(filename)
+        if not found:
+            return None
+        for encoding, _ in ENCODINGS:
+            if encoding in found and request.accept_encodings[encoding] > 0:
+                return encoding
+        return None
+
+    def send(self, filename: str):
+        """Serve an asset, precompressed when possible, with ETag and cache headers"""
+        encoding = self.negotiate(filename)
+        target = self.variants[filename][encoding] if encoding else filename
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+        response = send_from_directory(self.directory, target, mimetype=mimetype, etag=True, conditional=True)
+
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+            # Would otherwise name the .br/.gz sibling
+            response.headers.pop('Content-Disposition', None)
+        if filename in self.variants:
+            response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = (
+            IMMUTABLE_CACHE_CONTROL if is_hashed(filename) else REVALIDATE_CACHE_CONTROL
+        )
+        return response
+
+
+class ShellCache:
+    """
+    The SPA shell (index.html) held in memory with precomputed
+    gzip/brotli variants and ETags.
+
+    The file is re-stat'ed at most every `recheck_interval` seconds and
+    only re-read when its mtime changes, so a request normally costs no
+    disk I/O at all.
+    """
+
+    def __init__(self, path: str, recheck_interval: float = 2.0):
+        self.path = path
+        self.recheck_interval = recheck_interval
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._checked = 0.0
+        self.variants: Dict[str, bytes] = {}
+        self.etags: Dict[str, str] = {}
+
+    def _load(self, mtime: float):
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()[:32]
+
+        variants = {'identity': data}
+        for encoding in available_encodings():
+            compressed = compress(data, encoding)
+            if len(compressed) < len(data):
+                variants[encoding] = compressed
+
+        self.variants = variants
+        self.etags = {enc: digest if enc == 'identity' else f'{digest}-{enc}' for enc in variants}
+        self._mtime = mtime
+        logger.info(f"Loaded SPA shell {os.path.basename(self.path)} ({len(data)} bytes)")
+
+    def refresh(self) -> bool:
+        """Reload if the file changed; returns False if it can't be served"""
+        now = time.monotonic()
+        if self._mtime is not None and now - self._checked < self.recheck_interval:
+            return True
+        with self._lock:
+            if self._mtime is not None and now - self._checked < self.recheck_interval:
+                return True
+            try:
+                mtime = os.stat(self.path).st_mtime
+                if mtime != self._mtime:
+                    self._load(mtime)
+            except OSError as e:
+                if self._mtime is None:
+                    logger.error(f"SPA shell unavailable: {e}")
+                    return False
+            self._checked = now
+        return True
+
+    def send(self):
+        """Serve the shell from memory, or 304 if the client's copy is current"""
+        if not self.refresh():
+            abort(404)
+
+        variants, etags = self.variants, self.etags
+        encoding = 'identity'
+        for candidate, _ in ENCODINGS:
+            if candidate in variants and request.accept_encodings[candidate] > 0:
+                encoding = candidate
+                break
+
+        if request.if_none_match.contains(etags[encoding]):
+            response = Response(status=304)
+        else:
+            response = Response(variants[encoding], mimetype='text/html')
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(etags[encoding])
+        response.vary.add('Accept-Encoding')
+        # Shell references hashed assets, so it must always be revalidated
+        response.headers['Cache-Control'] = REVALIDATE_CACHE_CONTROL
+        return response
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Precompress static assets (.br/.gz)')
+    parser.add_argument('directory', nargs='?', default=DEFAULT_ASSETS_DIR)
+    parser.add_argument('--force', action='store_true', help='Recompress even if up to date')
+    args = parser.parse_args()
+
+    if brotli is None:
+        print('Warning: brotli not installed, writing gzip only')
+    result = precompress_directory(args.directory, force=args.force)
+    print(f"Precompressed {result['files']} files ({result['written']} variants written) in {args.directory}")
@@ -0,0 +1,29 @@
+"""
+Benchmark App Entry Point
+The real Flask app wired to the fake database, for gunicorn load tests
+
+    gunicorn --chdir server --pythonpath benchmarks bench_app:app
+
+BENCH_DB_LATENCY_MS and BENCH_DB_JITTER_MS set the simulated database
+round trip. Rate limiting and console logging are turned off so the
+numbers measure the app, not the limiter or the terminal.
+"""
+import os
+import logging
+
+import common  # noqa: F401  (puts server/ on sys.path)
+import fake_mongo
+
+fake_mongo.install(
+    latency_ms=float(os.getenv('BENCH_DB_LATENCY_MS', 0)),
+    jitter_ms=float(os.getenv('BENCH_DB_JITTER_MS', 0)),
+)
+
+from app import create_app  # noqa: E402
+from extensions import limiter  # noqa: E402
+
+app = create_app()
+limiter.enabled = False
+for handler in app.extensions['log_pipeline'].handlers:
+    if type(handler) is logging.StreamHandler:
+        handler.setLevel(logging.ERROR)
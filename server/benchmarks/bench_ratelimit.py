@@ -0,0 +1,74 @@
+"""
+Rate Limit Storage Benchmark
+Per-hit cost of the SQLite storage vs. memory://, and cross-process correctness
+
+    python benchmarks/bench_ratelimit.py [--iterations N] [--processes P]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter, MovingWindowRateLimiter
+
+import ratelimit_storage  # noqa: F401  (registers sqlite://)
+
+
+def time_hits(uri, strategy_cls, iterations, keys=100):
+    """Mean microseconds per hit, spread over `keys` distinct clients"""
+    limiter = strategy_cls(storage_from_string(uri))
+    item = parse(f'{iterations} per hour')
+    identifiers = [f'10.0.0.{i}' for i in range(keys)]
+
+    started = time.perf_counter()
+    for i in range(iterations):
+        limiter.hit(item, identifiers[i % keys])
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def _hammer(uri, hits, results):
+    limiter = FixedWindowRateLimiter(storage_from_string(uri))
+    item = parse('100 per minute')
+    results.put(sum(limiter.hit(item, 'shared-client') for _ in range(hits)))
+
+
+def shared_limit_check(uri, processes, hits_per_process):
+    """Total hits allowed when several processes share one 100/minute limit"""
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_hammer, args=(uri, hits_per_process, results))
+               for _ in range(processes)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return sum(results.get() for _ in workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--processes', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite_uri = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+
+        print(f"{'storage':<10} {'strategy':<14} {'us/hit':>8}")
+        for name, uri in (('memory', 'memory://'), ('sqlite', sqlite_uri)):
+            for label, strategy in (('fixed-window', FixedWindowRateLimiter),
+                                    ('moving-window', MovingWindowRateLimiter)):
+                print(f"{name:<10} {label:<14} {time_hits(uri, strategy, args.iterations):>8.2f}")
+
+        allowed = shared_limit_check(sqlite_uri, args.processes, 50)
+        print(f"\n{args.processes} processes x 50 hits on one 100/minute limit: "
+              f"{allowed} allowed (expected {min(100, args.processes * 50)})")
+
+
+if __name__ == '__main__':
+    main()
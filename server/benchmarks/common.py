@@ -0,0 +1,109 @@
+"""
+Benchmark Helpers
+Offline environment setup, latency summaries and result files shared by the suites
+
+The suites need the app's requirements plus mongomock:
+    pip install -r benchmarks/requirements.txt
+"""
+import os
+import sys
+import json
+import math
+import time
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Sequence
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+# The suites import the app's modules from server/
+if SERVER_DIR not in sys.path:
+    sys.path.insert(0, SERVER_DIR)
+
+
+def offline_environment(state_dir: Optional[str] = None) -> Dict[str, str]:
+    """
+    Environment for running the app with no network and no shared state:
+    every host-local file (cache, rate limits, spool, outbox, metrics)
+    goes to a throwaway directory, and MongoDB/SMTP are left unset.
+    """
+    state_dir = state_dir or tempfile.mkdtemp(prefix='portfolio-bench-')
+    env = {
+        'FLASK_SECRET_KEY': os.getenv('FLASK_SECRET_KEY', 'benchmark-secret'),
+        'MONGODB_URI': '',
+        'MAIL_SERVER': '',
+        'CACHE_SQLITE_PATH': os.path.join(state_dir, 'cache.db'),
+        'RATELIMIT_STORAGE_URL': f"sqlite:///{os.path.join(state_dir, 'ratelimit.db')}",
+        'CONTACT_SPOOL_DIR': os.path.join(state_dir, 'spool'),
+        'MAIL_OUTBOX_DIR': os.path.join(state_dir, 'outbox'),
+        'METRICS_DIR': os.path.join(state_dir, 'metrics'),
+        'HEALTH_PROBE_INTERVAL': '5',
+    }
+    return env
+
+
+# ============== Statistics ==============
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(latencies: List[float], elapsed: Optional[float] = None) -> Dict[str, Any]:
+    """Latencies in seconds -> count, mean and p50/p95/p99 in ms, plus throughput"""
+    values = sorted(latencies)
+    total = sum(values)
+    elapsed = elapsed if elapsed is not None else total
+    return {
+        'count': len(values),
+        'mean_ms': round(total / len(values) * 1000, 3) if values else 0.0,
+        'p50_ms': round(percentile(values, 50) * 1000, 3),
+        'p95_ms': round(percentile(values, 95) * 1000, 3),
+        'p99_ms': round(percentile(values, 99) * 1000, 3),
+        'max_ms': round(values[-1] * 1000, 3) if values else 0.0,
+        'ops_per_sec': round(len(values) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+# ============== Result Files ==============
+
+def run_metadata(**config: Any) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SERVER_DIR,
+                                capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'config': config,
+    }
+
+
+def save_results(suite: str, results: Dict[str, Dict[str, Any]], meta: Dict[str, Any],
+                 path: Optional[str] = None) -> str:
+    """Write {'suite', 'meta', 'results'} as JSON; returns the path"""
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{suite}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, 'w') as f:
+        json.dump({'suite': suite, 'meta': meta, 'results': results}, f, indent=2, sort_keys=True)
+    return path
+
+
+def print_table(results: Dict[str, Dict[str, Any]]):
+    width = max([len(name) for name in results] + [10])
+    print(f"{'name':<{width}}  {'count':>7}  {'p50 ms':>9}  {'p95 ms':>9}  {'p99 ms':>9}  {'ops/s':>9}")
+    for name, row in results.items():
+        print(f"{name:<{width}}  {row['count']:>7}  {row['p50_ms']:>9.3f}  {row['p95_ms']:>9.3f}  "
+              f"{row['p99_ms']:>9.3f}  {row['ops_per_sec']:>9.1f}")
@@ -0,0 +1,83 @@
+"""
+Benchmark Comparison
+Regression report between two result files from routes.py or load.py
+
+    python benchmarks/compare.py baseline.json candidate.json [--threshold 10]
+
+Exits with status 1 when any benchmark's p50/p95/p99 latency grows, or its
+throughput drops, by more than --threshold percent.
+"""
+import sys
+import json
+import argparse
+from typing import Dict, Any, List, Tuple
+
+# (metric, True if bigger is better)
+METRICS = [('p50_ms', False), ('p95_ms', False), ('p99_ms', False), ('ops_per_sec', True)]
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def change(before: float, after: float) -> float:
+    """Percent change from before to after"""
+    if not before:
+        return 0.0
+    return (after - before) / before * 100
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float
+            ) -> Tuple[List[List[str]], List[str]]:
+    rows, regressions = [], []
+    for name, after in candidate['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        row = [name]
+        for metric, higher_is_better in METRICS:
+            delta = change(before[metric], after[metric])
+            worse = -delta if higher_is_better else delta
+            flag = ' !' if worse > threshold else ''
+            if flag:
+                regressions.append(f'{name} {metric}: {before[metric]} -> {after[metric]} ({delta:+.1f}%)')
+            row.append(f'{after[metric]:.3f} ({delta:+.1f}%){flag}')
+        rows.append(row)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=10.0, help='Percent change treated as a regression')
+    args = parser.parse_args()
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    if baseline['suite'] != candidate['suite']:
+        parser.error(f"can't compare a {baseline['suite']} run with a {candidate['suite']} run")
+
+    print(f"{candidate['suite']}: {baseline['meta'].get('commit')} -> {candidate['meta'].get('commit')}")
+    if baseline['meta'].get('config') != candidate['meta'].get('config'):
+        print('note: runs used different settings; see meta.config in each file')
+
+    rows, regressions = compare(baseline, candidate, args.threshold)
+    header = ['name'] + [metric for metric, _ in METRICS]
+    widths = [max(len(str(row[i])) for row in rows + [header]) for i in range(len(header))]
+    for row in [header] + rows:
+        print('  '.join(str(cell).ljust(width) for cell, width in zip(row, widths)))
+
+    missing = sorted(set(baseline['results']) - set(candidate['results']))
+    if missing:
+        print(f"\nnot in candidate: {', '.join(missing)}")
+    if regressions:
+        print(f'\n{len(regressions)} regressions over {args.threshold:g}%:')
+        for line in regressions:
+            print(f'  {line}')
+        sys.exit(1)
+    print(f'\nNo regressions over {args.threshold:g}%')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Contact Filter Benchmark
+Cost per submission of duplicates.SubmissionFilter, and how well it tells repeats from new messages
+
+    python benchmarks/contact_filter.py [--messages 2000] [--edits 1 3 5 10 20]
+
+Messages are 20-150 words drawn from a Zipf-distributed vocabulary, so
+unrelated messages share common words and phrases the way real ones do.
+Timed scenarios, one check each:
+  unique          a new message (hash, Bloom probes, MinHash, LSH insert)
+  exact_repeat    the same sender resubmitting (stops at the Bloom filter)
+  near_duplicate  a spam template with a few words changed, from a new sender
+  short           a message too short for MinHash (exact check only)
+Accuracy: unique messages wrongly flagged, the share of near-duplicates
+caught per number of words changed, and the Bloom filter's false positive
+rate at its full capacity.
+"""
+import os
+import time
+import random
+import argparse
+import itertools
+from typing import Callable, Dict, Any, List, Tuple
+
+from common import summarize, run_metadata, save_results, print_table
+
+import duplicates
+
+
+def message_generator(vocabulary: int, rng: random.Random) -> Callable[[int, int], List[str]]:
+    vocab = [f'w{i}' for i in range(vocabulary)]
+    cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(vocabulary)))
+    return lambda low, high: rng.choices(vocab, cum_weights=cumulative, k=rng.randint(low, high))
+
+
+def edited(words: List[str], edits: int, rng: random.Random) -> List[str]:
+    """Copy of words with `edits` of them replaced (spread out, like a filled-in template)"""
+    words = list(words)
+    for position in rng.sample(range(len(words)), min(edits, len(words))):
+        words[position] = f'x{rng.getrandbits(32)}'
+    return words
+
+
+def time_checks(submissions: List[Tuple[str, str, str]], flt: duplicates.SubmissionFilter) -> Tuple[Dict[str, Any], int]:
+    latencies, flagged = [], 0
+    started = time.perf_counter()
+    for email, subject, message in submissions:
+        t = time.perf_counter()
+        verdict = flt.check(email, subject, message)
+        latencies.append(time.perf_counter() - t)
+        flagged += verdict is not None
+    return summarize(latencies, time.perf_counter() - started), flagged
+
+
+def bloom_false_positives(capacity: int, probes: int) -> float:
+    bloom = duplicates.DecayingBloomFilter(capacity=capacity)
+    for _ in range(capacity):
+        bloom.add(os.urandom(16))
+    return sum(os.urandom(16) in bloom for _ in range(probes)) / probes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=2000, help='Submissions per scenario')
+    parser.add_argument('--vocabulary', type=int, default=5000)
+    parser.add_argument('--edits', type=int, nargs='+', default=[1, 3, 5, 10, 20],
+                        help='Words changed in near-duplicates (messages average ~85 words)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', help='Result file (default: benchmarks/results/contact_filter-<time>.json)')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = message_generator(args.vocabulary, rng)
+    # Within the LSH index's capacity, so nothing is evicted mid-run
+    count = min(args.messages, duplicates.MinHashIndex().capacity)
+
+    flt = duplicates.SubmissionFilter()
+    unique = [(f'sender{i}@example.com', ' '.join(words(3, 8)), ' '.join(words(20, 150))) for i in range(count)]
+    results, false_positives = {}, {}
+    results['unique'], false_positives['unique'] = time_checks(unique, flt)
+    results['exact_repeat'], _ = time_checks(unique, flt)
+
+    # Near-duplicates of messages the filter has already seen, from new senders
+    caught = {}
+    for edits in args.edits:
+        seen = duplicates.SubmissionFilter()
+        for submission in unique:
+            seen.check(*submission)
+        variants = [(f'spam{i}@example.com', subject, ' '.join(edited(message.split(), edits, rng)))
+                    for i, (_, subject, message) in enumerate(unique)]
+        row, flagged = time_checks(variants, seen)
+        caught[edits] = flagged / len(variants)
+        if edits == args.edits[0]:
+            results['near_duplicate'] = row
+
+    short = [(f'short{i}@example.com', 'Hi', ' '.join(words(2, 6))) for i in range(count)]
+    results['short'], false_positives['short'] = time_checks(short, duplicates.SubmissionFilter())
+
+    print_table(results)
+    print(f"\nUnique messages flagged: {false_positives['unique']}/{count}")
+    print("Near-duplicates caught by words changed: "
+          + ', '.join(f"{edits}: {share:.1%}" for edits, share in caught.items()))
+    bloom_fp = bloom_false_positives(10_000, 200_000)
+    print(f"Bloom false positives at capacity (10,000 entries, target 1e-5): {bloom_fp:.1e}")
+
+    meta = run_metadata(messages=count, vocabulary=args.vocabulary, seed=args.seed)
+    meta['accuracy'] = {
+        'unique_flagged': false_positives['unique'],
+        'near_duplicates_caught': {str(edits): round(share, 4) for edits, share in caught.items()},
+        'bloom_false_positive_rate': bloom_fp,
+    }
+    print(f"\nSaved {save_results('contact_filter', results, meta, args.out)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+"""
+Fake MongoDB
+In-memory mongomock database with injectable per-operation latency
+
+    import fake_mongo
+    fake_mongo.install(latency_ms=2.0, jitter_ms=1.0)
+
+After install(), db.get_db() returns the fake database, so every helper in
+db.py runs its real queries against it with a simulated network round trip.
+"""
+import os
+import time
+import random
+from datetime import datetime, timedelta
+from functools import wraps
+from typing import Any, Dict, Iterator
+
+import mongomock
+
+# Rollup and sketch keys are routes (db.page_route), with stray URLs under 'other'
+PATHS = ['/', '/projects', '/about', '/contact', '/skills', 'other']
+
+
+class Latency:
+    """Sleep applied before every database operation"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.operations = 0
+
+    def wait(self):
+        self.operations += 1
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+
+class LatencyProxy:
+    """Wraps a mongomock client, database or collection; method calls pay the latency"""
+
+    def __init__(self, target: Any, latency: Latency):
+        self._target = target
+        self._latency = latency
+
+    def __getitem__(self, name: str) -> 'LatencyProxy':
+        return LatencyProxy(self._target[name], self._latency)
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if isinstance(attr, (mongomock.Database, mongomock.Collection)):
+            return LatencyProxy(attr, self._latency)
+        if name == 'command' and isinstance(self._target, mongomock.Database):
+            return self._command
+        if name == 'find' and isinstance(self._target, mongomock.Collection):
+            return self._find
+        if not callable(attr):
+            return attr
+
+        @wraps(attr)
+        def call(*args, **kwargs):
+            self._latency.wait()
+            return attr(*args, **kwargs)
+        return call
+
+    def _find(self, filter: Any = None, projection: Any = None, *args, **kwargs):
+        self._latency.wait()
+        if isinstance(projection, dict) and any(isinstance(v, dict) for v in projection.values()):
+            # mongomock can't evaluate expression projections; apply them in Python
+            return ProjectedCursor(self._target.find(filter, None, *args, **kwargs), projection)
+        return self._target.find(filter, projection, *args, **kwargs)
+
+    def _command(self, command: Any, *args, **kwargs):
+        self._latency.wait()
+        if command == 'dbstats':
+            # Not implemented by mongomock; rough sizes are enough for the health payload
+            names = self._target.list_collection_names()
+            documents = sum(self._target[name].count_documents({}) for name in names)
+            return {'db': self._target.name, 'collections': len(names),
+                    'dataSize': documents * 512, 'storageSize': documents * 640}
+        return self._target.command(command, *args, **kwargs)
+
+
+def _field(document: Dict[str, Any], ref: Any) -> Any:
+    return document.get(ref[1:]) if isinstance(ref, str) and ref.startswith('$') else ref
+
+
+def _evaluate(document: Dict[str, Any], expression: Dict[str, Any]) -> Any:
+    """The expression operators db.py projects with"""
+    (op, args), = expression.items()
+    if op == '$substrCP':
+        value, start, length = (_field(document, arg) for arg in args)
+        return (value or '')[start:start + length]
+    if op == '$strLenCP':
+        return len(_field(document, args) or '')
+    raise NotImplementedError(f'{op} is not emulated by fake_mongo')
+
+
+class ProjectedCursor:
+    """mongomock cursor whose documents get an expression projection applied"""
+
+    def __init__(self, cursor, projection: Dict[str, Any]):
+        self._cursor = cursor
+        self._projection = projection
+
+    def sort(self, *args, **kwargs) -> 'ProjectedCursor':
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def skip(self, count: int) -> 'ProjectedCursor':
+        self._cursor = self._cursor.skip(count)
+        return self
+
+    def limit(self, count: int) -> 'ProjectedCursor':
+        self._cursor = self._cursor.limit(count)
+        return self
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for document in self._cursor:
+            projected = {'_id': document['_id']}
+            for field, spec in self._projection.items():
+                if isinstance(spec, dict):
+                    projected[field] = _evaluate(document, spec)
+                elif spec and field in document:
+                    projected[field] = document[field]
+            yield projected
+
+
+def seed(database, contacts: int = 500, days: int = 30, seed_value: int = 42):
+    """Contacts, hourly/daily rollups and daily visitor sketches shaped like production data"""
+    rng = random.Random(seed_value)
+    now = datetime.utcnow().replace(microsecond=0)
+
+    database.contacts.insert_many([{
+        'name': f'Visitor {i}',
+        'email': f'visitor{i}@example.com',
+        'subject': f'Question #{i}',
+        'message': ' '.join(rng.choice(['hello', 'project', 'collaborate', 'resume', 'portfolio', 'ml'])
+                            for _ in range(rng.randint(20, 200))),
+        'created_at': now - timedelta(minutes=i * 37),
+        'read': rng.random() < 0.7,
+        'replied': rng.random() < 0.3,
+        'ip_address': f'10.0.{i // 256}.{i % 256}',
+        'user_agent': 'Mozilla/5.0 (benchmark)',
+    } for i in range(contacts)])
+
+    rollups = []
+    start = (now - timedelta(days=days)).replace(minute=0, second=0)
+    for day in range(days + 1):
+        bucket = (start + timedelta(days=day)).replace(hour=0)
+        for path in PATHS:
+            rollups.append({'_id': f"day:{bucket:%Y-%m-%dT%H}:{path}", 'granularity': 'day',
+                            'bucket': bucket, 'path': path, 'count': rng.randint(10, 500)})
+    for hour in range(49):
+        bucket = now.replace(minute=0, second=0) - timedelta(hours=hour)
+        for path in PATHS:
+            rollups.append({'_id': f"hour:{bucket:%Y-%m-%dT%H}:{path}", 'granularity': 'hour',
+                            'bucket': bucket, 'path': path, 'count': rng.randint(0, 40)})
+    database.analytics_rollups.insert_many(rollups)
+
+    # One compacted sketch per day and path, as compact_visitor_sketches leaves them
+    from hll import HyperLogLog
+    sketches = []
+    for day in range(days + 1):
+        bucket = (start + timedelta(days=day)).replace(hour=0)
+        by_path = {path: HyperLogLog() for path in PATHS}
+        for path, sketch in by_path.items():
+            sketch.update(f'10.{day}.{rng.randint(0, 400)}|Mozilla/5.0 (benchmark)' for _ in range(rng.randint(10, 300)))
+        by_path['*'] = HyperLogLog.union(by_path.values())
+        sketches.extend({'_id': f"{bucket:%Y-%m-%d}:{path}:compacted:seed", 'day': bucket, 'path': path,
+                         'writer': 'compacted', 'sketch': sketch.to_bytes(), 'updated_at': now}
+                        for path, sketch in by_path.items())
+    database.visitor_sketches.insert_many(sketches)
+
+
+def install(latency_ms: float = 0.0, jitter_ms: float = 0.0, seed_data: bool = True) -> Latency:
+    """Point db.py at a fresh fake database; returns the latency knob"""
+    import db
+
+    latency = Latency(latency_ms, jitter_ms)
+    client = mongomock.MongoClient()
+    database = client['portfolio']
+    db.ensure_indexes(database)
+    if seed_data:
+        seed(database)
+
+    def point_db():
+        db._client = LatencyProxy(client, latency)
+        db._db = db._client['portfolio']
+
+    point_db()
+    # db.py drops its client in forked children (gunicorn preload); the
+    # in-memory fake survives fork fine, so give each child its copy back
+    os.register_at_fork(after_in_child=point_db)
+    return latency
@@ -0,0 +1,147 @@
+"""
+HTTP Load Test
+Drives a local multi-worker gunicorn with concurrent clients and reports p50/p95/p99
+
+    python benchmarks/load.py [--workers 4] [--clients 8] [--duration 10] [--db-latency-ms 2]
+
+Gunicorn serves bench_app (the real app on the fake database) with the
+production gunicorn.conf.py, so workers are preloaded and warmed up. Each client
+process sends requests back to back over fresh connections, the way a
+proxy in front of sync workers would, cycling through --paths.
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+import subprocess
+import http.client
+import multiprocessing
+from typing import Dict, List, Tuple
+
+from common import BENCH_DIR, SERVER_DIR, offline_environment, summarize, run_metadata, save_results, print_table
+
+DEFAULT_PATHS = [
+    '/',
+    '/api/projects',
+    '/api/projects?category=ai&q=news',
+    '/api/skills',
+    '/api/stats',
+    '/api/health',
+    '/api/analytics?window=7d',
+]
+
+# http.client sends no User-Agent, which the app counts as a bot and doesn't record
+HEADERS = {
+    'Accept-Encoding': 'br, gzip',
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                  'Chrome/120.0.0.0 Safari/537.36',
+}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, workers: int, db_latency_ms: float, db_jitter_ms: float) -> subprocess.Popen:
+    env = dict(os.environ, **offline_environment(),
+               BENCH_DB_LATENCY_MS=str(db_latency_ms), BENCH_DB_JITTER_MS=str(db_jitter_ms))
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--chdir', SERVER_DIR, '--pythonpath', BENCH_DIR,
+         '--config', os.path.join(SERVER_DIR, 'gunicorn.conf.py'), '--workers', str(workers), '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+         'bench_app:app'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+
+
+def request(port: int, path: str) -> Tuple[int, float]:
+    started = time.perf_counter()
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        conn.request('GET', path, headers=HEADERS)
+        response = conn.getresponse()
+        response.read()
+        status = response.status
+    except OSError:
+        status = 0
+    finally:
+        conn.close()
+    return status, time.perf_counter() - started
+
+
+def wait_until_ready(port: int, server: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited: {server.stderr.read().decode(errors='replace')}")
+        if request(port, '/api/health/live')[0] == 200:
+            return
+        time.sleep(0.2)
+    raise RuntimeError('gunicorn did not become ready')
+
+
+def client(port: int, paths: List[str], offset: int, warmup: float, duration: float
+           ) -> Dict[str, Dict[str, List]]:
+    """Run one client; returns {path: {'latencies': [...], 'statuses': [...]}}"""
+    samples: Dict[str, Dict[str, List]] = {path: {'latencies': [], 'statuses': []} for path in paths}
+    measure_from = time.monotonic() + warmup
+    stop_at = measure_from + duration
+    i = offset
+    while True:
+        now = time.monotonic()
+        if now >= stop_at:
+            return samples
+        path = paths[i % len(paths)]
+        i += 1
+        status, latency = request(port, path)
+        if now >= measure_from:
+            samples[path]['latencies'].append(latency)
+            samples[path]['statuses'].append(status)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent client processes')
+    parser.add_argument('--duration', type=float, default=10.0, help='Measured seconds')
+    parser.add_argument('--warmup', type=float, default=2.0, help='Unmeasured seconds before that')
+    parser.add_argument('--db-latency-ms', type=float, default=0.0)
+    parser.add_argument('--db-jitter-ms', type=float, default=0.0)
+    parser.add_argument('--paths', nargs='*', default=DEFAULT_PATHS)
+    parser.add_argument('--out', help='Result file (default: benchmarks/results/load-<time>.json)')
+    args = parser.parse_args()
+
+    port = free_port()
+    server = start_server(port, args.workers, args.db_latency_ms, args.db_jitter_ms)
+    try:
+        wait_until_ready(port, server)
+        with multiprocessing.Pool(args.clients) as pool:
+            runs = pool.starmap(client, [(port, args.paths, n, args.warmup, args.duration)
+                                         for n in range(args.clients)])
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    results = {}
+    everything, errors = [], 0
+    for path in args.paths:
+        latencies = [latency for run in runs for latency in run[path]['latencies']]
+        statuses = [status for run in runs for status in run[path]['statuses']]
+        results[path] = summarize(latencies, args.duration)
+        results[path]['errors'] = sum(1 for status in statuses if not 200 <= status < 400)
+        everything += latencies
+        errors += results[path]['errors']
+    results['overall'] = summarize(everything, args.duration)
+    results['overall']['errors'] = errors
+
+    print_table(results)
+    meta = run_metadata(workers=args.workers, clients=args.clients, duration=args.duration,
+                        warmup=args.warmup, db_latency_ms=args.db_latency_ms,
+                        db_jitter_ms=args.db_jitter_ms, paths=args.paths)
+    print(f"\n{errors} errors; saved {save_results('load', results, meta, args.out)}")
+
+
+if __name__ == '__main__':
+    main()
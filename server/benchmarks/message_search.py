@@ -0,0 +1,121 @@
+"""
+Message Search Benchmark
+Build time, memory and query latency of search.InvertedIndex over a large synthetic inbox
+
+    python benchmarks/message_search.py [--messages 100000] [--queries 200]
+
+Messages draw their words from a Zipf-distributed vocabulary, so a few
+words appear in most messages and most words in very few, as in real
+mail. Query classes cover rare and common words, multi-word queries,
+following a page cursor and rendering snippets for a page of hits.
+(MongoDB's text index, used when the database is up, isn't exercised:
+mongomock does not implement $text.)
+"""
+import os
+import time
+import itertools
+import random
+import resource
+import argparse
+from typing import Callable, Dict, Any, List
+
+from common import offline_environment, summarize, run_metadata, save_results, print_table
+
+# Must be in place before the app's modules are imported
+os.environ.update(offline_environment())
+
+import search
+
+FIRST_NAMES = ['Ada', 'Alan', 'Grace', 'Linus', 'Margaret', 'Dennis', 'Barbara', 'Ken', 'Radia', 'Guido']
+LAST_NAMES = ['Lovelace', 'Turing', 'Hopper', 'Torvalds', 'Hamilton', 'Ritchie', 'Liskov', 'Thompson']
+
+
+def vocabulary(size: int, rng: random.Random) -> List[str]:
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(letters) for _ in range(rng.randint(3, 10))))
+    return sorted(words)
+
+
+def corpus(messages: int, vocab: List[str], rng: random.Random) -> List[Dict[str, Any]]:
+    cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocab))))
+
+    def words(count: int) -> str:
+        return ' '.join(rng.choices(vocab, cum_weights=cumulative, k=count))
+
+    documents = []
+    for i in range(messages):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        documents.append({
+            'name': f'{first} {last}',
+            'email': f'{first.lower()}.{last.lower()}{i}@example.com',
+            'subject': words(rng.randint(3, 8)).capitalize(),
+            'message': words(rng.randint(20, 150)),
+        })
+    return documents
+
+
+def time_queries(name: str, run: Callable[[], Any], count: int) -> Dict[str, Any]:
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(count):
+        t = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - t)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=100_000)
+    parser.add_argument('--vocabulary', type=int, default=20_000)
+    parser.add_argument('--queries', type=int, default=200, help='Queries timed per class')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', help='Result file (default: benchmarks/results/message_search-<time>.json)')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocab = vocabulary(args.vocabulary, rng)
+    documents = corpus(args.messages, vocab, rng)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    index = search.InvertedIndex()
+    index.update((f'{i:024x}', document) for i, document in enumerate(documents))
+    build_seconds = time.perf_counter() - started
+    index_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+    print(f"Indexed {len(index)} messages in {build_seconds:.1f} s "
+          f"(~{index_kb / 1024:.0f} MB, {len(index._postings)} terms)\n")
+
+    # Vocabulary rank 0 is the most common word; past ~1000 words are rare
+    common, mid, rare = vocab[0], vocab[50], vocab[5000]
+    classes = {
+        'rare_word': [rare],
+        'mid_word': [mid],
+        'common_word': [common],
+        'two_words': [common, mid],
+        'three_words': [common, vocab[10], mid],
+        'sender_name': ['grace', 'hopper'],
+    }
+    results = {}
+    for name, terms in classes.items():
+        results[name] = time_queries(name, lambda: index.search(terms, 20), args.queries)
+        results[name]['hits_for_rarest_term'] = min(len(index._postings.get(t, ((),))[0]) for t in terms)
+
+    first_page = index.search([mid], 20)
+    after = first_page[-1][:2] if first_page else None
+    results['next_page'] = time_queries('next_page', lambda: index.search([mid], 20, after), args.queries)
+    results['snippets_20'] = time_queries(
+        'snippets_20', lambda: [(search.highlight(doc['subject'], [mid]), search.snippet(doc['message'], [mid]))
+                                for _, _, doc in first_page], args.queries)
+
+    print_table(results)
+    meta = run_metadata(messages=args.messages, vocabulary=args.vocabulary, queries=args.queries, seed=args.seed)
+    meta['index'] = {'build_seconds': round(build_seconds, 2), 'peak_rss_growth_kb': index_kb,
+                     'terms': len(index._postings)}
+    print(f"\nSaved {save_results('message_search', results, meta, args.out)}")
+
+
+if __name__ == '__main__':
+    main()
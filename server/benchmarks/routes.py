@@ -0,0 +1,113 @@
+"""
+Route Micro-Benchmarks
+Per-route latency through Flask's test client, against the fake database
+
+    python benchmarks/routes.py [--iterations N] [--db-latency-ms MS] [--cold] [--only NAME ...]
+
+No sockets or worker processes are involved, so differences between runs
+come from the request path itself (routing, views, db.py, serialization).
+"""
+import os
+import sys
+import time
+import argparse
+
+from common import offline_environment, summarize, run_metadata, save_results, print_table
+
+# Must be in place before the app is imported
+os.environ.update(offline_environment())
+
+CONTACT_FORM = {
+    'name': 'Benchmark Visitor',
+    'email': 'visitor@example.com',
+    'subject': 'Benchmark',
+    'message': 'Hello from the benchmark suite. ' * 10,
+}
+
+
+def first_asset(app) -> str:
+    assets = os.path.join(app.static_folder, 'assets')
+    names = sorted(n for n in os.listdir(assets) if n.endswith('.js')) if os.path.isdir(assets) else []
+    return f'/assets/{names[0]}' if names else '/assets/missing.js'
+
+
+def build_routes(app):
+    """(name, method, path, test client kwargs); admin routes use the logged-in session"""
+    return [
+        ('spa_shell', 'GET', '/', {}),
+        ('spa_shell_brotli', 'GET', '/about', {'headers': {'Accept-Encoding': 'br, gzip'}}),
+        ('static_asset', 'GET', first_asset(app), {'headers': {'Accept-Encoding': 'br, gzip'}}),
+        ('api_projects', 'GET', '/api/projects', {}),
+        ('api_projects_filtered', 'GET', '/api/projects?category=ai&tech=python&q=news', {}),
+        ('api_project', 'GET', '/api/projects/movie-matrix', {}),
+        ('api_skills', 'GET', '/api/skills', {}),
+        ('api_stats', 'GET', '/api/stats', {}),
+        ('api_health', 'GET', '/api/health', {}),
+        ('api_health_ready', 'GET', '/api/health/ready', {}),
+        ('api_analytics', 'GET', '/api/analytics?window=7d', {}),
+        ('admin_dashboard', 'GET', '/admin/dashboard', {}),
+        ('admin_messages', 'GET', '/admin/messages', {}),
+        ('contact', 'POST', '/contact', {'json': CONTACT_FORM}),
+        ('metrics', 'GET', '/metrics', {}),
+    ]
+
+
+def bench_route(client, method, path, kwargs, iterations, warmup, before=None):
+    statuses = {}
+    for _ in range(warmup):
+        client.open(path, method=method, **kwargs)
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        if before:
+            before()
+        t0 = time.perf_counter()
+        response = client.open(path, method=method, **kwargs)
+        latencies.append(time.perf_counter() - t0)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    elapsed = time.perf_counter() - started
+
+    result = summarize(latencies, elapsed)
+    result['statuses'] = {str(code): count for code, count in sorted(statuses.items())}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--db-latency-ms', type=float, default=0.0, help='Simulated MongoDB round trip')
+    parser.add_argument('--db-jitter-ms', type=float, default=0.0)
+    parser.add_argument('--cold', action='store_true', help='Clear the query cache before every request')
+    parser.add_argument('--only', nargs='*', help='Run only routes whose name contains one of these')
+    parser.add_argument('--out', help='Result file (default: benchmarks/results/routes-<time>.json)')
+    args = parser.parse_args()
+
+    os.environ['BENCH_DB_LATENCY_MS'] = str(args.db_latency_ms)
+    os.environ['BENCH_DB_JITTER_MS'] = str(args.db_jitter_ms)
+    from bench_app import app
+    from db import query_cache
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+
+    results = {}
+    for name, method, path, kwargs in build_routes(app):
+        if args.only and not any(part in name for part in args.only):
+            continue
+        results[name] = bench_route(client, method, path, kwargs, args.iterations, args.warmup,
+                                    before=query_cache.clear if args.cold else None)
+        unexpected = {code: n for code, n in results[name]['statuses'].items() if not code.startswith(('2', '3'))}
+        if unexpected:
+            print(f"warning: {name} returned {unexpected}", file=sys.stderr)
+
+    print_table(results)
+    meta = run_metadata(iterations=args.iterations, warmup=args.warmup, db_latency_ms=args.db_latency_ms,
+                        db_jitter_ms=args.db_jitter_ms, cold=args.cold)
+    print(f"\nSaved {save_results('routes', results, meta, args.out)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Startup Profile
+Cold-start time, peak memory and an import-time breakdown for building the app
+
+    python benchmarks/startup.py [--trials 10] [--top 15]
+
+Every trial is a fresh interpreter (what a new gunicorn worker pays) that
+imports app and calls create_app(). The breakdown comes from
+`python -X importtime` and is grouped by top-level package.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+from collections import Counter
+from typing import Dict, Any, List, Tuple
+
+from common import SERVER_DIR, offline_environment, summarize, run_metadata, save_results, print_table
+
+PROBE = '''
+import json, resource, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+built = time.perf_counter()
+json.dump({"import": imported - started, "create_app": built - imported, "total": built - started,
+           "modules": len(sys.modules), "maxrss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss},
+          sys.stdout)
+'''
+
+
+def run_trial(env: Dict[str, str], importtime: bool = False) -> Tuple[Dict[str, Any], str]:
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', PROBE]
+    result = subprocess.run(command, cwd=SERVER_DIR, env=env, capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    # The app may print startup warnings before the JSON line
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def import_breakdown(stderr: str) -> List[Tuple[str, float, int]]:
+    """(top-level package, self time in ms, modules) sorted by time"""
+    self_us: Counter = Counter()
+    modules: Counter = Counter()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        # import time:       123 |        456 |   package.module
+        self_time, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        self_us[package] += int(self_time)
+        modules[package] += 1
+    return [(package, us / 1000, modules[package]) for package, us in self_us.most_common()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--trials', type=int, default=10)
+    parser.add_argument('--top', type=int, default=15, help='Packages to list in the import breakdown')
+    parser.add_argument('--out', help='Result file (default: benchmarks/results/startup-<time>.json)')
+    args = parser.parse_args()
+
+    env = dict(os.environ, **offline_environment())
+    run_trial(env)  # Warm the OS page cache and __pycache__ first
+
+    trials = [run_trial(env)[0] for _ in range(args.trials)]
+    results = {}
+    for phase in ('import', 'create_app', 'total'):
+        results[phase] = summarize([trial[phase] for trial in trials], elapsed=0)
+    results['total']['maxrss_kb'] = max(trial['maxrss_kb'] for trial in trials)
+    results['total']['modules'] = trials[-1]['modules']
+
+    print_table(results)
+    print(f"\nPeak RSS {results['total']['maxrss_kb'] / 1024:.1f} MB, {results['total']['modules']} modules loaded")
+
+    _, stderr = run_trial(env, importtime=True)
+    breakdown = import_breakdown(stderr)
+    print(f"\nImport time by package (self time, one run):")
+    for package, ms, count in breakdown[:args.top]:
+        print(f"  {ms:>8.1f} ms  {count:>4} modules  {package}")
+
+    meta = run_metadata(trials=args.trials)
+    meta['import_breakdown'] = [{'package': p, 'ms': round(ms, 2), 'modules': n} for p, ms, n in breakdown]
+    print(f"\nSaved {save_results('startup', results, meta, args.out)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+User-Agent Classification Benchmark
+Throughput of bots.classify on realistic traffic, cached and uncached, plus rule accuracy
+
+    python benchmarks/user_agents.py [--requests 200000] [--agents 300]
+
+The traffic stream draws from a labelled corpus of browser and bot agents
+with a Zipf-like skew (a few agents make most requests), padded with
+browser agents that differ in their version numbers the way real ones do.
+Scenarios:
+  cached        bots.classify (LRU of verdicts)
+  uncached      bots' compiled rules on every request
+  alternation   all rules as one combined regex (slower: no literal-prefix scan)
+"""
+import re
+import time
+import random
+import argparse
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from common import summarize, run_metadata, save_results
+
+import bots
+
+# Requests per timed sample; result rows are per batch, so ms per batch = us per request
+BATCH = 1000
+
+# (user agent, expected category or None for a browser)
+CORPUS: List[Tuple[str, Optional[str]]] = [
+    ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+     'Chrome/120.0.0.0 Safari/537.36', None),
+    ('Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+     'Version/17.1 Safari/605.1.15', None),
+    ('Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+     'Version/17.1 Mobile/15E148 Safari/604.1', None),
+    ('Mozilla/5.0 (X11; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0', None),
+    ('Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) '
+     'Chrome/120.0.6099.43 Mobile Safari/537.36', None),
+    ('Mozilla/5.0 (Linux; Android 9; CUBOT_P30) AppleWebKit/537.36 (KHTML, like Gecko) '
+     'Chrome/119.0.0.0 Mobile Safari/537.36', None),
+    ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+     'Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0', None),
+    ('Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)', 'crawler'),
+    ('Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; bingbot/2.0; '
+     '+http://www.bing.com/bingbot.htm) Chrome/116.0.1938.76 Safari/537.36', 'crawler'),
+    ('Mozilla/5.0 (compatible; AhrefsBot/7.0; +http://ahrefs.com/robot/)', 'crawler'),
+    ('Mozilla/5.0 (compatible; YandexBot/3.0; +http://yandex.com/bots)', 'crawler'),
+    ('Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; GPTBot/1.0; '
+     '+https://openai.com/gptbot)', 'crawler'),
+    ('Mozilla/5.0 (compatible; Yahoo! Slurp; http://help.yahoo.com/help/us/ysearch/slurp)', 'crawler'),
+    ('Mozilla/5.0 (compatible; UptimeRobot/2.0; http://www.uptimerobot.com/)', 'monitor'),
+    ('Pingdom.com_bot_version_1.4_(http://www.pingdom.com/)', 'monitor'),
+    ('Mozilla/5.0 (compatible; StatusCake)', 'monitor'),
+    ('kube-probe/1.27', 'monitor'),
+    ('facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)', 'preview'),
+    ('Slackbot-LinkExpanding 1.0 (+https://api.slack.com/robots)', 'preview'),
+    ('Mozilla/5.0 (compatible; Discordbot/2.0; +https://discordapp.com)', 'preview'),
+    ('TelegramBot (like TwitterBot)', 'preview'),
+    ('WhatsApp/2.23.20.0', 'preview'),
+    ('LinkedInBot/1.0 (compatible; Mozilla/5.0; Apache-HttpClient +http://www.linkedin.com)', 'preview'),
+    ('Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+     'HeadlessChrome/120.0.6099.28 Safari/537.36', 'headless'),
+    ('Mozilla/5.0 (Linux; Android 11; moto g power (2022)) AppleWebKit/537.36 (KHTML, like Gecko) '
+     'Chrome/119.0.0.0 Mobile Safari/537.36 Chrome-Lighthouse', 'headless'),
+    ('curl/8.4.0', 'tool'),
+    ('Wget/1.21.4', 'tool'),
+    ('python-requests/2.31.0', 'tool'),
+    ('Go-http-client/1.1', 'tool'),
+    ('PostmanRuntime/7.35.0', 'tool'),
+    ('', 'empty'),
+]
+
+
+def accuracy() -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """(agent, expected, got) for every corpus entry bots.classify gets wrong"""
+    return [(agent, expected, bots.classify(agent)) for agent, expected in CORPUS
+            if bots.classify(agent) != expected]
+
+
+def traffic(requests: int, agents: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    pool = [agent for agent, _ in CORPUS]
+    browsers = [agent for agent, expected in CORPUS if expected is None and 'Chrome/' in agent]
+    while len(pool) < agents:
+        # Same browser, different build: a distinct cache key with the same verdict
+        base = rng.choice(browsers)
+        pool.append(re.sub(r'Chrome/\d+\.0\.\d+\.\d+', f'Chrome/{rng.randint(100, 121)}.0.'
+                           f'{rng.randint(1000, 6999)}.{rng.randint(0, 250)}', base, count=1))
+    weights = [1 / (rank + 1) for rank in range(len(pool))]
+    return rng.choices(pool, weights=weights, k=requests)
+
+
+def alternation_classifier() -> Callable[[str], Optional[str]]:
+    pattern = re.compile('|'.join(f"(?P<{category}>{'|'.join(patterns)})"
+                                  for category, patterns in bots.BOT_RULES.items()))
+
+    def classify(user_agent: str) -> Optional[str]:
+        if not user_agent.strip():
+            return 'empty'
+        match = pattern.search(user_agent.lower())
+        return match.lastgroup if match else None
+    return classify
+
+
+def measure(classify: Callable[[str], Optional[str]], stream: List[str], batch: int = BATCH) -> Dict[str, Any]:
+    """Latency of each batch of `batch` requests (too short to time one at a time)"""
+    samples = []
+    for start in range(0, len(stream) - batch + 1, batch):
+        chunk = stream[start:start + batch]
+        started = time.perf_counter()
+        for agent in chunk:
+            classify(agent)
+        samples.append(time.perf_counter() - started)
+    row = summarize(samples)
+    row['requests_per_sec'] = round(row['ops_per_sec'] * batch)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200_000)
+    parser.add_argument('--agents', type=int, default=300, help='Distinct User-Agent strings in the stream')
+    parser.add_argument('--out', help='Result file (default: benchmarks/results/user_agents-<time>.json)')
+    args = parser.parse_args()
+
+    wrong = accuracy()
+    for agent, expected, got in wrong:
+        print(f"MISCLASSIFIED {agent!r}: expected {expected}, got {got}")
+    print(f"Accuracy: {len(CORPUS) - len(wrong)}/{len(CORPUS)} corpus agents\n")
+
+    stream = traffic(args.requests, args.agents)
+    bots._classify.cache_clear()
+    results = {
+        'cached': measure(bots.classify, stream),
+        'uncached': measure(lambda agent: bots._classify.__wrapped__(agent[:bots.MAX_USER_AGENT_LENGTH]), stream),
+        'alternation': measure(alternation_classifier(), stream),
+    }
+    cache = bots.stats()
+    bot_share = sum(bots.classify(agent) is not None for agent in stream) / len(stream)
+
+    print(f"{'scenario':<12}  {'mean ns':>9}  {'p99 ns':>9}  {'req/s':>12}")
+    for name, row in results.items():
+        print(f"{name:<12}  {row['mean_ms'] * 1e6 / BATCH:>9.0f}  {row['p99_ms'] * 1e6 / BATCH:>9.0f}  "
+              f"{row['requests_per_sec']:>12,}")
+    print(f"\nCache: {cache['hits']} hits, {cache['misses']} misses ({cache['size']} entries); "
+          f"{bot_share:.0%} of requests classified as bots")
+
+    meta = run_metadata(requests=args.requests, agents=args.agents, batch=BATCH)
+    meta['misclassified'] = [{'agent': agent, 'expected': expected, 'got': got} for agent, expected, got in wrong]
+    print(f"\nSaved {save_results('user_agents', results, meta, args.out)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Bot Detection
+Classifies User-Agent strings so crawler and monitor traffic stays out of analytics
+
+    classify('Mozilla/5.0 (compatible; Googlebot/2.1; ...)')  # 'crawler'
+    classify('Mozilla/5.0 (Windows NT 10.0; Win64; x64) ...')   # None
+
+Rules are precompiled and verdicts are kept in an LRU cache keyed by the
+User-Agent string, so the handful of agents a site sees over and over
+cost a dict lookup. Benchmark: python benchmarks/user_agents.py
+"""
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+# Category -> lowercase patterns, checked in this order, so specific names
+# ("UptimeRobot", "Slackbot") win over the generic "bot" they contain.
+BOT_RULES: Dict[str, List[str]] = {
+    'monitor': [
+        r'uptimerobot', r'pingdom', r'statuscake', r'site24x7', r'better ?uptime', r'uptime-?kuma',
+        r'freshping', r'hetrixtools', r'newrelicpinger', r'datadog(?:/synthetics| agent)', r'checkly',
+        r'kube-probe', r'elb-healthchecker', r'googlehc', r'cron-job\.org',
+    ],
+    'preview': [
+        r'facebookexternalhit', r'facebookcatalog', r'meta-externalagent', r'twitterbot', r'slackbot',
+        r'slack-imgproxy', r'discordbot', r'telegrambot', r'whatsapp', r'linkedinbot', r'skypeuripreview',
+        r'embedly', r'redditbot', r'pinterest(?:bot)?/', r'vkshare', r'iframely', r'mastodon/',
+    ],
+    'headless': [
+        r'headlesschrome', r'phantomjs', r'puppeteer', r'playwright', r'selenium', r'lighthouse',
+        r'chrome-lighthouse', r'gtmetrix', r'pagespeed',
+    ],
+    'tool': [
+        r'^curl/', r'^wget/', r'python-requests', r'python-urllib', r'python-httpx', r'aiohttp',
+        r'go-http-client', r'^java/', r'okhttp', r'libwww-perl', r'^axios/', r'node-fetch', r'undici',
+        r'postmanruntime', r'insomnia', r'scrapy', r'httpclient', r'^ruby', r'^php/',
+    ],
+    'crawler': [
+        r'bot\b', r'crawl', r'spider', r'slurp', r'archiver', r'mediapartners', r'feedfetcher',
+        r'bingpreview', r'yahoo! ?slurp', r'ia_archiver', r'petalsearch', r'gptbot', r'ccbot',
+    ],
+}
+
+# One search per rule: each pattern starts with a literal, which re scans for
+# much faster than it can try a combined alternation at every position.
+# Matched against the lowercased agent, about 4x faster than re.IGNORECASE.
+_RULES = [(category, re.compile(pattern)) for category, patterns in BOT_RULES.items() for pattern in patterns]
+
+# Longer strings are cut before matching and caching (real agents are well under this)
+MAX_USER_AGENT_LENGTH = 512
+
+
+@lru_cache(maxsize=int(os.getenv('BOT_UA_CACHE_SIZE', 2048)))
+def _classify(user_agent: str) -> Optional[str]:
+    if not user_agent.strip():
+        return 'empty'  # every browser sends one
+    user_agent = user_agent.lower()
+    for category, rule in _RULES:
+        if rule.search(user_agent):
+            return category
+    return None
+
+
+def classify(user_agent: Optional[str]) -> Optional[str]:
+    """Bot category of a User-Agent ('crawler', 'monitor', ...), or None for a browser"""
+    return _classify((user_agent or '')[:MAX_USER_AGENT_LENGTH])
+
+
+def is_bot(user_agent: Optional[str]) -> bool:
+    return classify(user_agent) is not None
+
+
+def stats() -> Dict[str, int]:
+    """Verdict cache counters for this worker"""
+    info = _classify.cache_info()
+    return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize}
@@ -0,0 +1,124 @@
+"""
+Project Catalog
+Indexed, read-only view over the portfolio projects for filtering and search
+"""
+import re
+from bisect import bisect_left
+from typing import Dict, Any, List, Set, Iterable, Optional
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric tokens"""
+    return TOKEN_RE.findall(text.casefold())
+
+
+class ProjectCatalog:
+    """
+    Projects indexed once by id, category, technology and text tokens.
+
+    Filters are answered by set operations over the inverted indexes;
+    results keep the original project order.
+    """
+
+    def __init__(self, projects: Iterable[Dict[str, Any]]):
+        self.projects = list(projects)
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_category: Dict[str, Set[str]] = {}
+        self.by_tech: Dict[str, Set[str]] = {}
+        self.by_token: Dict[str, Set[str]] = {}
+        self.technologies: Set[str] = set()
+        self._position: Dict[str, int] = {}
+
+        for position, project in enumerate(self.projects):
+            project_id = project['id']
+            self.by_id[project_id] = project
+            self._position[project_id] = position
+
+            for category in project.get('category', []):
+                self.by_category.setdefault(category.casefold(), set()).add(project_id)
+
+            for tech in project.get('tech_stack', []):
+                self.technologies.add(tech)
+                self.by_tech.setdefault(tech.casefold(), set()).add(project_id)
+
+            text = f"{project.get('title', '')} {project.get('description', '')}"
+            for token in tokenize(text):
+                self.by_token.setdefault(token, set()).add(project_id)
+
+        # Sorted vocabulary for prefix lookups
+        self._vocabulary = sorted(self.by_token)
+
+    def __len__(self) -> int:
+        return len(self.projects)
+
+    def get(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """Get a project by id"""
+        return self.by_id.get(project_id)
+
+    def category_counts(self) -> Dict[str, int]:
+        """Number of projects per category"""
+        return {category: len(ids) for category, ids in self.by_category.items()}
+
+    # ============== Index Lookups ==============
+
+    @staticmethod
+    def _combine(index: Dict[str, Set[str]], keys: List[str], match_all: bool) -> Set[str]:
+        """Union (any) or intersection (all) of the posting sets for keys"""
+        postings = [index.get(key.casefold(), set()) for key in keys]
+        if match_all:
+            postings.sort(key=len)
+            result = set(postings[0])
+            for ids in postings[1:]:
+                result &= ids
+            return result
+        return set().union(*postings)
+
+    def _prefix_ids(self, prefix: str) -> Set[str]:
+        """Ids of projects containing a token that starts with prefix"""
+        ids: Set[str] = set()
+        i = bisect_left(self._vocabulary, prefix)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(prefix):
+            ids |= self.by_token[self._vocabulary[i]]
+            i += 1
+        return ids
+
+    def search(self, query: str) -> Set[str]:
+        """Ids whose title/description match every query token as a prefix"""
+        result: Optional[Set[str]] = None
+        for token in tokenize(query):
+            ids = self._prefix_ids(token)
+            result = ids if result is None else result & ids
+            if not result:
+                return set()
+        return set(self.by_id) if result is None else result
+
+    def filter(self, categories: Optional[List[str]] = None,
+               technologies: Optional[List[str]] = None,
+               match_all: bool = False,
+               query: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Projects matching all given criteria.
+
+        `match_all` decides whether a project needs every listed category
+        (and every listed technology) or at least one of them; the criteria
+        themselves are always combined with AND.
+        """
+        candidates: List[Set[str]] = []
+        if categories:
+            candidates.append(self._combine(self.by_category, categories, match_all))
+        if technologies:
+            candidates.append(self._combine(self.by_tech, technologies, match_all))
+        if query:
+            candidates.append(self.search(query))
+
+        if not candidates:
+            return list(self.projects)
+
+        candidates.sort(key=len)
+        ids = candidates[0]
+        for other in candidates[1:]:
+            ids = ids & other
+
+        return [self.by_id[i] for i in sorted(ids, key=self._position.__getitem__)]
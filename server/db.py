@@ -3,42 +3,292 @@ MongoDB Database Connection Module
 Provides singleton connection to MongoDB Atlas
 """
 import os
-from datetime import datetime
-from typing import Optional, Dict, Any, List
-from pymongo import MongoClient
-from pymongo.database import Database
-from pymongo.collection import Collection
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+import re
+import time
+import base64
+import socket
+import threading
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, Iterator, List, Tuple, Callable, TYPE_CHECKING
+
+from shared_cache import SQLiteCache, DEFAULT_CACHE_PATH
+from hll import HyperLogLog
+from metrics import timed_query, rollup_errors
+
+# pymongo (and the dnspython/bson stack behind it) is imported on first
+# connect rather than here; it is the slowest import in a worker's startup
+if TYPE_CHECKING:
+    from pymongo import MongoClient, UpdateOne
+    from pymongo.database import Database
+    from pymongo.collection import Collection
+
+# Same values as pymongo.ASCENDING / pymongo.DESCENDING
+ASCENDING = 1
+DESCENDING = -1
 
 # Singleton connection
-_client: Optional[MongoClient] = None
-_db: Optional[Database] = None
+_client: Optional['MongoClient'] = None
+_db: Optional['Database'] = None
+_connect_lock = threading.Lock()
+_warned_unconfigured = False
+
+# Short-TTL cache for dashboard counters, shared by all workers on the host;
+# entries are invalidated by the writes that change them
+QUERY_CACHE_TTL = int(os.getenv('QUERY_CACHE_TTL', 30))
+query_cache = SQLiteCache(
+    path=os.getenv('CACHE_SQLITE_PATH', DEFAULT_CACHE_PATH),
+    default_timeout=QUERY_CACHE_TTL,
+    threshold=int(os.getenv('CACHE_MAX_ENTRIES', 500)),
+    max_bytes=int(os.getenv('CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+    key_prefix='query:',
+)
+
+# Shared executor for running independent queries concurrently (created per process)
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_executor_lock = threading.Lock()
+
+
+# ============== Circuit Breaker ==============
+
+class CircuitBreaker:
+    """
+    Fails database access fast while MongoDB is unreachable.
+
+    Opens on a failed connect/ping or when the driver loses its last
+    writable server. While open, get_db() returns None immediately and a
+    single background thread probes with exponential backoff; a successful
+    probe (or the driver rediscovering a writable server) closes it again.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
 
+    def __init__(self, base_backoff: float = 1.0, max_backoff: float = 60.0):
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.state = self.CLOSED
+        self._lock = threading.Lock()
+        self._probing = False
+        self._backoff = base_backoff
+        self.opened_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.failures = 0
+        self.short_circuited = 0
+        self.probes = 0
+        self.trips = 0
+
+    def allow(self) -> bool:
+        """Whether a call may touch the database right now"""
+        if self.state == self.CLOSED:
+            return True
+        self.short_circuited += 1
+        return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                print("MongoDB reachable again, closing circuit breaker")
+            self.state = self.CLOSED
+            self._backoff = self.base_backoff
+            self.opened_at = None
+
+    def record_failure(self, error: Exception, probe: Callable[[], None]):
+        """Open the breaker and start the background probe (once)"""
+        with self._lock:
+            self.failures += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+            if self.state == self.CLOSED:
+                self.trips += 1
+                self.opened_at = datetime.utcnow()
+                print(f"MongoDB unavailable, opening circuit breaker: {self.last_error}")
+            self.state = self.OPEN
+            if self._probing:
+                return
+            self._probing = True
+        threading.Thread(target=self._probe_loop, args=(probe,), name='db-breaker-probe', daemon=True).start()
+
+    def _probe_loop(self, probe: Callable[[], None]):
+        try:
+            while self.state != self.CLOSED:
+                time.sleep(self._backoff)
+                self.probes += 1
+                self.state = self.HALF_OPEN
+                try:
+                    probe()
+                    self.record_success()
+                except Exception as e:
+                    with self._lock:
+                        self.failures += 1
+                        self.last_error = f"{type(e).__name__}: {e}"
+                        self.state = self.OPEN
+                        self._backoff = min(self._backoff * 2, self.max_backoff)
+        finally:
+            with self._lock:
+                self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'opened_at': self.opened_at.isoformat() if self.opened_at else None,
+            'last_error': self.last_error,
+            'next_probe_in': self._backoff if self.state != self.CLOSED else None,
+            'failures': self.failures,
+            'trips': self.trips,
+            'short_circuited': self.short_circuited,
+            'probes': self.probes,
+        }
 
-def get_db() -> Optional[Database]:
-    """Get MongoDB database connection (singleton)"""
+
+def _new_breaker() -> CircuitBreaker:
+    return CircuitBreaker(
+        base_backoff=float(os.getenv('MONGODB_BREAKER_BACKOFF', 1.0)),
+        max_backoff=float(os.getenv('MONGODB_BREAKER_MAX_BACKOFF', 60.0)),
+    )
+
+
+breaker = _new_breaker()
+
+
+def _topology_watcher():
+    """Listener that trips/resets the breaker as the driver loses/regains a writable server"""
+    from pymongo import monitoring
+    from pymongo.errors import ConnectionFailure
+
+    class _TopologyWatcher(monitoring.TopologyListener):
+        def opened(self, event):
+            pass
+
+        def closed(self, event):
+            pass
+
+        def description_changed(self, event):
+            had = event.previous_description.has_writable_server()
+            has = event.new_description.has_writable_server()
+            if had and not has:
+                breaker.record_failure(ConnectionFailure('no writable server available'), _probe)
+            elif has and not had and _db is not None:
+                breaker.record_success()
+
+    return _TopologyWatcher()
+
+
+# ============== Connection ==============
+
+def _connect() -> 'Database':
+    """Create the client if needed and verify it with a ping (raises on failure)"""
     global _client, _db
+    if _client is None:
+        from pymongo import MongoClient
+        _client = MongoClient(
+            os.getenv('MONGODB_URI'),
+            serverSelectionTimeoutMS=int(os.getenv('MONGODB_TIMEOUT_MS', 5000)),
+            event_listeners=[_topology_watcher()]
+        )
+    # Test connection
+    _client.admin.command('ping')
+    if _db is None:
+        db_name = os.getenv('MONGODB_DB_NAME', 'portfolio')
+        db = _client[db_name]
+        print(f"Connected to MongoDB: {db_name}")
+        ensure_indexes(db)
+        _db = db
+    return _db
+
+
+def _probe():
+    _connect()
+
+
+def _reset_after_fork():
+    """
+    Runs in a forked child (e.g. a gunicorn worker with --preload).
+
+    pymongo clients aren't fork-safe: their sockets and monitor threads
+    belong to the parent. The child drops the inherited client and
+    connects on first use. Locks that a parent thread may have held at
+    fork time, and the breaker's probe thread, are replaced as well.
+    """
+    global _client, _db, _connect_lock, _executor_lock, breaker
+    global _visitor_lock, _visitor_sketches, _visitor_dirty, _visitor_day, _visitor_writer
+    _client = None
+    _db = None
+    _connect_lock = threading.Lock()
+    _executor_lock = threading.Lock()
+    breaker = _new_breaker()
+    # Each worker writes its own visitor sketches
+    _visitor_lock = threading.Lock()
+    _visitor_sketches = {}
+    _visitor_dirty = set()
+    _visitor_day = None
+    _visitor_writer = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_db() -> Optional['Database']:
+    """
+    Get MongoDB database connection (singleton).
+
+    Returns None without blocking while the circuit breaker is open or
+    while another thread is establishing the connection.
+    """
+    global _warned_unconfigured
     
+    if not breaker.allow():
+        return None
     if _db is not None:
         return _db
     
-    uri = os.getenv('MONGODB_URI')
-    db_name = os.getenv('MONGODB_DB_NAME', 'portfolio')
-    
-    if not uri:
-        print("Warning: MONGODB_URI not set, database features disabled")
+    if not os.getenv('MONGODB_URI'):
+        if not _warned_unconfigured:
+            print("Warning: MONGODB_URI not set, database features disabled")
+            _warned_unconfigured = True
         return None
     
+    from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+
+    # Only one thread pays the connection timeout; the rest fail fast
+    if not _connect_lock.acquire(blocking=False):
+        return None
     try:
-        _client = MongoClient(uri, serverSelectionTimeoutMS=5000)
-        # Test connection
-        _client.admin.command('ping')
-        _db = _client[db_name]
-        print(f"Connected to MongoDB: {db_name}")
-        return _db
+        return _connect()
     except (ConnectionFailure, ServerSelectionTimeoutError) as e:
         print(f"Failed to connect to MongoDB: {e}")
+        breaker.record_failure(e, _probe)
         return None
+    finally:
+        _connect_lock.release()
+
+
+@timed_query
+def ensure_indexes(db: 'Database'):
+    """Create the indexes the query paths rely on (idempotent, run once per connection)"""
+    indexes = [
+        # Message list/paging: newest first, with _id as a tie-breaker for keyset cursors
+        ('contacts', [('created_at', DESCENDING), ('_id', DESCENDING)], {'name': 'created_at_id'}),
+        # Unread filter, unread count and unread paging
+        ('contacts', [('read', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)],
+         {'name': 'read_created_at_id'}),
+        # Idempotent replay of spooled submissions (older documents have no key)
+        ('contacts', 'dedupe_key', {'unique': True, 'sparse': True, 'name': 'dedupe_key'}),
+        # Admin message search (a collection can have only one text index)
+        ('contacts', [(field, 'text') for field in SEARCH_FIELD_WEIGHTS],
+         {'weights': SEARCH_FIELD_WEIGHTS, 'name': 'contacts_text'}),
+        ('analytics', [('type', ASCENDING), ('timestamp', DESCENDING)], {'name': 'type_timestamp'}),
+        ('analytics_rollups', [('granularity', ASCENDING), ('bucket', ASCENDING)], {'name': 'granularity_bucket'}),
+        ('visitor_sketches', [('day', ASCENDING), ('path', ASCENDING)], {'name': 'day_path'}),
+    ]
+    # One failure (e.g. a conflicting index from an older version) mustn't skip the rest
+    for collection, keys, options in indexes:
+        try:
+            db[collection].create_index(keys, **options)
+        except Exception as e:
+            print(f"Warning: failed to create index {collection}.{options['name']}: {e}")
 
 
 def close_db():
@@ -50,7 +300,7 @@ def close_db():
         _db = None
 
 
-def get_collection(name: str) -> Optional[Collection]:
+def get_collection(name: str) -> Optional['Collection']:
     """Get a collection from the database"""
     db = get_db()
     if db is not None:
@@ -58,14 +308,73 @@ def get_collection(name: str) -> Optional[Collection]:
     return None
 
 
+# ============== Query Helpers ==============
+
+class Uncached:
+    """
+    Fallback result of a cached_query function when the database is
+    unavailable: returned to the caller but not stored, so one failed
+    connection doesn't serve zeros to every worker for the whole TTL.
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+def cached_query(key: str, timeout: Optional[int] = None):
+    """Cache a query's result in query_cache under key (plus positional args)"""
+    def decorator(f):
+        def refresh(*args):
+            """Run the query now and replace the cached value"""
+            value = f(*args)
+            if isinstance(value, Uncached):
+                return value.value
+            query_cache.set(':'.join([key, *map(str, args)]), value, timeout)
+            return value
+        
+        @wraps(f)
+        def wrapper(*args):
+            value = query_cache.get(':'.join([key, *map(str, args)]))
+            if value is None:
+                value = refresh(*args)
+            return value
+        
+        wrapper.refresh = refresh
+        return wrapper
+    return decorator
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor, _executor_pid
+    if _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor_pid != os.getpid():
+                # A forked child inherits the pool object but none of its threads
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv('DB_QUERY_WORKERS', 4)),
+                    thread_name_prefix='db-query'
+                )
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def run_concurrently(**calls: Callable[[], Any]) -> Dict[str, Any]:
+    """
+    Run independent queries on the shared executor and wait for all of them.
+
+    Only call this from request threads; queries submitted here must not
+    call run_concurrently themselves.
+    """
+    executor = _get_executor()
+    futures = {name: executor.submit(call) for name, call in calls.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+
 # ============== Contact Messages ==============
 
-def save_contact_message(data: Dict[str, Any]) -> Optional[str]:
-    """Save contact form submission to database"""
-    collection = get_collection('contacts')
-    if collection is None:
-        return None
-    
+def _contact_document(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a contacts document from submitted form data"""
     document = {
         'name': data.get('name'),
         'email': data.get('email'),
@@ -77,11 +386,68 @@ def save_contact_message(data: Dict[str, Any]) -> Optional[str]:
         'ip_address': data.get('ip_address'),
         'user_agent': data.get('user_agent'),
     }
+    # Set by duplicates.SubmissionFilter: stored, but no notification was sent
+    if data.get('duplicate'):
+        document['duplicate'] = data['duplicate']
+    return document
+
+
+@timed_query
+def save_contact_message(data: Dict[str, Any]) -> Optional[str]:
+    """Save contact form submission to database"""
+    collection = get_collection('contacts')
+    if collection is None:
+        return None
     
-    result = collection.insert_one(document)
+    result = collection.insert_one(_contact_document(data))
+    query_cache.delete_many('contacts:total', 'contacts:unread')
     return str(result.inserted_id)
 
 
+@timed_query
+def save_contact_messages(records: List[Dict[str, Any]]) -> Optional[int]:
+    """
+    Idempotently store spooled submissions in one bulk write.
+
+    Each record is upserted on its dedupe_key, so records that were already
+    stored are skipped. Returns the number newly stored, or None if the
+    database is unavailable.
+    """
+    collection = get_collection('contacts')
+    if collection is None:
+        return None
+    if not records:
+        return 0
+    from pymongo import UpdateOne
+    from pymongo.errors import BulkWriteError
+    
+    operations = []
+    for record in records:
+        document = _contact_document(record)
+        document['dedupe_key'] = record['dedupe_key']
+        if record.get('created_at'):
+            document['created_at'] = datetime.fromisoformat(record['created_at'])
+        operations.append(UpdateOne(
+            {'dedupe_key': record['dedupe_key']},
+            {'$setOnInsert': document},
+            upsert=True
+        ))
+    
+    try:
+        stored = collection.bulk_write(operations, ordered=False).upserted_count
+    except BulkWriteError as e:
+        # Concurrent upserts of the same key lose the race on the unique index; that's fine
+        errors = e.details.get('writeErrors', [])
+        if e.details.get('writeConcernErrors') or any(err.get('code') != 11000 for err in errors):
+            raise
+        stored = e.details.get('nUpserted', 0)
+    
+    if stored:
+        query_cache.delete_many('contacts:total', 'contacts:unread')
+    return stored
+
+
+@timed_query
 def get_contact_messages(limit: int = 50, skip: int = 0, unread_only: bool = False) -> List[Dict]:
     """Get contact messages with pagination"""
     collection = get_collection('contacts')
@@ -94,6 +460,191 @@ def get_contact_messages(limit: int = 50, skip: int = 0, unread_only: bool = Fal
     return list(cursor)
 
 
+# List views only need a preview, not the full body
+MESSAGE_PREVIEW_LENGTH = 280
+MESSAGE_LIST_PROJECTION = {
+    'name': 1,
+    'email': 1,
+    'subject': 1,
+    'created_at': 1,
+    'read': 1,
+    'replied': 1,
+    'duplicate': 1,
+    'preview': {'$substrCP': ['$message', 0, MESSAGE_PREVIEW_LENGTH]},
+    'message_length': {'$strLenCP': '$message'},
+}
+
+
+def encode_cursor(document: Dict[str, Any]) -> str:
+    """Opaque paging token for a message's (created_at, _id) position"""
+    raw = f"{document['created_at'].isoformat()}|{document['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> Tuple[datetime, Any]:
+    """Inverse of encode_cursor; raises ValueError for malformed tokens"""
+    from bson import ObjectId
+    from bson.errors import InvalidId
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        created_at, oid = raw.split('|', 1)
+        return datetime.fromisoformat(created_at), ObjectId(oid)
+    except (ValueError, UnicodeDecodeError, InvalidId):
+        raise ValueError('Invalid cursor')
+
+
+@timed_query
+def get_contact_messages_page(limit: int = 20, cursor: Optional[str] = None,
+                              direction: str = 'next', unread_only: bool = False,
+                              projection: Optional[Dict[str, Any]] = MESSAGE_LIST_PROJECTION) -> Dict[str, Any]:
+    """
+    Get a page of contact messages (newest first) using keyset pagination.
+
+    Pages are anchored on (created_at, _id) instead of skip, so deep pages
+    cost the same as the first one. `cursor` is a token from a previous
+    page's next_cursor (direction='next') or prev_cursor (direction='prev').
+    """
+    page = {'messages': [], 'next_cursor': None, 'prev_cursor': None}
+    collection = get_collection('contacts')
+    if collection is None:
+        return page
+    
+    query: Dict[str, Any] = {'read': False} if unread_only else {}
+    forward = direction != 'prev'
+    if cursor:
+        created_at, oid = decode_cursor(cursor)
+        op = '$lt' if forward else '$gt'
+        query['$or'] = [
+            {'created_at': {op: created_at}},
+            {'created_at': created_at, '_id': {op: oid}},
+        ]
+    
+    order = DESCENDING if forward else ASCENDING
+    documents = list(
+        collection.find(query, projection)
+        .sort([('created_at', order), ('_id', order)])
+        .limit(limit + 1)
+    )
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+    if not forward:
+        documents.reverse()
+    
+    if documents:
+        # Coming from a cursor means there is at least one page on that side
+        more_older = has_more if forward else bool(cursor)
+        more_newer = bool(cursor) if forward else has_more
+        if more_older:
+            page['next_cursor'] = encode_cursor(documents[-1])
+        if more_newer:
+            page['prev_cursor'] = encode_cursor(documents[0])
+    page['messages'] = documents
+    return page
+
+
+# Relative weight of a match in each field, for both the text index and search.InvertedIndex
+SEARCH_FIELD_WEIGHTS = {'subject': 4, 'name': 3, 'email': 3, 'message': 1}
+
+SEARCH_PROJECTION = {
+    'name': 1,
+    'email': 1,
+    'subject': 1,
+    'message': 1,
+    'created_at': 1,
+    'read': 1,
+    'replied': 1,
+    'duplicate': 1,
+    'score': 1,
+}
+
+
+@timed_query
+def search_contact_messages(terms: List[str], limit: int = 20, after: Optional[Tuple[float, str]] = None,
+                            unread_only: bool = False) -> Optional[List[Dict[str, Any]]]:
+    """
+    Messages containing every term, best text-index score first (ties newest
+    first), each with its score. `after` is the (score, id) of the previous
+    page's last hit. Returns None if the database is unavailable.
+    """
+    from bson import ObjectId
+    from bson.errors import InvalidId
+    collection = get_collection('contacts')
+    if collection is None:
+        return None
+    
+    # Quoted terms are all required (bare ones would match any of them);
+    # terms come from search.query_terms, so they can't contain quotes
+    match: Dict[str, Any] = {'$text': {'$search': ' '.join(f'"{term}"' for term in terms)}}
+    if unread_only:
+        match['read'] = False
+    pipeline: List[Dict[str, Any]] = [
+        {'$match': match},
+        {'$addFields': {'score': {'$meta': 'textScore'}}},
+    ]
+    if after is not None:
+        score, oid = after
+        try:
+            oid = ObjectId(oid)
+        except InvalidId:
+            raise ValueError('Invalid cursor')
+        pipeline.append({'$match': {'$or': [
+            {'score': {'$lt': score}},
+            {'score': score, '_id': {'$lt': oid}},
+        ]}})
+    pipeline += [
+        {'$sort': {'score': -1, '_id': -1}},
+        {'$limit': limit},
+        {'$project': SEARCH_PROJECTION},
+    ]
+    return list(collection.aggregate(pipeline))
+
+
+@timed_query
+def scan_contact_messages(terms: List[str], limit: int = 20, after: Optional[Tuple[float, str]] = None,
+                          unread_only: bool = False) -> Optional[List[Dict[str, Any]]]:
+    """
+    Fallback for search_contact_messages while the text index is missing:
+    messages with every term as a word prefix in any searched field, newest
+    first and unranked (score 0). A collection scan, so only a stopgap.
+    """
+    from bson import ObjectId
+    from bson.errors import InvalidId
+    collection = get_collection('contacts')
+    if collection is None:
+        return None
+    
+    query: Dict[str, Any] = {'$and': [
+        {'$or': [{field: {'$regex': rf'\b{re.escape(term)}', '$options': 'i'}} for field in SEARCH_FIELD_WEIGHTS]}
+        for term in terms
+    ]}
+    if unread_only:
+        query['read'] = False
+    if after is not None:
+        try:
+            query['_id'] = {'$lt': ObjectId(after[1])}
+        except InvalidId:
+            raise ValueError('Invalid cursor')
+    documents = list(collection.find(query, SEARCH_PROJECTION).sort('_id', DESCENDING).limit(limit))
+    for document in documents:
+        document['score'] = 0.0
+    return documents
+
+
+@timed_query
+def get_contact_message(message_id: str) -> Optional[Dict[str, Any]]:
+    """Get a single contact message with its full body"""
+    from bson import ObjectId
+    from bson.errors import InvalidId
+    collection = get_collection('contacts')
+    if collection is None:
+        return None
+    try:
+        return collection.find_one({'_id': ObjectId(message_id)})
+    except InvalidId:
+        return None
+
+
+@timed_query
 def mark_message_read(message_id: str) -> bool:
     """Mark a message as read"""
     from bson import ObjectId
@@ -105,93 +656,657 @@ def mark_message_read(message_id: str) -> bool:
         {'_id': ObjectId(message_id)},
         {'$set': {'read': True, 'read_at': datetime.utcnow()}}
     )
+    if result.modified_count:
+        query_cache.delete('contacts:unread')
     return result.modified_count > 0
 
 
+@cached_query('contacts:unread')
+@timed_query
 def get_unread_count() -> int:
     """Get count of unread messages"""
     collection = get_collection('contacts')
     if collection is None:
-        return 0
+        return Uncached(0)
     return collection.count_documents({'read': False})
 
 
+@cached_query('contacts:total')
+@timed_query
+def get_message_count() -> int:
+    """Get total number of messages (from collection metadata)"""
+    collection = get_collection('contacts')
+    if collection is None:
+        return Uncached(0)
+    return collection.estimated_document_count()
+
+
 # ============== Analytics ==============
 
-def log_page_view(data: Dict[str, Any]) -> Optional[str]:
-    """Log a page view for analytics"""
-    collection = get_collection('analytics')
-    if collection is None:
-        return None
-    
-    document = {
+# The SPA's client-side routes (client/src/App.tsx). The catch-all serves
+# any other URL too, so typos and scanner probes are counted under
+# OTHER_ROUTE: rollup and visitor sketch keys stay a small, fixed set.
+SPA_ROUTES = frozenset(os.getenv('ANALYTICS_ROUTES', '/,/about,/projects,/skills,/contact').split(','))
+OTHER_ROUTE = 'other'
+
+
+def page_route(path: Optional[str]) -> str:
+    """The SPA route a request path counts under (case and trailing slash ignored)"""
+    route = (path or '/').lower().rstrip('/') or '/'
+    return route if route in SPA_ROUTES else OTHER_ROUTE
+
+
+def _page_view_document(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build an analytics document from captured request data"""
+    return {
         'type': 'page_view',
         'page': data.get('page'),
         'path': data.get('path'),
+        'route': page_route(data.get('path')),
         'referrer': data.get('referrer'),
         'user_agent': data.get('user_agent'),
         'ip_address': data.get('ip_address'),
-        'timestamp': datetime.utcnow(),
+        'timestamp': data.get('timestamp') or datetime.utcnow(),
     }
+
+
+def _rollup_updates(documents: List[Dict[str, Any]]) -> List['UpdateOne']:
+    """Collapse page views into $inc upserts on hourly and daily rollups"""
+    from pymongo import UpdateOne
+
+    counts: Dict[Tuple[str, datetime, str], int] = {}
+    for doc in documents:
+        ts = doc['timestamp']
+        path = doc.get('route') or page_route(doc.get('path'))
+        hour = ts.replace(minute=0, second=0, microsecond=0)
+        day = hour.replace(hour=0)
+        for key in (('hour', hour, path), ('day', day, path)):
+            counts[key] = counts.get(key, 0) + 1
+    
+    return [
+        UpdateOne(
+            {'_id': f"{granularity}:{bucket:%Y-%m-%dT%H}:{path}"},
+            {
+                '$inc': {'count': count},
+                '$setOnInsert': {'granularity': granularity, 'bucket': bucket, 'path': path},
+            },
+            upsert=True
+        )
+        for (granularity, bucket, path), count in counts.items()
+    ]
+
+
+def _update_rollups(documents: List[Dict[str, Any]]):
+    rollups = get_collection('analytics_rollups')
+    if rollups is None or not documents:
+        return
+    rollups.bulk_write(_rollup_updates(documents), ordered=False)
+
+
+def _update_aggregates(documents: List[Dict[str, Any]]):
+    """
+    Fold stored page views into the rollups and visitor sketches. The raw
+    documents are already saved, so a failure here is logged and counted
+    rather than raised; rebuild_analytics_rollups(start, end) repairs the
+    affected buckets from the raw data.
+    """
+    for step, update in (('rollups', _update_rollups), ('visitor_sketches', _update_visitor_sketches)):
+        try:
+            update(documents)
+        except Exception as e:
+            rollup_errors.inc(step=step)
+            print(f"Warning: failed to update {step} for {len(documents)} page views: {e}")
+
+
+@timed_query
+def log_page_view(data: Dict[str, Any]) -> Optional[str]:
+    """Log a page view for analytics"""
+    collection = get_collection('analytics')
+    if collection is None:
+        return None
     
+    document = _page_view_document(data)
     result = collection.insert_one(document)
+    _update_aggregates([document])
     return str(result.inserted_id)
 
 
-def get_analytics_summary() -> Dict[str, Any]:
-    """Get analytics summary"""
+@timed_query
+def log_page_views(items: List[Dict[str, Any]]) -> int:
+    """Log a batch of page views with a single insert_many"""
     collection = get_collection('analytics')
-    contacts = get_collection('contacts')
+    if collection is None or not items:
+        return 0
     
+    documents = [_page_view_document(data) for data in items]
+    result = collection.insert_many(documents, ordered=False)
+    _update_aggregates(documents)
+    return len(result.inserted_ids)
+
+
+ANALYTICS_WINDOWS = {
+    '24h': timedelta(hours=24),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30),
+    'all': None,
+}
+
+# Windows up to this length are answered from hourly rollups, longer ones from daily
+HOURLY_ROLLUP_LIMIT = timedelta(hours=48)
+
+
+def resolve_window(window: str = '30d', start: Optional[datetime] = None,
+                   end: Optional[datetime] = None) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Turn a named window ('24h', '7d', '30d', 'all') or 'custom' range into (start, end)"""
+    if window == 'custom':
+        if start is None:
+            raise ValueError('custom window requires a start')
+        if end is not None and end <= start:
+            raise ValueError('end must be after start')
+        return start, end
+    
+    if window not in ANALYTICS_WINDOWS:
+        raise ValueError(f"Unknown window '{window}'")
+    
+    length = ANALYTICS_WINDOWS[window]
+    if length is None:
+        return None, None
+    return datetime.utcnow() - length, None
+
+
+def window_from_args(args, default: str = '30d') -> Dict[str, Any]:
+    """Read window/start/end (ISO 8601) from request args for get_analytics_summary"""
+    def parse(name):
+        value = args.get(name)
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"Invalid {name} '{value}', expected ISO 8601")
+    
+    start, end = parse('start'), parse('end')
+    window = args.get('window') or ('custom' if start else default)
+    return {'window': window, 'start': start, 'end': end}
+
+
+def time_range_filter(field: str, window: str = 'all', start: Optional[datetime] = None,
+                      end: Optional[datetime] = None) -> Dict[str, Any]:
+    """Filter on `field` for a window as accepted by resolve_window ({} for 'all')"""
+    start, end = resolve_window(window, start, end)
+    bounds = {}
+    if start is not None:
+        bounds['$gte'] = start
+    if end is not None:
+        bounds['$lt'] = end
+    return {field: bounds} if bounds else {}
+
+
+def _window_cache_key(window: str, start: Optional[datetime], end: Optional[datetime]) -> str:
+    if window == 'custom':
+        return f"custom:{start.isoformat()}:{end.isoformat() if end else ''}"
+    return window
+
+
+@timed_query
+def get_page_view_summary(window: str = '30d', start: Optional[datetime] = None,
+                          end: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Page view totals and unique visitors for a time window, read from the
+    pre-aggregated rollups and visitor sketches only. Cost depends on the
+    window and the number of distinct paths, not on how many raw page views
+    have been recorded. Cached for QUERY_CACHE_TTL.
+    """
+    key = f"analytics:views:{_window_cache_key(window, start, end)}"
+    cached = query_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    start, end = resolve_window(window, start, end)
     summary = {
+        'window': window,
+        'start': start.isoformat() if start else None,
+        'end': end.isoformat() if end else None,
         'total_page_views': 0,
-        'total_messages': 0,
-        'unread_messages': 0,
         'views_by_page': {},
+        'unique_visitors': 0,
+        'unique_visitors_by_page': {},
     }
     
-    if collection is not None:
-        summary['total_page_views'] = collection.count_documents({'type': 'page_view'})
+    rollups = get_collection('analytics_rollups')
+    if rollups is not None:
+        hourly = start is not None and (end or datetime.utcnow()) - start <= HOURLY_ROLLUP_LIMIT
+        granularity = 'hour' if hourly else 'day'
+        
+        match: Dict[str, Any] = {'granularity': granularity}
+        bucket: Dict[str, datetime] = {}
+        if start is not None:
+            floor = start.replace(minute=0, second=0, microsecond=0)
+            bucket['$gte'] = floor if hourly else floor.replace(hour=0)
+        if end is not None:
+            bucket['$lt'] = end
+        if bucket:
+            match['bucket'] = bucket
         
-        # Views by page (last 30 days)
         pipeline = [
-            {'$match': {'type': 'page_view'}},
-            {'$group': {'_id': '$page', 'count': {'$sum': 1}}},
+            {'$match': match},
+            {'$group': {'_id': '$path', 'count': {'$sum': '$count'}}},
             {'$sort': {'count': -1}},
-            {'$limit': 10}
         ]
-        results = list(collection.aggregate(pipeline))
-        summary['views_by_page'] = {r['_id']: r['count'] for r in results if r['_id']}
-    
-    if contacts is not None:
-        summary['total_messages'] = contacts.count_documents({})
-        summary['unread_messages'] = contacts.count_documents({'read': False})
+        results = list(rollups.aggregate(pipeline))
+        summary['total_page_views'] = sum(r['count'] for r in results)
+        summary['views_by_page'] = {r['_id']: r['count'] for r in results[:10] if r['_id']}
+        summary.update(get_unique_visitors(start, end, list(summary['views_by_page'])))
     
+    query_cache.set(key, summary)
+    return summary
+
+
+def _build_summary(views: Dict[str, Any], total: int, unread: int) -> Dict[str, Any]:
+    summary = dict(views)
+    summary['total_messages'] = total
+    summary['unread_messages'] = unread
     return summary
 
 
+@timed_query
+def get_analytics_summary(window: str = '30d', start: Optional[datetime] = None,
+                          end: Optional[datetime] = None) -> Dict[str, Any]:
+    """Get analytics summary for a time window (queries run concurrently)"""
+    resolve_window(window, start, end)  # validate before fanning out
+    results = run_concurrently(
+        views=lambda: get_page_view_summary(window, start, end),
+        total=get_message_count,
+        unread=get_unread_count,
+    )
+    return _build_summary(results['views'], results['total'], results['unread'])
+
+
+@timed_query
+def get_dashboard_data(window: str = '30d', start: Optional[datetime] = None,
+                       end: Optional[datetime] = None) -> Dict[str, Any]:
+    """Everything the admin dashboard shows, fetched in one concurrent round"""
+    resolve_window(window, start, end)
+    results = run_concurrently(
+        views=lambda: get_page_view_summary(window, start, end),
+        total=get_message_count,
+        unread=get_unread_count,
+        db_stats=get_db_stats,
+    )
+    return {
+        'analytics': _build_summary(results['views'], results['total'], results['unread']),
+        'db_stats': results['db_stats'],
+        'unread_count': results['unread'],
+    }
+
+
+@timed_query
+def rebuild_analytics_rollups(start: Optional[datetime] = None, end: Optional[datetime] = None) -> None:
+    """
+    Recompute the rollups from raw page views: all of them (a one-off
+    backfill after upgrading) or the days overlapping [start, end), e.g.
+    after a batch was stored but its rollup update failed. The range is
+    widened to whole days so the daily buckets are recounted in full.
+    """
+    collection = get_collection('analytics')
+    if collection is None:
+        return
+    
+    match: Dict[str, Any] = {'type': 'page_view'}
+    bounds = {}
+    if start is not None:
+        bounds['$gte'] = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    if end is not None:
+        day = end.replace(hour=0, minute=0, second=0, microsecond=0)
+        bounds['$lt'] = day if day == end else day + timedelta(days=1)
+    if bounds:
+        match['timestamp'] = bounds
+    
+    for granularity, fmt in (('hour', '%Y-%m-%dT%H'), ('day', '%Y-%m-%dT00')):
+        collection.aggregate([
+            {'$match': match},
+            {'$group': {
+                '_id': {
+                    'bucket': {'$dateTrunc': {'date': '$timestamp', 'unit': granularity}},
+                    # Views stored before routes were recorded only have the raw path
+                    'path': {'$ifNull': ['$route', {'$cond': [
+                        {'$in': [{'$toLower': {'$ifNull': ['$path', '/']}}, sorted(SPA_ROUTES)]},
+                        {'$toLower': {'$ifNull': ['$path', '/']}}, OTHER_ROUTE,
+                    ]}]},
+                },
+                'count': {'$sum': 1},
+            }},
+            {'$project': {
+                '_id': {'$concat': [
+                    granularity, ':',
+                    {'$dateToString': {'date': '$_id.bucket', 'format': fmt}},
+                    ':', '$_id.path',
+                ]},
+                'granularity': granularity,
+                'bucket': '$_id.bucket',
+                'path': '$_id.path',
+                'count': 1,
+            }},
+            {'$merge': {'into': 'analytics_rollups', 'whenMatched': 'replace'}},
+        ])
+
+
+# ============== Unique Visitors ==============
+#
+# Each worker keeps a HyperLogLog sketch of visitors (ip + user agent) per
+# day and route (page_route), plus a site-wide one under SITE_SKETCH, and
+# after every batch it writes the ones that changed to its own
+# visitor_sketches document; workers never write the same document. Readers merge the
+# documents covering a window, so the cost is O(days x workers) small
+# blobs however many views were recorded. Once a day is over, its
+# per-worker documents are merged into one (compact_visitor_sketches).
+
+# Sketches held per worker (4 KiB each); past it only the site-wide sketch is kept
+VISITOR_SKETCH_LIMIT = int(os.getenv('VISITOR_SKETCH_LIMIT', 500))
+SITE_SKETCH = '*'
+COMPACTED_WRITER = 'compacted'
+
+_visitor_lock = threading.Lock()
+_visitor_sketches: Dict[Tuple[datetime, str], HyperLogLog] = {}
+_visitor_dirty: set = set()
+_visitor_day: Optional[datetime] = None
+_visitor_writer: Optional[str] = None
+
+
+def _visitor_key(document: Dict[str, Any]) -> str:
+    return f"{document.get('ip_address') or ''}|{document.get('user_agent') or ''}"
+
+
+def _sketch_id(day: datetime, path: str, writer: str) -> str:
+    return f"{day:%Y-%m-%d}:{path}:{writer}"
+
+
+def _update_visitor_sketches(documents: List[Dict[str, Any]]):
+    """Add page views to this worker's sketches and persist the ones that changed"""
+    global _visitor_day, _visitor_writer
+    sketches = get_collection('visitor_sketches')
+    if sketches is None or not documents:
+        return
+    from pymongo import UpdateOne
+
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    with _visitor_lock:
+        if _visitor_writer is None:
+            _visitor_writer = f"{socket.gethostname()}:{os.getpid()}:{os.urandom(4).hex()}"
+        for doc in documents:
+            day = doc['timestamp'].replace(hour=0, minute=0, second=0, microsecond=0)
+            visitor = _visitor_key(doc)
+            for key in ((day, SITE_SKETCH), (day, doc.get('route') or page_route(doc.get('path')))):
+                sketch = _visitor_sketches.get(key)
+                if sketch is None:
+                    if len(_visitor_sketches) >= VISITOR_SKETCH_LIMIT and key[1] != SITE_SKETCH:
+                        continue
+                    sketch = _visitor_sketches[key] = HyperLogLog()
+                if sketch.add(visitor):
+                    _visitor_dirty.add(key)
+
+        writer, dirty = _visitor_writer, list(_visitor_dirty)
+        blobs = [(key, _visitor_sketches[key].to_bytes()) for key in dirty]
+        _visitor_dirty.clear()
+        rolled_over = _visitor_day != today
+        _visitor_day = today
+        if rolled_over:
+            # Views from just before midnight can still arrive, so keep yesterday
+            for key in [k for k in _visitor_sketches if k[0] < today - timedelta(days=1)]:
+                if key not in dirty:
+                    del _visitor_sketches[key]
+
+    if blobs:
+        now = datetime.utcnow()
+        try:
+            sketches.bulk_write([
+                UpdateOne(
+                    {'_id': _sketch_id(day, path, writer)},
+                    {
+                        '$set': {'sketch': blob, 'updated_at': now},
+                        '$setOnInsert': {'day': day, 'path': path, 'writer': writer},
+                    },
+                    upsert=True
+                )
+                for (day, path), blob in blobs
+            ], ordered=False)
+        except Exception as e:
+            print(f"Warning: failed to save visitor sketches: {e}")
+            with _visitor_lock:
+                _visitor_dirty.update(dirty)  # retried with the next batch
+            return
+
+    if rolled_over:
+        try:
+            compact_visitor_sketches()
+        except Exception as e:
+            print(f"Warning: failed to compact visitor sketches: {e}")
+
+
+@timed_query
+def compact_visitor_sketches(before: Optional[datetime] = None) -> int:
+    """
+    Merge the per-worker sketches of each day before `before` (default:
+    yesterday) into one document per path. Returns the number of days
+    compacted.
+
+    Merged documents get a fresh _id and the inputs are only deleted if
+    they haven't been rewritten since they were read, so concurrent runs
+    or a late writer leave duplicates, which merging counts only once,
+    rather than losing visitors.
+    """
+    sketches = get_collection('visitor_sketches')
+    if sketches is None:
+        return 0
+    if before is None:
+        before = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+
+    days = sketches.distinct('day', {'day': {'$lt': before}, 'writer': {'$ne': COMPACTED_WRITER}})
+    for day in days:
+        merged: Dict[str, HyperLogLog] = {}
+        read = []
+        for doc in sketches.find({'day': day}, {'path': 1, 'sketch': 1, 'updated_at': 1}):
+            sketch = HyperLogLog.from_bytes(doc['sketch'])
+            if doc['path'] in merged:
+                merged[doc['path']].merge(sketch)
+            else:
+                merged[doc['path']] = sketch
+            read.append({'_id': doc['_id'], 'updated_at': doc.get('updated_at')})
+        if not read:
+            continue
+
+        now = datetime.utcnow()
+        suffix = f"{COMPACTED_WRITER}:{os.urandom(4).hex()}"
+        sketches.insert_many([
+            {'_id': _sketch_id(day, path, suffix), 'day': day, 'path': path, 'writer': COMPACTED_WRITER,
+             'sketch': sketch.to_bytes(), 'updated_at': now}
+            for path, sketch in merged.items()
+        ], ordered=False)
+        sketches.delete_many({'$or': read})
+    return len(days)
+
+
+# Sketches held per path before they are folded into its running union
+_VISITOR_MERGE_BATCH = 32
+
+
+@timed_query
+def get_unique_visitors(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                        paths: List[str] = ()) -> Dict[str, Any]:
+    """
+    Estimated distinct visitors between start and end, site-wide and for
+    `paths`, merged from the daily sketches (about 1.6% standard error).
+    Resolution is whole UTC days: a window starting mid-day counts that
+    whole day's visitors.
+    """
+    result = {'unique_visitors': 0, 'unique_visitors_by_page': {path: 0 for path in paths}}
+    sketches = get_collection('visitor_sketches')
+    if sketches is None:
+        return result
+
+    query: Dict[str, Any] = {'path': {'$in': [SITE_SKETCH, *paths]}}
+    day: Dict[str, datetime] = {}
+    if start is not None:
+        day['$gte'] = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    if end is not None:
+        day['$lt'] = end
+    if day:
+        query['day'] = day
+
+    # A running union per path, folded in batches (one merge pass per batch
+    # is much cheaper than one per sketch); memory stays fixed for any window
+    unions: Dict[str, HyperLogLog] = {}
+    pending: Dict[str, List[HyperLogLog]] = {}
+    for doc in sketches.find(query, {'path': 1, 'sketch': 1}):
+        batch = pending.setdefault(doc['path'], [])
+        batch.append(HyperLogLog.from_bytes(doc['sketch']))
+        if len(batch) >= _VISITOR_MERGE_BATCH:
+            unions.setdefault(doc['path'], HyperLogLog()).merge(*batch)
+            batch.clear()
+    for path, batch in pending.items():
+        unions.setdefault(path, HyperLogLog()).merge(*batch)
+
+    site = unions.pop(SITE_SKETCH, None)
+    result['unique_visitors'] = site.count() if site else 0
+    result['unique_visitors_by_page'].update((path, sketch.count()) for path, sketch in unions.items())
+    return result
+
+
+# ============== Bulk Export & Triage ==============
+
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+
+CONTACT_STATUSES = {
+    'unread': {'read': False},
+    'read': {'read': True},
+    'replied': {'replied': True},
+    'unreplied': {'replied': {'$ne': True}},
+}
+
+BULK_ACTIONS = ('mark_read', 'mark_replied', 'delete')
+
+
+@timed_query
+def _export_batch(name: str, query: Dict[str, Any], projection: Optional[Dict[str, Any]],
+                  after: Any, limit: int) -> List[Dict[str, Any]]:
+    collection = get_collection(name)
+    if collection is None:
+        raise ConnectionError('database unavailable')
+    if after is not None:
+        query = {'$and': [query, {'_id': {'$gt': after}}]}
+    return list(collection.find(query, projection).sort('_id', ASCENDING).limit(limit))
+
+
+def iter_documents(name: str, query: Dict[str, Any], projection: Optional[Dict[str, Any]] = None,
+                   batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Every document in a collection matching query, in _id order.
+
+    Each batch is its own keyset query (_id > last seen), so memory stays
+    at one batch however large the collection is, and no server cursor is
+    left open while a slow consumer drains a download. Raises
+    ConnectionError if the database goes away mid-way.
+    """
+    after = None
+    while True:
+        batch = _export_batch(name, query, projection, after, batch_size)
+        yield from batch
+        if len(batch) < batch_size:
+            return
+        after = batch[-1]['_id']
+
+
+def contact_filter(ids: Optional[List[str]] = None, status: Optional[str] = None,
+                   window: str = 'all', start: Optional[datetime] = None,
+                   end: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Select contacts by id list, or by status (see CONTACT_STATUSES) and
+    created_at window. Raises ValueError for bad ids, statuses or windows.
+    """
+    if ids is not None:
+        from bson import ObjectId
+        from bson.errors import InvalidId
+        try:
+            return {'_id': {'$in': [ObjectId(message_id) for message_id in ids]}}
+        except (InvalidId, TypeError):
+            raise ValueError('Invalid message id')
+
+    query = time_range_filter('created_at', window, start, end)
+    if status:
+        if status not in CONTACT_STATUSES:
+            raise ValueError(f"Unknown status '{status}'")
+        query.update(CONTACT_STATUSES[status])
+    return query
+
+
+@timed_query
+def bulk_update_contacts(action: str, query: Dict[str, Any]) -> Optional[int]:
+    """
+    Apply a triage action to every contact matching query in a single
+    update_many/delete_many round trip. Returns how many messages changed,
+    or None if the database is unavailable.
+    """
+    if action not in BULK_ACTIONS:
+        raise ValueError(f"Unknown action '{action}'")
+    if action == 'delete' and not query:
+        raise ValueError('Refusing to delete every message; select messages or narrow the filter')
+    if query.get('_id', {}).get('$in') == []:
+        return 0
+    collection = get_collection('contacts')
+    if collection is None:
+        return None
+
+    now = datetime.utcnow()
+    if action == 'delete':
+        changed = collection.delete_many(query).deleted_count
+    elif action == 'mark_read':
+        changed = collection.update_many(
+            {'$and': [query, {'read': {'$ne': True}}]},
+            {'$set': {'read': True, 'read_at': now}}
+        ).modified_count
+    else:
+        # Replying implies having read it
+        changed = collection.update_many(
+            {'$and': [query, {'$or': [{'replied': {'$ne': True}}, {'read': {'$ne': True}}]}]},
+            {'$set': {'replied': True, 'replied_at': now, 'read': True}}
+        ).modified_count
+
+    if changed:
+        query_cache.delete_many('contacts:total', 'contacts:unread')
+    return changed
+
+
 # ============== Database Info ==============
 
+@timed_query
 def is_connected() -> bool:
-    """Check if database is connected"""
-    global _client
-    # Try to establish connection if not already done
-    if _client is None:
-        get_db()
-    if _client is None:
+    """Check if database is connected (fails fast while the breaker is open)"""
+    db = get_db()
+    if db is None:
         return False
+    from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
     try:
         _client.admin.command('ping')
         return True
-    except:
+    except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+        breaker.record_failure(e, _probe)
+        return False
+    except Exception:
         return False
 
 
+def breaker_state() -> Dict[str, Any]:
+    """Circuit breaker state and counters"""
+    return breaker.stats()
+
+
+@cached_query('db:stats')
+@timed_query
 def get_db_stats() -> Dict[str, Any]:
     """Get database statistics"""
     db = get_db()
     if db is None:
-        return {'connected': False}
+        return Uncached({'connected': False})
     
     try:
         stats = db.command('dbstats')
@@ -203,4 +1318,32 @@ def get_db_stats() -> Dict[str, Any]:
             'data_size': stats.get('dataSize', 0),
         }
     except Exception as e:
-        return {'connected': False, 'error': str(e)}
+        return Uncached({'connected': False, 'error': str(e)})
+
+
+# ============== Warm-up ==============
+
+def warm_up() -> bool:
+    """
+    Connect and prime the shared query cache before a worker takes traffic.
+
+    Unlike get_db() this waits for the connection. The dashboard queries
+    run concurrently, which opens several pooled connections and fills
+    the cache for the first admin and analytics requests. Returns whether
+    the database is reachable.
+    """
+    if _db is None:
+        if not os.getenv('MONGODB_URI') or not breaker.allow():
+            return False
+        try:
+            with _connect_lock:
+                _connect()
+        except Exception as e:
+            print(f"Failed to connect to MongoDB: {e}")
+            breaker.record_failure(e, _probe)
+            return False
+    try:
+        get_dashboard_data()
+    except Exception as e:
+        print(f"Warning: failed to prime the query cache: {e}")
+    return True
@@ -0,0 +1,149 @@
+"""
+Bulk Export
+Streams contact messages and page views as NDJSON or CSV
+
+    python export.py contacts --format csv --out contacts.csv
+    python export.py analytics --window 30d > page_views.ndjson
+
+Documents come from db.iter_documents in keyset batches and are
+serialized as they arrive, so memory use stays flat for any collection
+size. The admin blueprint serves the same generators as streaming
+downloads (/admin/export/<name>.<format>).
+"""
+import io
+import csv
+import json
+from datetime import datetime
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+from db import (
+    EXPORT_BATCH_SIZE,
+    contact_filter,
+    get_collection,
+    iter_documents,
+    time_range_filter,
+    window_from_args
+)
+
+EXPORTS = {
+    'contacts': {
+        'collection': 'contacts',
+        'fields': ['_id', 'created_at', 'name', 'email', 'subject', 'message',
+                   'read', 'replied', 'duplicate', 'ip_address', 'user_agent'],
+    },
+    'analytics': {
+        'collection': 'analytics',
+        'fields': ['_id', 'timestamp', 'path', 'page', 'referrer', 'user_agent', 'ip_address'],
+    },
+}
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# Rows serialized per chunk handed to the response/file
+CHUNK_ROWS = 500
+
+
+def export_query(name: str, status: Optional[str] = None, window: str = 'all',
+                 start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, Any]:
+    """Mongo filter for an export; raises ValueError for bad arguments"""
+    if name == 'contacts':
+        return contact_filter(status=status, window=window, start=start, end=end)
+    if status:
+        raise ValueError('status only applies to contacts')
+    return dict(time_range_filter('timestamp', window, start, end), type='page_view')
+
+
+def is_available(name: str) -> bool:
+    return get_collection(EXPORTS[name]['collection']) is not None
+
+
+# ============== Serialization ==============
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)  # ObjectId and anything else BSON-specific
+
+
+def _csv_cell(value: Any) -> Any:
+    # Submitted text starting with these is run as a formula by spreadsheet apps
+    if isinstance(value, str) and value.startswith(('=', '+', '-', '@', '\t', '\r')):
+        return "'" + value
+    return '' if value is None else value
+
+
+def ndjson_chunks(documents: Iterable[Dict[str, Any]], fields: List[str]) -> Iterator[str]:
+    lines = []
+    for document in documents:
+        lines.append(json.dumps({field: _plain(document.get(field)) for field in fields}, ensure_ascii=False))
+        if len(lines) >= CHUNK_ROWS:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def csv_chunks(documents: Iterable[Dict[str, Any]], fields: List[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for count, document in enumerate(documents, 1):
+        writer.writerow([_csv_cell(_plain(document.get(field))) for field in fields])
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream(name: str, fmt: str, query: Dict[str, Any], batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """Serialized export, chunk by chunk"""
+    spec = EXPORTS[name]
+    projection = {field: 1 for field in spec['fields']}
+    documents = iter_documents(spec['collection'], query, projection, batch_size)
+    chunks = csv_chunks if fmt == 'csv' else ndjson_chunks
+    return chunks(documents, spec['fields'])
+
+
+def filename(name: str, fmt: str) -> str:
+    return f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+
+
+if __name__ == '__main__':
+    import sys
+    import argparse
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description='Export contacts or page views from MongoDB')
+    parser.add_argument('name', choices=sorted(EXPORTS))
+    parser.add_argument('--format', choices=sorted(FORMATS), default='ndjson')
+    parser.add_argument('--window', default=None, help="24h, 7d, 30d or all (default: all)")
+    parser.add_argument('--start', help='ISO 8601 start (implies a custom window)')
+    parser.add_argument('--end', help='ISO 8601 end')
+    parser.add_argument('--status', help='contacts only: unread, read, replied or unreplied')
+    parser.add_argument('--batch-size', type=int, default=EXPORT_BATCH_SIZE)
+    parser.add_argument('--out', help='Output file (default: stdout)')
+    args = parser.parse_args()
+
+    try:
+        window = window_from_args({'window': args.window, 'start': args.start, 'end': args.end}, default='all')
+        query = export_query(args.name, status=args.status, **window)
+    except ValueError as e:
+        parser.error(str(e))
+    if not is_available(args.name):
+        sys.exit('Database unavailable (is MONGODB_URI set?)')
+
+    out = open(args.out, 'w', newline='', encoding='utf-8') if args.out else sys.stdout
+    try:
+        for chunk in stream(args.name, args.format, query, args.batch_size):
+            out.write(chunk)
+    finally:
+        if args.out:
+            out.close()
@@ -0,0 +1,30 @@
+"""
+Flask Extensions
+Unbound extension instances, attached to the app in create_app()
+
+Kept apart from app.py so blueprints can use the decorators
+(@limiter.limit, @csrf.exempt) without importing the application module.
+"""
+import os
+
+from flask_cors import CORS
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from flask_wtf.csrf import CSRFProtect
+from flask_caching import Cache
+
+# Registers the sqlite:// scheme with flask-limiter's storage backends
+from ratelimit_storage import DEFAULT_STORAGE_URI as RATELIMIT_DEFAULT_STORAGE
+
+# Allow CORS for development and production (Vercel)
+cors = CORS(resources={r"/*": {"origins": "*"}})
+
+csrf = CSRFProtect()
+cache = Cache()
+
+# Rate Limiting (counters shared by all workers on the host via SQLite)
+limiter = Limiter(
+    key_func=get_remote_address,
+    default_limits=["200 per day", "50 per hour"],
+    storage_uri=os.getenv('RATELIMIT_STORAGE_URL', RATELIMIT_DEFAULT_STORAGE)
+)
@@ -0,0 +1,34 @@
+"""
+Gunicorn Configuration
+Preloaded app shared copy-on-write by the workers, each warmed up before it serves
+
+    gunicorn -c gunicorn.conf.py "app:create_app()"
+
+The master imports and builds the app once, then forks the workers.
+Nothing that breaks across fork exists yet at that point: the MongoDB
+client, background threads and SQLite connections are all created per
+worker. post_worker_init then connects, primes the caches and starts the
+background workers before the worker accepts connections.
+
+Bind address and worker count come from gunicorn's usual PORT and
+WEB_CONCURRENCY environment variables. GUNICORN_PRELOAD=false turns
+preloading off.
+"""
+import gc
+import os
+
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+
+def when_ready(server):
+    """Runs in the master before the first fork"""
+    if preload_app:
+        # Move everything allocated so far out of the collector's reach, so
+        # gc passes in the workers don't touch (and copy) the shared pages
+        gc.freeze()
+
+
+def post_worker_init(worker):
+    """Runs in each worker after the app is loaded, before it accepts connections"""
+    from app import warm_up
+    warm_up(worker.wsgi)
@@ -0,0 +1,111 @@
+"""
+Background Health Probe
+Refreshes database status on an interval so health checks answer from memory
+"""
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from db import get_db_stats, is_connected
+
+logger = logging.getLogger('app.health')
+
+
+class HealthProber:
+    """
+    Probes the database in a background thread every `interval` seconds
+    and keeps the latest result as a snapshot.
+
+    Health endpoints read the snapshot and never touch MongoDB themselves,
+    so a slow database can't make the health check time out.
+    """
+
+    def __init__(self, interval: float = 15.0, stale_after: Optional[float] = None):
+        self.interval = interval
+        self.stale_after = stale_after if stale_after is not None else interval * 3
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._probed = threading.Event()
+        self._pid: Optional[int] = None
+        self._snapshot: Dict[str, Any] = {}
+        self._checked_at: Optional[float] = None
+
+    def _ensure_started(self):
+        """Start the probe thread lazily, once per process"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._snapshot = {}
+                self._checked_at = None
+                self._wake = threading.Event()
+                self._probed = threading.Event()
+                threading.Thread(target=self._run, name='health-prober', daemon=True).start()
+                self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            self.probe()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def probe(self) -> Dict[str, Any]:
+        """Run one deep check now and store it as the snapshot"""
+        started = time.monotonic()
+        try:
+            connected = is_connected()
+            stats = get_db_stats.refresh() if connected else None
+            error = None
+        except Exception as e:
+            connected, stats, error = False, None, str(e)
+            logger.warning(f"Health probe failed: {e}")
+
+        snapshot = {
+            'connected': connected,
+            'configured': bool(os.getenv('MONGODB_URI')),
+            'stats': stats,
+            'error': error,
+            'checked_at': datetime.utcnow().isoformat(),
+            'probe_ms': round((time.monotonic() - started) * 1000, 1),
+        }
+        self._snapshot = snapshot
+        self._checked_at = time.monotonic()
+        self._probed.set()
+        return snapshot
+
+    def start(self, timeout: Optional[float] = None) -> bool:
+        """Start probing; with a timeout, wait for the first result (returns whether there is one)"""
+        self._ensure_started()
+        if timeout:
+            self._probed.wait(timeout)
+        return self._checked_at is not None
+
+    def refresh(self):
+        """Ask the background thread to probe again without waiting for the interval"""
+        self._ensure_started()
+        self._wake.set()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Latest probe result with its age; never blocks on the database"""
+        self._ensure_started()
+        snapshot = dict(self._snapshot)
+        if self._checked_at is None:
+            snapshot.update({'connected': None, 'age_seconds': None, 'stale': True, 'pending': True})
+            return snapshot
+        age = time.monotonic() - self._checked_at
+        snapshot['age_seconds'] = round(age, 1)
+        snapshot['stale'] = age > self.stale_after
+        return snapshot
+
+    def is_ready(self) -> bool:
+        """Ready once a fresh probe shows the database reachable (or not configured)"""
+        snapshot = self.snapshot()
+        if snapshot['stale']:
+            return False
+        return bool(snapshot['connected']) or not snapshot['configured']
+
+
+prober = HealthProber(interval=float(os.getenv('HEALTH_PROBE_INTERVAL', 15)))
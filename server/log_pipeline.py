@@ -0,0 +1,161 @@
+"""
+Non-Blocking Log Pipeline
+Structured JSON logging handed off to a background thread via a bounded queue
+
+Request threads only build a LogRecord and put it on a queue; formatting,
+file rotation and console writes happen in a QueueListener thread. When
+the queue is full the record is dropped and counted instead of blocking.
+
+High-volume paths can be sampled with LOG_SAMPLE_RATES, e.g.
+    LOG_SAMPLE_RATES="/assets=0,/api/health=0.05"
+Errors and slow requests are always logged.
+"""
+import os
+import json
+import queue
+import random
+import logging
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Any, List, Optional
+
+# Static files were never logged; errors on them still are
+DEFAULT_SAMPLE_RATES = '/assets=0,/favicon.ico=0,/vite.svg=0'
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse "prefix=rate,prefix=rate" into {prefix: rate}"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        prefix, _, rate = item.partition('=')
+        rates[prefix.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line; structured fields come from extra={'fields': {...}}"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.utcfromtimestamp(record.created).isoformat(timespec='milliseconds') + 'Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'pid': record.process,
+            'msg': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, separators=(',', ':'))
+
+
+class _PipelineHandler(QueueHandler):
+    def __init__(self, pipeline: 'LogPipeline'):
+        super().__init__(None)
+        self.pipeline = pipeline
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args and render the traceback now (they may not outlive the
+        # request), but leave all other formatting to the listener thread
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        self.pipeline.enqueue(record)
+
+
+class LogPipeline:
+    """
+    Bounded queue in front of the real handlers, drained by a listener
+    thread started lazily once per process (safe across fork).
+    """
+
+    def __init__(self, handlers: List[logging.Handler], max_queue: int = 10_000,
+                 sample_rates: Optional[Dict[str, float]] = None, slow_ms: float = 1000.0):
+        self.handlers = handlers
+        self.max_queue = max_queue
+        self.slow_ms = slow_ms
+        # Longest prefix wins
+        self.sample_rates = sorted((sample_rates or {}).items(), key=lambda item: -len(item[0]))
+        self.handler = _PipelineHandler(self)
+
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._queue: Optional[queue.Queue] = None
+        self._listener: Optional[QueueListener] = None
+
+        self.queued = 0
+        self.dropped = 0
+        self.sampled_out = 0
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self.max_queue)
+            self._listener = QueueListener(self._queue, *self.handlers, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def enqueue(self, record: logging.LogRecord):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+            self.queued += 1
+        except queue.Full:
+            self.dropped += 1
+
+    # ============== Request Logging ==============
+
+    def sample_rate(self, path: str) -> float:
+        for prefix, rate in self.sample_rates:
+            if path.startswith(prefix):
+                return rate
+        return 1.0
+
+    def log_request(self, logger: logging.Logger, method: str, path: str, status: int,
+                    duration_ms: float, ip: Optional[str] = None):
+        """Log one finished request as a structured record (subject to sampling)"""
+        rate = 1.0 if status >= 400 or duration_ms >= self.slow_ms else self.sample_rate(path)
+        if rate < 1.0 and random.random() >= rate:
+            self.sampled_out += 1
+            return
+        logger.info(
+            '%s %s %s %.1fms', method, path, status, duration_ms,
+            extra={'fields': {
+                'method': method,
+                'path': path,
+                'status': status,
+                'duration_ms': round(duration_ms, 2),
+                'ip': ip,
+                # Lets log analysis scale sampled counts back up
+                'sample_rate': rate,
+            }}
+        )
+
+    def close(self):
+        """Flush queued records (called at exit)"""
+        if self._pid == os.getpid() and self._listener is not None:
+            listener, self._listener = self._listener, None
+            try:
+                listener.stop()
+            except queue.Full:
+                pass  # Listener is still draining; daemon thread ends with the process
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queued': self.queued,
+            'dropped': self.dropped,
+            'sampled_out': self.sampled_out,
+            'depth': self._queue.qsize() if self._pid == os.getpid() else 0,
+            'capacity': self.max_queue,
+        }
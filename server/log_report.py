@@ -0,0 +1,260 @@
+"""
+Log Report
+Incremental traffic report over logs/portfolio.log and its rotated backups
+
+    python log_report.py [--log-dir logs] [--top 10] [--json] [--reset]
+
+Files are streamed line by line, oldest backup first. Each run stores the
+byte offset reached in every file (keyed by inode, so rotation renames
+don't matter) together with the running totals, and the next run only
+parses lines appended since. Understands both the JSON records written
+by log_pipeline and the older plain-text request lines.
+"""
+import os
+import re
+import json
+import glob
+from collections import Counter
+from typing import Dict, Any, Iterator, Iterable, Optional, Tuple
+
+DEFAULT_LOG_DIR = os.path.join(os.path.dirname(__file__), 'logs')
+LOG_NAME = 'portfolio.log'
+STATE_NAME = '.log_report.json'
+
+# Per-minute buckets and per-IP counts kept between runs
+MINUTE_RETENTION = 7 * 24 * 60
+MAX_TRACKED_IPS = 10_000
+
+# 2026-01-31 12:00:00,123 - app - INFO - GET /api/projects - 10.0.0.1
+LEGACY_LINE_RE = re.compile(r'^(\d{4}-\d\d-\d\d \d\d:\d\d):\d\d,\d+ - (\S+) - ([A-Z]+) - (.*)$')
+LEGACY_REQUEST_RE = re.compile(r'^([A-Z]+) (\S+) - (\S+)$')
+
+
+# ============== Reading ==============
+
+def log_files(log_dir: str) -> Iterator[str]:
+    """portfolio.log.5 ... portfolio.log.1, portfolio.log (oldest first)"""
+    backups = glob.glob(os.path.join(log_dir, LOG_NAME + '.*'))
+    numbered = [path for path in backups if path.rsplit('.', 1)[1].isdigit()]
+    yield from sorted(numbered, key=lambda path: -int(path.rsplit('.', 1)[1]))
+    current = os.path.join(log_dir, LOG_NAME)
+    if os.path.exists(current):
+        yield current
+
+
+def read_new_lines(paths: Iterable[str], offsets: Dict[str, int]) -> Iterator[str]:
+    """
+    Yield complete lines past each file's checkpointed offset, advancing
+    `offsets` ({inode: byte offset}) as lines are consumed. A trailing
+    partial line is left for the next run.
+    """
+    for path in paths:
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            continue  # Rotated away between listing and opening
+        with f:
+            inode = str(os.fstat(f.fileno()).st_ino)
+            offset = offsets.get(inode, 0)
+            if offset > os.fstat(f.fileno()).st_size:
+                offset = 0  # Truncated, or the inode was reused by a new file
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break
+                offset += len(raw)
+                offsets[inode] = offset
+                yield raw.decode('utf-8', errors='replace')
+            offsets.setdefault(inode, offset)
+
+
+# ============== Parsing ==============
+
+def parse_line(line: str) -> Optional[Dict[str, Any]]:
+    """One log line -> {minute, level, method, path, status, ip, duration_ms, weight}"""
+    line = line.strip()
+    if line.startswith('{'):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None
+        rate = record.get('sample_rate') or 1.0
+        return {
+            'minute': record.get('ts', '')[:16],
+            'level': record.get('level'),
+            'method': record.get('method'),
+            'path': record.get('path'),
+            'status': record.get('status'),
+            'ip': record.get('ip'),
+            'duration_ms': record.get('duration_ms'),
+            # A record sampled at 10% stands for ten requests
+            'weight': 1.0 / rate,
+        }
+
+    match = LEGACY_LINE_RE.match(line)
+    if not match:
+        return None  # Traceback continuation lines and the like
+    minute, _, level, message = match.groups()
+    parsed = {'minute': minute.replace(' ', 'T'), 'level': level, 'method': None, 'path': None,
+              'status': None, 'ip': None, 'duration_ms': None, 'weight': 1.0}
+    request = LEGACY_REQUEST_RE.match(message)
+    if request:
+        parsed['method'], parsed['path'], parsed['ip'] = request.groups()
+    return parsed
+
+
+def parse_lines(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    for line in lines:
+        record = parse_line(line)
+        if record is not None:
+            yield record
+
+
+# ============== Aggregation ==============
+
+class Report:
+    """Running totals; round-trips through the state file"""
+
+    def __init__(self, state: Optional[Dict[str, Any]] = None):
+        state = state or {}
+        self.requests = state.get('requests', 0.0)
+        self.timed_requests = state.get('timed_requests', 0.0)
+        self.duration_ms = state.get('duration_ms', 0.0)
+        self.lines = state.get('lines', 0)
+        self.paths = Counter(state.get('paths', {}))
+        self.ips = Counter(state.get('ips', {}))
+        self.minutes = Counter(state.get('minutes', {}))
+        self.statuses = Counter(state.get('statuses', {}))
+        self.levels = Counter(state.get('levels', {}))
+
+    def add(self, record: Dict[str, Any]):
+        self.lines += 1
+        if record['level']:
+            self.levels[record['level']] += 1
+        if not record['path']:
+            return
+        weight = record['weight']
+        self.requests += weight
+        self.paths[record['path']] += weight
+        if record['ip']:
+            self.ips[record['ip']] += weight
+        if record['minute']:
+            self.minutes[record['minute']] += weight
+        status = record['status']
+        self.statuses[f'{status // 100}xx' if status else 'unknown'] += weight
+        if record['duration_ms'] is not None:
+            self.timed_requests += weight
+            self.duration_ms += record['duration_ms'] * weight
+
+    def consume(self, records: Iterable[Dict[str, Any]]) -> int:
+        before = self.lines
+        for record in records:
+            self.add(record)
+        return self.lines - before
+
+    def to_state(self) -> Dict[str, Any]:
+        minutes = dict(sorted(self.minutes.items())[-MINUTE_RETENTION:])
+        return {
+            'requests': self.requests,
+            'timed_requests': self.timed_requests,
+            'duration_ms': self.duration_ms,
+            'lines': self.lines,
+            'paths': dict(self.paths),
+            'ips': dict(self.ips.most_common(MAX_TRACKED_IPS)),
+            'minutes': minutes,
+            'statuses': dict(self.statuses),
+            'levels': dict(self.levels),
+        }
+
+    def summary(self, top: int = 10) -> Dict[str, Any]:
+        with_status = sum(count for key, count in self.statuses.items() if key != 'unknown')
+        busiest = self.minutes.most_common(1)
+        return {
+            'requests': round(self.requests),
+            'lines': self.lines,
+            'error_rate_4xx': round(self.statuses['4xx'] / with_status, 4) if with_status else None,
+            'error_rate_5xx': round(self.statuses['5xx'] / with_status, 4) if with_status else None,
+            'error_log_records': self.levels['ERROR'] + self.levels['CRITICAL'],
+            'mean_duration_ms': round(self.duration_ms / self.timed_requests, 2) if self.timed_requests else None,
+            'statuses': {key: round(count) for key, count in sorted(self.statuses.items())},
+            'top_paths': [(path, round(count)) for path, count in self.paths.most_common(top)],
+            'top_ips': [(ip, round(count)) for ip, count in self.ips.most_common(top)],
+            'busiest_minute': (busiest[0][0], round(busiest[0][1])) if busiest else None,
+            'recent_minutes': [(minute, round(count)) for minute, count in sorted(self.minutes.items())[-top:]],
+        }
+
+
+# ============== State ==============
+
+def load_state(path: str) -> Tuple[Dict[str, int], Report]:
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}, Report()
+    return state.get('offsets', {}), Report(state.get('report'))
+
+
+def save_state(path: str, offsets: Dict[str, int], report: Report, log_dir: str):
+    # Forget files that have rotated out of existence
+    live = set()
+    for log_path in log_files(log_dir):
+        try:
+            live.add(str(os.stat(log_path).st_ino))
+        except FileNotFoundError:
+            pass
+    state = {'offsets': {inode: offset for inode, offset in offsets.items() if inode in live},
+             'report': report.to_state()}
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def run(log_dir: str = DEFAULT_LOG_DIR, state_path: Optional[str] = None,
+        reset: bool = False, save: bool = True) -> Tuple[Report, int]:
+    """Parse everything new since the last run; returns (report, new lines)"""
+    state_path = state_path or os.path.join(log_dir, STATE_NAME)
+    offsets, report = ({}, Report()) if reset else load_state(state_path)
+    parsed = report.consume(parse_lines(read_new_lines(log_files(log_dir), offsets)))
+    if save:
+        save_state(state_path, offsets, report, log_dir)
+    return report, parsed
+
+
+def print_summary(summary: Dict[str, Any], parsed: int):
+    def rate(value):
+        return 'n/a' if value is None else f'{value:.2%}'
+
+    print(f"Parsed {parsed} new lines ({summary['lines']} total)")
+    print(f"Requests: {summary['requests']}  mean {summary['mean_duration_ms'] or 'n/a'} ms")
+    print(f"Error rate: 4xx {rate(summary['error_rate_4xx'])}  5xx {rate(summary['error_rate_5xx'])}  "
+          f"error records {summary['error_log_records']}")
+    print(f"Statuses: {', '.join(f'{k}={v}' for k, v in summary['statuses'].items()) or 'none'}")
+    if summary['busiest_minute']:
+        print(f"Busiest minute: {summary['busiest_minute'][0]} ({summary['busiest_minute'][1]} requests)")
+    for title, rows in (('Top paths', summary['top_paths']), ('Top IPs', summary['top_ips']),
+                        ('Recent minutes', summary['recent_minutes'])):
+        print(f"\n{title}:")
+        for key, count in rows:
+            print(f"  {count:>8}  {key}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Traffic report from the application log files')
+    parser.add_argument('--log-dir', default=DEFAULT_LOG_DIR)
+    parser.add_argument('--state', help=f'Checkpoint file (default: <log-dir>/{STATE_NAME})')
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--json', action='store_true', help='Print the summary as JSON')
+    parser.add_argument('--reset', action='store_true', help='Ignore the checkpoint and start over')
+    parser.add_argument('--no-save', action='store_true', help="Don't update the checkpoint")
+    args = parser.parse_args()
+
+    report, parsed = run(args.log_dir, args.state, reset=args.reset, save=not args.no_save)
+    summary = report.summary(args.top)
+    if args.json:
+        print(json.dumps(dict(summary, parsed=parsed), indent=2))
+    else:
+        print_summary(summary, parsed)
@@ -0,0 +1,296 @@
+"""
+Mail Delivery Subsystem
+Queued SMTP delivery over persistent connections, with retries and an on-disk outbox
+
+Each worker thread keeps one authenticated SMTP session open and reuses it
+across messages, so a burst of submissions pays the TLS handshake and login
+once. Queued mail is mirrored to MAIL_OUTBOX_DIR and picked up again after
+a restart. Flask-Mail is only imported once the first message goes out.
+
+To try it locally against a debugging SMTP server:
+    python -m aiosmtpd -n -l localhost:1025
+    MAIL_SERVER=localhost MAIL_PORT=1025 MAIL_USE_TLS=false ...
+"""
+import os
+import json
+import time
+import uuid
+import queue
+import atexit
+import smtplib
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+from utils import owned_by_dead_process
+from metrics import mail_latency
+
+logger = logging.getLogger('app.mailer')
+
+DEFAULT_OUTBOX_DIR = os.path.join(os.path.dirname(__file__), 'outbox')
+
+# SMTP errors that will not succeed on retry
+PERMANENT_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPNotSupportedError)
+
+
+class MailDispatcher:
+    """
+    Queue of outgoing mail served by a small pool of SMTP workers.
+
+    Failed sends are retried with exponential backoff up to `max_attempts`;
+    jobs that still fail are moved to the outbox's failed/ directory.
+    """
+
+    def __init__(self, workers: int = 2, max_attempts: int = 5, base_delay: float = 5.0,
+                 max_delay: float = 300.0, idle_timeout: float = 60.0,
+                 outbox_dir: Optional[str] = DEFAULT_OUTBOX_DIR):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.idle_timeout = idle_timeout
+        self.outbox_dir = outbox_dir
+
+        self.app = None
+        self.mail = None
+        self._lock = threading.Lock()
+        self._queue: Optional[queue.PriorityQueue] = None
+        self._stopping = threading.Event()
+        self._pid: Optional[int] = None
+        self._seq = 0
+
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.recovered = 0
+
+    def init_app(self, app):
+        self.app = app
+        self.mail = None
+
+    def _get_mail(self):
+        """The Flask-Mail extension, created on first send"""
+        if self.mail is None:
+            from flask_mail import Mail
+            with self._lock:
+                if self.mail is None:
+                    self.mail = Mail(self.app)
+        return self.mail
+
+    def is_configured(self) -> bool:
+        """Pre-flight check for mail configuration"""
+        config = self.app.config if self.app else {}
+        return all(config.get(key) for key in
+                   ('MAIL_SERVER', 'MAIL_USERNAME', 'MAIL_PASSWORD', 'MAIL_DEFAULT_SENDER'))
+
+    # ============== Producer Side ==============
+
+    def submit(self, subject: str, recipients: List[str], body: str,
+               reply_to: Optional[str] = None) -> Optional[str]:
+        """Queue a message for delivery; returns its job id (None if mail is not configured)"""
+        if not self.is_configured():
+            logger.warning(f"Email skipped: Missing mail config ({subject!r})")
+            return None
+
+        job = {
+            'id': uuid.uuid4().hex,
+            'subject': subject,
+            'recipients': recipients,
+            'body': body,
+            'reply_to': reply_to,
+            'attempts': 0,
+            'not_before': 0,
+            'created_at': time.time(),
+        }
+        self.start()
+        self._persist(job)
+        self._enqueue(job)
+        return job['id']
+
+    def _enqueue(self, job: Dict[str, Any]):
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        self._queue.put((job['not_before'], seq, job))
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._pid == os.getpid() else 0
+
+    # ============== Outbox ==============
+
+    def _job_path(self, job: Dict[str, Any], pid: Optional[int] = None) -> str:
+        return os.path.join(self.outbox_dir, f"{pid or os.getpid()}-{job['id']}.json")
+
+    def _persist(self, job: Dict[str, Any]):
+        if not self.outbox_dir:
+            return
+        path = self._job_path(job)
+        tmp = path + '.tmp'
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(job, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.error(f"Failed to persist mail job {job['id']}: {e}")
+
+    def _discard(self, job: Dict[str, Any], failed: bool = False):
+        if not self.outbox_dir:
+            return
+        path = self._job_path(job)
+        try:
+            if failed:
+                failed_dir = os.path.join(self.outbox_dir, 'failed')
+                os.makedirs(failed_dir, exist_ok=True)
+                os.replace(path, os.path.join(failed_dir, os.path.basename(path)))
+            else:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _recover(self) -> List[Dict[str, Any]]:
+        """Claim jobs left behind by processes that no longer exist (the caller enqueues them)"""
+        if not self.outbox_dir:
+            return []
+        os.makedirs(self.outbox_dir, exist_ok=True)
+        claimed = []
+        for name in sorted(os.listdir(self.outbox_dir)):
+            if not name.endswith('.json'):
+                continue
+            if not owned_by_dead_process(name):
+                continue
+            path = os.path.join(self.outbox_dir, name)
+            try:
+                with open(path) as f:
+                    job = json.load(f)
+                # Atomic claim: only one worker's rename can succeed
+                os.replace(path, self._job_path(job))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping outbox entry {name}: {e}")
+                continue
+            job['not_before'] = 0
+            claimed.append(job)
+        if claimed:
+            self.recovered += len(claimed)
+            logger.info(f"Recovered {len(claimed)} queued emails from outbox")
+        return claimed
+
+    # ============== Workers ==============
+
+    def start(self):
+        """Start the worker pool once per process (safe across fork)"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.PriorityQueue()
+            self._stopping = threading.Event()
+            # Claim leftovers before publishing _pid: recovery takes files named
+            # with our own pid too (a recycled pid), so it must not see jobs
+            # that submit() persists once start() has returned
+            recovered = self._recover()
+            self._pid = os.getpid()
+            for i in range(self.workers):
+                threading.Thread(target=self._worker, name=f'mail-worker-{i}', daemon=True).start()
+        for job in recovered:
+            self._enqueue(job)
+
+    def stop(self):
+        self._stopping.set()
+
+    def _next_job(self) -> Optional[Dict[str, Any]]:
+        try:
+            due, seq, job = self._queue.get(timeout=1.0)
+        except queue.Empty:
+            return None
+        delay = due - time.time()
+        if delay > 0:
+            # Not due yet (backing off): put it back and check again shortly
+            self._queue.put((due, seq, job))
+            self._stopping.wait(min(delay, 1.0))
+            return None
+        return job
+
+    def _worker(self):
+        with self.app.app_context():
+            connection = None
+            last_used = time.monotonic()
+
+            while not self._stopping.is_set():
+                job = self._next_job()
+                if job is None:
+                    if connection is not None and time.monotonic() - last_used > self.idle_timeout:
+                        connection = self._close(connection)
+                    continue
+
+                started = time.perf_counter()
+                try:
+                    if connection is None:
+                        from flask_mail import Connection
+                        connection = Connection(self._get_mail()).__enter__()
+                    connection.send(self._build_message(job))
+                    mail_latency.observe(time.perf_counter() - started, outcome='ok')
+                    last_used = time.monotonic()
+                    self.sent += 1
+                    self._discard(job)
+                    logger.info(f"Email sent to {', '.join(job['recipients'])}")
+                except Exception as e:
+                    mail_latency.observe(time.perf_counter() - started, outcome='error')
+                    # The session may be broken; reconnect for the next message
+                    connection = self._close(connection)
+                    self._handle_failure(job, e)
+
+            self._close(connection)
+
+    def _build_message(self, job: Dict[str, Any]):
+        from flask_mail import Message as MailMessage
+        self._get_mail()  # Message() reads the default sender from the extension
+        msg = MailMessage(subject=job['subject'], recipients=job['recipients'], reply_to=job['reply_to'])
+        msg.body = job['body']
+        return msg
+
+    @staticmethod
+    def _close(connection) -> None:
+        if connection is not None:
+            try:
+                connection.__exit__(None, None, None)
+            except Exception:
+                pass
+        return None
+
+    def _handle_failure(self, job: Dict[str, Any], error: Exception):
+        job['attempts'] += 1
+        permanent = isinstance(error, PERMANENT_ERRORS)
+
+        if permanent or job['attempts'] >= self.max_attempts:
+            self.failed += 1
+            self._discard(job, failed=True)
+            logger.error(f"Email send failed permanently after {job['attempts']} attempts: "
+                         f"{type(error).__name__}: {error}")
+            return
+
+        delay = min(self.base_delay * (2 ** (job['attempts'] - 1)), self.max_delay)
+        job['not_before'] = time.time() + delay
+        self.retried += 1
+        self._persist(job)
+        self._enqueue(job)
+        logger.warning(f"Email send failed ({type(error).__name__}: {error}), retry {job['attempts']} in {delay:.0f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'pending': self.pending(),
+            'sent': self.sent,
+            'retried': self.retried,
+            'failed': self.failed,
+            'recovered': self.recovered,
+        }
+
+
+dispatcher = MailDispatcher(
+    workers=int(os.getenv('MAIL_WORKERS', 2)),
+    max_attempts=int(os.getenv('MAIL_MAX_ATTEMPTS', 5)),
+    idle_timeout=float(os.getenv('MAIL_IDLE_TIMEOUT', 60)),
+    outbox_dir=os.getenv('MAIL_OUTBOX_DIR', DEFAULT_OUTBOX_DIR) or None,
+)
+
+atexit.register(dispatcher.stop)
@@ -0,0 +1,385 @@
+"""
+Metrics
+Fixed-bucket latency histograms and counters, aggregated across workers
+
+Hot-path updates go to a per-thread shard (no lock, no allocation once a
+series exists). Each worker periodically writes a JSON snapshot of its
+totals to METRICS_DIR/<pid>.json; /metrics merges every snapshot on the
+host into one Prometheus text exposition. Snapshots of exited workers are
+folded into an archive so counters stay monotonic across restarts.
+"""
+import os
+import json
+import time
+import fcntl
+import logging
+import tempfile
+import threading
+from bisect import bisect_left
+from functools import wraps
+from typing import Dict, Any, List, Tuple, Callable, Iterable, Optional
+
+from utils import pid_alive
+
+logger = logging.getLogger('app.metrics')
+
+DEFAULT_METRICS_DIR = os.path.join(tempfile.gettempdir(), 'portfolio-metrics')
+ARCHIVE_NAME = 'archive.json'
+NAMESPACE = 'portfolio'
+
+# Seconds; covers sub-millisecond cache hits up to request timeouts
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(**labels: Any) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _label_key(labels: Labels) -> str:
+    """Labels as a JSON string, used as the series key in snapshots"""
+    return json.dumps(labels, separators=(',', ':'))
+
+
+def _format_labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    def escape(value: str) -> str:
+        return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    rendered = ','.join(f'{key}="{escape(value)}"' for key, value in pairs)
+    return '{' + rendered + '}' if rendered else ''
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Fixed buckets; observe() is a bisect plus two list updates"""
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, help: str,
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels: Any):
+        self.registry._observe(self, _labels(**labels), value)
+
+
+class Counter:
+    def __init__(self, registry: 'MetricsRegistry', name: str, help: str):
+        self.registry = registry
+        self.name = name
+        self.help = help
+
+    def inc(self, amount: float = 1, **labels: Any):
+        self.registry._inc(self, _labels(**labels), amount)
+
+
+class MetricsRegistry:
+    """
+    Metric definitions, per-thread shards and the cross-worker snapshot files.
+
+    Gauges and counters owned by other components (queue depths, drop
+    counts) are read from their stats() at snapshot time via
+    register_stats(), so those components need no metrics code.
+    """
+
+    def __init__(self, directory: Optional[str] = DEFAULT_METRICS_DIR, flush_interval: float = 5.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, Counter] = {}
+        self._stats_sources: List[Dict[str, Any]] = []
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards: List[Dict[str, Dict]] = []
+        self._pid: Optional[int] = None
+
+    # ============== Definitions ==============
+
+    def histogram(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        metric = self.histograms[name] = Histogram(self, f'{NAMESPACE}_{name}', help, buckets)
+        return metric
+
+    def counter(self, name: str, help: str) -> Counter:
+        metric = self.counters[name] = Counter(self, f'{NAMESPACE}_{name}_total', help)
+        return metric
+
+    def register_stats(self, prefix: str, source: Callable[[], Dict[str, Any]],
+                       counters: Iterable[str] = (), gauges: Iterable[str] = (),
+                       aggregate: str = 'sum'):
+        """
+        Export keys of source() as <prefix>_<key>_total counters or
+        <prefix>_<key> gauges. Gauges from several workers are summed, or
+        reduced with max for values every worker sees the same (aggregate='max').
+        """
+        self._stats_sources.append({
+            'prefix': prefix, 'source': source, 'counters': tuple(counters),
+            'gauges': tuple(gauges), 'aggregate': aggregate,
+        })
+
+    # ============== Hot Path ==============
+
+    def _shard(self) -> Dict[str, Dict]:
+        shard = getattr(self._local, 'shard', None)
+        if shard is not None and self._local.pid == os.getpid():
+            return shard
+        shard = {'histograms': {}, 'counters': {}}
+        with self._lock:
+            if self._pid != os.getpid():
+                # Counts recorded by the parent before fork belong to the parent
+                self._shards = []
+                self._pid = os.getpid()
+                self._start_writer()
+            self._shards.append(shard)
+        self._local.shard = shard
+        self._local.pid = os.getpid()
+        return shard
+
+    def _observe(self, metric: Histogram, labels: Labels, value: float):
+        series = self._shard()['histograms']
+        cell = series.get((metric.name, labels))
+        if cell is None:
+            # Per-bucket counts (last one is +Inf), then the sum
+            cell = series[(metric.name, labels)] = [0] * (len(metric.buckets) + 1) + [0.0]
+        cell[bisect_left(metric.buckets, value)] += 1
+        cell[-1] += value
+
+    def _inc(self, metric: Counter, labels: Labels, amount: float):
+        series = self._shard()['counters']
+        series[(metric.name, labels)] = series.get((metric.name, labels), 0) + amount
+
+    # ============== Snapshots ==============
+
+    @staticmethod
+    def _items(series: Dict) -> List:
+        # Other threads may add series while we copy; just try again
+        while True:
+            try:
+                return list(series.items())
+            except RuntimeError:
+                continue
+
+    def snapshot(self) -> Dict[str, Any]:
+        """This process's totals in the on-disk snapshot format"""
+        histograms: Dict[str, Dict[str, List[float]]] = {}
+        counters: Dict[str, Dict[str, float]] = {}
+        gauges: Dict[str, Dict[str, Any]] = {}
+
+        with self._lock:
+            shards = list(self._shards) if self._pid == os.getpid() else []
+        for shard in shards:
+            for (name, labels), cell in self._items(shard['histograms']):
+                merged = histograms.setdefault(name, {}).setdefault(_label_key(labels), [0] * len(cell))
+                for i, value in enumerate(list(cell)):
+                    merged[i] += value
+            for (name, labels), value in self._items(shard['counters']):
+                key = _label_key(labels)
+                counters.setdefault(name, {})[key] = counters.get(name, {}).get(key, 0) + value
+
+        for source in self._stats_sources:
+            try:
+                stats = source['source']()
+            except Exception as e:
+                logger.warning(f"Metrics source {source['prefix']} failed: {e}")
+                continue
+            for key in source['counters']:
+                counters.setdefault(f"{NAMESPACE}_{source['prefix']}_{key}_total", {})['[]'] = stats.get(key) or 0
+            for key in source['gauges']:
+                gauges.setdefault(f"{NAMESPACE}_{source['prefix']}_{key}", {})['[]'] = {
+                    'value': stats.get(key) or 0, 'aggregate': source['aggregate'],
+                }
+
+        return {'pid': os.getpid(), 'written_at': time.time(),
+                'histograms': histograms, 'counters': counters, 'gauges': gauges}
+
+    def _start_writer(self):
+        if self.directory:
+            threading.Thread(target=self._write_loop, name='metrics-writer', daemon=True).start()
+
+    def _write_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.write_snapshot()
+                self._archive_dead()
+            except Exception as e:
+                logger.warning(f"Metrics snapshot failed: {e}")
+
+    def write_snapshot(self):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.snapshot(), f, separators=(',', ':'))
+        os.replace(tmp, path)
+
+    def _snapshot_files(self) -> List[Tuple[int, str]]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        files = []
+        for name in names:
+            stem, ext = os.path.splitext(name)
+            if ext == '.json' and stem.isdigit():
+                files.append((int(stem), os.path.join(self.directory, name)))
+        return files
+
+    @staticmethod
+    def _load(path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            logger.warning(f"Skipping unreadable metrics snapshot {os.path.basename(path)}: {e}")
+            return None
+
+    def _archive_dead(self):
+        """Fold snapshots of exited workers into the archive (counters and histograms only)"""
+        dead = [path for pid, path in self._snapshot_files() if not pid_alive(pid)]
+        if not dead:
+            return
+        with open(os.path.join(self.directory, '.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            archive_path = os.path.join(self.directory, ARCHIVE_NAME)
+            archive = self._load(archive_path) or {'histograms': {}, 'counters': {}}
+            merged = 0
+            for path in dead:
+                snapshot = self._load(path)
+                if snapshot is None:
+                    continue
+                _merge(archive, snapshot)
+                merged += 1
+            tmp = f'{archive_path}.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(archive, f, separators=(',', ':'))
+            os.replace(tmp, archive_path)
+            # Only after the archive is durable, or a crash would lose the counts
+            for path in dead:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def collect(self) -> Dict[str, Any]:
+        """Merged totals of every worker on the host (and archived workers)"""
+        if not self.directory:
+            return _merge({'histograms': {}, 'counters': {}, 'gauges': {}}, self.snapshot(), gauges=True)
+        self.write_snapshot()
+        total: Dict[str, Any] = {'histograms': {}, 'counters': {}, 'gauges': {}}
+        archive = self._load(os.path.join(self.directory, ARCHIVE_NAME))
+        if archive:
+            _merge(total, archive)
+        for pid, path in self._snapshot_files():
+            snapshot = self._load(path)
+            if snapshot is not None:
+                _merge(total, snapshot, gauges=pid_alive(pid))
+        return total
+
+    # ============== Exposition ==============
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        data = self.collect()
+        helps = {metric.name: (metric.help, 'histogram') for metric in self.histograms.values()}
+        helps.update({metric.name: (metric.help, 'counter') for metric in self.counters.values()})
+        lines: List[str] = []
+
+        for name in sorted(data['histograms']):
+            buckets = next((m.buckets for m in self.histograms.values() if m.name == name), None)
+            if buckets is None:
+                continue
+            lines += [f'# HELP {name} {helps[name][0]}', f'# TYPE {name} histogram']
+            for key, cell in sorted(data['histograms'][name].items()):
+                labels = [tuple(pair) for pair in json.loads(key)]
+                cumulative = 0
+                for bound, count in zip(buckets + (float('inf'),), cell[:-1]):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{name}_bucket{_format_labels(labels + [("le", le)])} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(cell[-1])}')
+                lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+
+        for name in sorted(data['counters']):
+            help_text = helps.get(name, (name.replace('_', ' '), 'counter'))[0]
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            for key, value in sorted(data['counters'][name].items()):
+                lines.append(f'{name}{_format_labels(tuple(p) for p in json.loads(key))} {_format_value(value)}')
+
+        for name in sorted(data['gauges']):
+            lines += [f'# HELP {name} {name.replace("_", " ")}', f'# TYPE {name} gauge']
+            for key, value in sorted(data['gauges'][name].items()):
+                lines.append(f'{name}{_format_labels(tuple(p) for p in json.loads(key))} {_format_value(value)}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _merge(total: Dict[str, Any], snapshot: Dict[str, Any], gauges: bool = False) -> Dict[str, Any]:
+    """Add snapshot's series into total (in place)"""
+    for name, series in snapshot.get('histograms', {}).items():
+        target = total['histograms'].setdefault(name, {})
+        for key, cell in series.items():
+            merged = target.setdefault(key, [0] * len(cell))
+            if len(merged) != len(cell):
+                continue  # Bucket layout changed between deploys
+            for i, value in enumerate(cell):
+                merged[i] += value
+    for name, series in snapshot.get('counters', {}).items():
+        target = total['counters'].setdefault(name, {})
+        for key, value in series.items():
+            target[key] = target.get(key, 0) + value
+    if gauges:
+        for name, series in snapshot.get('gauges', {}).items():
+            target = total['gauges'].setdefault(name, {})
+            for key, gauge in series.items():
+                if gauge['aggregate'] == 'max':
+                    target[key] = max(target.get(key, gauge['value']), gauge['value'])
+                else:
+                    target[key] = target.get(key, 0) + gauge['value']
+    return total
+
+
+registry = MetricsRegistry(
+    directory=os.getenv('METRICS_DIR', DEFAULT_METRICS_DIR) or None,
+    flush_interval=float(os.getenv('METRICS_FLUSH_INTERVAL', 5)),
+)
+
+request_latency = registry.histogram(
+    'http_request_duration_seconds', 'HTTP request latency by endpoint, method and status'
+)
+db_latency = registry.histogram(
+    'db_query_duration_seconds', 'MongoDB helper latency by db.py function and outcome'
+)
+bot_page_views = registry.counter(
+    'bot_page_views', 'Page views from crawlers, monitors and other bots (counted, not stored) by category'
+)
+contact_rejected = registry.counter(
+    'contact_submissions_rejected', 'Contact form submissions refused as invalid, by reason'
+)
+rollup_errors = registry.counter(
+    'analytics_rollup_errors', 'Page view batches stored but not added to rollups or visitor sketches, by step'
+)
+mail_latency = registry.histogram(
+    'mail_send_duration_seconds', 'SMTP send latency by outcome', buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+
+def timed_query(f):
+    """Record a db.py function's latency under its name, split by ok/error"""
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            result = f(*args, **kwargs)
+            outcome = 'ok'
+            return result
+        finally:
+            db_latency.observe(time.perf_counter() - started, function=f.__name__, outcome=outcome)
+    return wrapper
@@ -0,0 +1,163 @@
+"""
+Site Blueprint
+Serves the React SPA and its build assets, the contact form and /metrics
+"""
+import os
+import re
+import hmac
+import ipaddress
+
+from flask import Blueprint, current_app, send_from_directory, request, jsonify, make_response
+
+from extensions import csrf, limiter
+from db import save_contact_message
+from mailer import dispatcher as mail_dispatcher
+from spool import contact_spool
+from metrics import registry as metrics, contact_rejected
+from duplicates import submission_filter
+
+pages = Blueprint('pages', __name__)
+
+
+# ============== Metrics ==============
+
+def _metrics_authorized() -> bool:
+    """
+    With METRICS_TOKEN set, a matching bearer token; without one, only
+    scrapes from this host (loopback), so a fresh deploy doesn't publish
+    its internals.
+    """
+    token = os.getenv('METRICS_TOKEN')
+    if token:
+        return hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    try:
+        return ipaddress.ip_address(request.remote_addr or '').is_loopback
+    except ValueError:
+        return False
+
+
+@pages.route('/metrics')
+# Authorized scrapers are never throttled; everyone else is, like any route
+@limiter.limit("10 per minute", exempt_when=_metrics_authorized)
+def metrics_endpoint():
+    """Prometheus text exposition, merged across all workers on the host"""
+    if not _metrics_authorized():
+        if os.getenv('METRICS_TOKEN'):
+            return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+        return jsonify({'success': False, 'error': 'Forbidden: set METRICS_TOKEN to scrape remotely'}), 403
+    response = make_response(metrics.render())
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+# ============== Static Files & SPA Support ==============
+
+@pages.route('/assets/<path:filename>')
+def serve_assets(filename):
+    """Serve hashed build assets precompressed, with immutable caching"""
+    return current_app.extensions['asset_index'].send(filename)
+
+@pages.route('/vite.svg')
+def serve_vite_svg():
+    return send_from_directory(current_app.static_folder, 'vite.svg')
+
+@pages.route('/favicon.ico')
+def serve_favicon():
+    return send_from_directory(current_app.static_folder, 'favicon.ico')
+
+@pages.route('/', defaults={'path': ''})
+@pages.route('/<path:path>')
+def serve_spa(path):
+    """Serve the React SPA. Catch-all handles client-side routing."""
+
+    # Check if the requested path starts with protected prefixes
+    if path.startswith(('api', 'admin')):
+        # This shouldn't be reached if blueprints match, but just in case
+        return make_response(jsonify({'error': 'Not found'}), 404)
+
+    # For everything else, serve index.html (from memory)
+    # This allows React Router to handle the URL on the client side
+    return current_app.extensions['spa_shell'].send()
+
+
+# ============== Contact Form Handler ==============
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+def validate_email(email):
+    return EMAIL_PATTERN.match(email) is not None
+
+@pages.route('/contact', methods=['POST'])
+@csrf.exempt
+@limiter.limit("5 per minute")
+def contact():
+    """Handle contact form submissions"""
+    try:
+        if request.is_json:
+            data = request.get_json()
+        else:
+            data = request.form
+
+        name = data.get('name', '').strip()[:100]
+        email = data.get('email', '').strip()[:254]
+        subject = data.get('subject', '').strip()[:200]
+        message = data.get('message', '').strip()[:2000]
+
+        if not all([name, email, subject, message]):
+            contact_rejected.inc(reason='missing_fields')
+            return jsonify({'success': False, 'message': 'All fields are required'}), 400
+
+        if not validate_email(email):
+            contact_rejected.inc(reason='invalid_email')
+            return jsonify({'success': False, 'message': 'Invalid email format'}), 400
+
+        # Repeats and near-identical bursts are still stored (flagged, so a
+        # false match loses nothing) but send no notification or auto-reply
+        duplicate = submission_filter.check(email, subject, message)
+
+        contact_data = {
+            'name': name,
+            'email': email,
+            'subject': subject,
+            'message': message,
+            'ip_address': request.remote_addr,
+            'user_agent': request.user_agent.string
+        }
+        if duplicate:
+            contact_data['duplicate'] = duplicate
+
+        # Durable local spool, replayed into MongoDB in the background (off without a database)
+        try:
+            contact_spool.append(contact_data)
+        except OSError as spool_err:
+            current_app.logger.warning(f"Contact spool unavailable, saving directly: {spool_err}")
+            # Database save (non-blocking failure)
+            try:
+                save_contact_message(contact_data)
+            except Exception as db_err:
+                current_app.logger.warning(f"Failed to save contact to DB: {db_err}")
+
+        if duplicate:
+            return jsonify({'success': True, 'message': 'Message sent successfully!'})
+
+        # Notification to owner
+        mail_dispatcher.submit(
+            subject=f'Portfolio Contact: {subject}',
+            recipients=[current_app.config['MAIL_DEFAULT_SENDER']],
+            body=f"From: {name} ({email})\nSubject: {subject}\n\n{message}",
+            reply_to=email
+        )
+
+        # Auto-reply to visitor
+        mail_dispatcher.submit(
+            subject='Thanks for reaching out! - Shivam Singh',
+            recipients=[email],
+            body=f"Hi {name},\n\nThanks for your message regarding '{subject}'. I'll get back to you soon!\n\nBest,\nShivam"
+        )
+
+        return jsonify({'success': True, 'message': 'Message sent successfully!'})
+
+    except Exception as e:
+        current_app.logger.error(f"Contact error: {e}")
+        return jsonify({'success': False, 'message': 'Internal error'}), 500
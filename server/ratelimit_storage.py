@@ -0,0 +1,179 @@
+"""
+Host-Shared Rate Limit Storage
+SQLite (WAL mode) backend for flask-limiter, shared by every worker on a host
+
+Importing this module registers the `sqlite://` scheme with `limits`:
+    RATELIMIT_STORAGE_URL=sqlite:////var/lib/portfolio/ratelimit.db
+
+Every increment is a single UPSERT ... RETURNING statement, so it is atomic
+across processes without an explicit lock. With WAL and synchronous=NORMAL
+commits don't fsync, keeping a hit in the low microseconds.
+
+Anyone who can write the file can reset or exhaust every limit, so the
+default lives next to the query cache in an app-owned 0700 directory and
+a file or directory belonging to another user is refused.
+"""
+import os
+import time
+import sqlite3
+import threading
+from typing import Optional, Tuple
+from urllib.parse import urlparse
+
+from limits.storage import MovingWindowSupport, Storage
+
+from utils import check_private_file
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), 'cache', 'portfolio-ratelimit.db')
+DEFAULT_STORAGE_URI = f'sqlite:///{DEFAULT_DB_PATH}'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS counters (
+    key TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    expiry REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS window_entries (
+    key TEXT NOT NULL,
+    ts REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS window_entries_key_ts ON window_entries (key, ts);
+CREATE INDEX IF NOT EXISTS window_entries_expires_at ON window_entries (expires_at);
+'''
+
+INCR_SQL = '''
+INSERT INTO counters (key, count, expiry) VALUES (:key, :amount, :expiry)
+ON CONFLICT (key) DO UPDATE SET
+    count = CASE WHEN counters.expiry <= :now THEN :amount ELSE counters.count + :amount END,
+    expiry = CASE WHEN counters.expiry <= :now OR :elastic THEN :expiry ELSE counters.expiry END
+RETURNING count
+'''
+
+
+class SQLiteStorage(Storage, MovingWindowSupport):
+    """
+    Fixed- and moving-window rate limit storage in a local SQLite file.
+
+    Expired rows are purged every `compact_interval` seconds by whichever
+    process notices first, so the file stays small without a cron job.
+    """
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri: str = DEFAULT_STORAGE_URI, wrap_exceptions: bool = False,
+                 compact_interval: float = 60.0, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        # SQLAlchemy-style: sqlite:///relative.db, sqlite:////absolute.db
+        path = urlparse(uri).path
+        self.path = path[1:] if path.startswith('/') else path
+        if not self.path:
+            self.path = DEFAULT_DB_PATH
+        self.compact_interval = float(compact_interval)
+        self._local = threading.local()
+        self._next_compaction = 0.0
+        self._conn()  # create the schema eagerly
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread and per process (connections don't survive fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        check_private_file(self.path)
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(SCHEMA)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _maybe_compact(self, now: float):
+        if now < self._next_compaction:
+            return
+        self._next_compaction = now + self.compact_interval
+        conn = self._conn()
+        conn.execute('DELETE FROM counters WHERE expiry <= ?', (now,))
+        conn.execute('DELETE FROM window_entries WHERE expires_at <= ?', (now,))
+
+    # ============== Fixed Window ==============
+
+    def incr(self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1) -> int:
+        now = time.time()
+        self._maybe_compact(now)
+        row = self._conn().execute(INCR_SQL, {
+            'key': key, 'amount': amount, 'expiry': now + expiry,
+            'now': now, 'elastic': bool(elastic_expiry),
+        }).fetchone()
+        return row[0]
+
+    def get(self, key: str) -> int:
+        row = self._conn().execute(
+            'SELECT count FROM counters WHERE key = ? AND expiry > ?', (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key: str) -> float:
+        now = time.time()
+        row = self._conn().execute(
+            'SELECT expiry FROM counters WHERE key = ? AND expiry > ?', (key, now)
+        ).fetchone()
+        return row[0] if row else now
+
+    # ============== Moving Window ==============
+
+    def acquire_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        now = time.time()
+        self._maybe_compact(now)
+        conn = self._conn()
+        # IMMEDIATE takes the write lock up front so count-then-insert is atomic across workers
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            (count,) = conn.execute(
+                'SELECT COUNT(*) FROM window_entries WHERE key = ? AND ts > ?', (key, now - expiry)
+            ).fetchone()
+            if count + amount > limit:
+                conn.execute('COMMIT')
+                return False
+            conn.executemany(
+                'INSERT INTO window_entries (key, ts, expires_at) VALUES (?, ?, ?)',
+                [(key, now, now + expiry)] * amount
+            )
+            conn.execute('COMMIT')
+            return True
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def get_moving_window(self, key: str, limit: int, expiry: int) -> Tuple[float, int]:
+        now = time.time()
+        oldest, count = self._conn().execute(
+            'SELECT MIN(ts), COUNT(*) FROM window_entries WHERE key = ? AND ts > ?', (key, now - expiry)
+        ).fetchone()
+        return (oldest, count) if count else (now, 0)
+
+    # ============== Maintenance ==============
+
+    def check(self) -> bool:
+        try:
+            self._conn().execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> Optional[int]:
+        conn = self._conn()
+        cleared = conn.execute('DELETE FROM counters').rowcount
+        cleared += conn.execute('DELETE FROM window_entries').rowcount
+        return cleared
+
+    def clear(self, key: str) -> None:
+        conn = self._conn()
+        conn.execute('DELETE FROM counters WHERE key = ?', (key,))
+        conn.execute('DELETE FROM window_entries WHERE key = ?', (key,))
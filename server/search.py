@@ -0,0 +1,299 @@
+"""
+Message Search
+Ranked full-text search over contact messages, with highlighted snippets
+
+Stored messages are searched through MongoDB's text index
+(db.search_contact_messages). Submissions still in the local spool, the
+only ones reachable while the database is offline, are searched with an
+in-process InvertedIndex. Both backends treat a query as a set of words
+that must all appear (in the name, email, subject or message), rank hits
+with subject and sender matches weighted above the body, and page through
+results with a keyset cursor over (score, id).
+
+Benchmark: python benchmarks/message_search.py
+"""
+import re
+import heapq
+import base64
+import math
+import logging
+from array import array
+from bisect import bisect_left
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from db import get_collection, search_contact_messages, scan_contact_messages, SEARCH_FIELD_WEIGHTS
+from spool import contact_spool
+
+logger = logging.getLogger('app.search')
+
+_TOKEN = re.compile(r'\w+')
+
+# Too common to narrow a search; dropped from documents and queries alike
+STOPWORDS = frozenset(
+    'a an and are as at be but by for from has have i if in is it its me my of on or our so that the '
+    'this to was we were will with you your'.split()
+)
+
+MAX_QUERY_TERMS = 8
+SNIPPET_WIDTH = 200
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase word tokens without stopwords or single characters"""
+    if not text:
+        return []
+    return [t for t in _TOKEN.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def query_terms(query: str) -> List[str]:
+    """Distinct search terms of a query, in order (at most MAX_QUERY_TERMS)"""
+    return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+
+
+# ============== Cursors ==============
+
+def encode_cursor(score: float, doc_id: Any) -> str:
+    """Opaque token for a hit's (score, id) position in a ranked result list"""
+    raw = f"{score!r}|{doc_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> Tuple[float, str]:
+    """Inverse of encode_cursor; raises ValueError for malformed tokens"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        score, doc_id = raw.split('|', 1)
+        return float(score), doc_id
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+
+
+# ============== Snippets ==============
+
+def _term_pattern(terms: List[str]) -> Optional['re.Pattern']:
+    if not terms:
+        return None
+    # Longest first, so a term that is a prefix of another doesn't cut it short
+    alternatives = '|'.join(re.escape(t) for t in sorted(terms, key=len, reverse=True))
+    return re.compile(rf'\b(?:{alternatives})', re.IGNORECASE)
+
+
+def highlight(text: Optional[str], terms: List[str]) -> List[Tuple[str, bool]]:
+    """Split text into (segment, is_match) pairs; templates wrap matches in <mark>"""
+    text = text or ''
+    pattern = _term_pattern(terms)
+    if pattern is None:
+        return [(text, False)] if text else []
+    segments, position = [], 0
+    for match in pattern.finditer(text):
+        if match.start() > position:
+            segments.append((text[position:match.start()], False))
+        segments.append((match.group(), True))
+        position = match.end()
+    if position < len(text):
+        segments.append((text[position:], False))
+    return segments
+
+
+def snippet(text: Optional[str], terms: List[str], width: int = SNIPPET_WIDTH) -> List[Tuple[str, bool]]:
+    """About `width` characters around the first match, highlighted"""
+    text = ' '.join((text or '').split())
+    pattern = _term_pattern(terms)
+    first = pattern.search(text) if pattern else None
+    start = 0
+    if first and first.start() > width // 3:
+        # Start on a word boundary a third of the way before the match
+        start = text.rfind(' ', 0, first.start() - width // 3) + 1
+    end = min(len(text), start + width)
+    if end < len(text):
+        end = text.rfind(' ', start, end) if ' ' in text[start:end] else end
+    segments = highlight(text[start:end], terms)
+    if start > 0:
+        segments.insert(0, ('…', False))
+    if end < len(text):
+        segments.append(('…', False))
+    return segments
+
+
+# ============== Local Inverted Index ==============
+
+class InvertedIndex:
+    """
+    In-memory BM25 index over documents with weighted fields.
+
+    Postings are parallel arrays (document numbers and weighted term
+    frequencies) rather than dicts, about 8 bytes per posting. A query
+    walks the rarest term's postings and binary-searches the others, so
+    its cost follows the number of hits for the rarest term, not the
+    number of documents.
+    """
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, weights: Dict[str, float] = SEARCH_FIELD_WEIGHTS):
+        self.weights = weights
+        self._docs: List[Dict[str, Any]] = []
+        self._ids: List[str] = []
+        self._numbers: Dict[str, int] = {}
+        self._lengths = array('f')
+        self._total_length = 0.0
+        self._postings: Dict[str, Tuple[array, array]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, doc_id: Any, document: Dict[str, Any]):
+        number = len(self._docs)
+        frequencies: Dict[str, float] = {}
+        length = 0.0
+        for field, weight in self.weights.items():
+            tokens = tokenize(document.get(field))
+            length += weight * len(tokens)
+            for token in tokens:
+                frequencies[token] = frequencies.get(token, 0.0) + weight
+        for token, frequency in frequencies.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = (array('I'), array('f'))
+            postings[0].append(number)
+            postings[1].append(frequency)
+        self._docs.append(document)
+        self._ids.append(str(doc_id))
+        self._numbers[str(doc_id)] = number
+        self._lengths.append(length)
+        self._total_length += length
+
+    def update(self, documents: Iterable[Tuple[Any, Dict[str, Any]]]):
+        for doc_id, document in documents:
+            self.add(doc_id, document)
+
+    def search(self, terms: List[str], limit: int = 20,
+               after: Optional[Tuple[float, str]] = None) -> List[Tuple[float, str, Dict[str, Any]]]:
+        """
+        Documents containing every term as (score, id, document), best
+        first; `after` is the (score, id) of the last hit of the previous page
+        """
+        if not terms or not self._docs:
+            return []
+        postings = [self._postings.get(term) for term in terms]
+        if any(p is None for p in postings):
+            return []
+        postings.sort(key=lambda p: len(p[0]))
+
+        # BM25: idf * f * (k1 + 1) / (f + k1 * (1 - b + b * length / average)),
+        # with everything but f and length folded into constants
+        count, k1, b = len(self._docs), self.K1, self.B
+        base = k1 * (1 - b)
+        per_length = k1 * b * count / (self._total_length or 1.0)
+        lengths = self._lengths
+        idfs = [(k1 + 1) * math.log(1 + (count - len(p[0]) + 0.5) / (len(p[0]) + 0.5)) for p in postings]
+
+        rarest_docs, rarest_freqs = postings[0]
+        idf = idfs[0]
+        if len(postings) == 1:
+            numbers = rarest_docs
+            scores = [idf * f / (f + base + per_length * lengths[n]) for n, f in zip(rarest_docs, rarest_freqs)]
+        else:
+            numbers, scores = [], []
+            others = [(docs, freqs, len(docs), idfs[position])
+                      for position, (docs, freqs) in enumerate(postings[1:], 1)]
+            for number, frequency in zip(rarest_docs, rarest_freqs):
+                norm = base + per_length * lengths[number]
+                score = idf * frequency / (frequency + norm)
+                for docs, freqs, size, term_idf in others:
+                    i = bisect_left(docs, number)
+                    if i == size or docs[i] != number:
+                        break
+                    score += term_idf * freqs[i] / (freqs[i] + norm)
+                else:
+                    numbers.append(number)
+                    scores.append(score)
+
+        # Ties on score are broken by document number (insertion order), newest first
+        positions = range(len(scores) - 1, -1, -1)
+        if after is not None:
+            after_score, after_id = after
+            # An id that's no longer indexed can't place ties, so skip them all
+            after_number = self._numbers.get(after_id, -1)
+            positions = [i for i in positions if scores[i] < after_score
+                         or (scores[i] == after_score and numbers[i] < after_number)]
+        best = heapq.nlargest(limit, positions, key=scores.__getitem__)
+        return [(scores[i], self._ids[numbers[i]], self._docs[numbers[i]]) for i in best]
+
+
+class SpoolIndex:
+    """Index of the submissions waiting in the spool, rebuilt when its segment files change"""
+
+    def __init__(self, spool=contact_spool):
+        self.spool = spool
+        self._signature = None
+        self._index = InvertedIndex()
+
+    def current(self) -> InvertedIndex:
+        signature = self.spool.signature()
+        if signature != self._signature:
+            index = InvertedIndex()
+            index.update((record.get('dedupe_key'), record) for record in self.spool.pending())
+            self._index, self._signature = index, signature
+        return self._index
+
+
+spool_index = SpoolIndex()
+
+
+# ============== Search ==============
+
+def _hit(document: Dict[str, Any], score: float, terms: List[str], pending: bool) -> Dict[str, Any]:
+    return {
+        'document': document,
+        'score': score,
+        'pending': pending,
+        'subject': highlight(document.get('subject'), terms),
+        'snippet': snippet(document.get('message'), terms),
+    }
+
+
+def search_messages(query: str, limit: int = 20, cursor: Optional[str] = None,
+                    unread_only: bool = False) -> Dict[str, Any]:
+    """
+    One page of ranked hits for `query`, each with a highlighted subject and
+    body snippet. Searches MongoDB when it's reachable and the spool's
+    not-yet-stored submissions otherwise (source 'database' or 'spool').
+    Without the text index, stored messages are scanned unranked instead
+    (source 'scan'). On the first page of a database search, matching
+    spooled submissions are listed under 'pending'. Raises ValueError for
+    a bad cursor.
+    """
+    terms = query_terms(query)
+    page = {'terms': terms, 'hits': [], 'pending': [], 'next_cursor': None, 'source': 'database'}
+    if not terms:
+        return page
+    after = decode_cursor(cursor) if cursor else None
+
+    if get_collection('contacts') is not None:
+        from pymongo.errors import OperationFailure
+        try:
+            results = search_contact_messages(terms, limit=limit + 1, after=after, unread_only=unread_only)
+        except OperationFailure as e:
+            # No text index (not created yet, or ensure_indexes failed): $text can't run
+            logger.warning(f"Text search failed, scanning messages instead: {e}")
+            page['source'] = 'scan'
+            results = scan_contact_messages(terms, limit=limit + 1, after=after, unread_only=unread_only)
+        if results is not None:
+            page['hits'] = [_hit(doc, doc['score'], terms, False) for doc in results[:limit]]
+            if len(results) > limit:
+                last = results[limit - 1]
+                page['next_cursor'] = encode_cursor(last['score'], last['_id'])
+            if cursor is None:
+                page['pending'] = [_hit(doc, score, terms, True)
+                                   for score, _, doc in spool_index.current().search(terms, limit)]
+            return page
+
+    # Database offline: spooled submissions are all we can reach (none are read yet)
+    page['source'] = 'spool'
+    results = spool_index.current().search(terms, limit + 1, after)
+    page['hits'] = [_hit(doc, score, terms, True) for score, _, doc in results[:limit]]
+    if len(results) > limit:
+        score, doc_id, _ = results[limit - 1]
+        page['next_cursor'] = encode_cursor(score, doc_id)
+    return page
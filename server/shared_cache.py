@@ -0,0 +1,280 @@
+"""
+Host-Shared Cache
+SQLite (WAL mode) cache backend shared by every worker on a host
+
+Used both as the flask-caching backend and for db.py's query cache:
+    app.config['CACHE_TYPE'] = 'shared_cache.SQLiteCache'
+
+Entries are pickled with a TTL and evicted least-recently-used once the
+file holds more than `threshold` entries or `max_bytes` of values. The
+file outlives worker restarts, so a redeploy doesn't start cold.
+
+Values are unpickled on read, so whoever can write the file can run code
+in the app: the default directory is app-owned and created 0700, and a
+file or directory belonging to another user is refused.
+"""
+import os
+import time
+import pickle
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from flask_caching.backends.base import BaseCache
+
+from utils import check_private_file
+
+logger = logging.getLogger('app.cache')
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), 'cache', 'portfolio-cache.db')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL NOT NULL,
+    accessed REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+'''
+
+COUNTERS = ('hits', 'misses', 'sets', 'evictions', 'expirations')
+
+
+class SQLiteCache(BaseCache):
+    """
+    LRU- and size-bounded cache in a local SQLite file.
+
+    A timeout of 0 never expires. Reads only write back their access time
+    when it is more than `touch_interval` seconds old, so hot keys don't
+    turn every hit into a write. Hit/miss/eviction counters are kept per
+    process and folded into the file every `counter_flush_interval`
+    seconds for host-wide totals.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, default_timeout: int = 300,
+                 threshold: int = 500, max_bytes: int = 64 * 1024 * 1024,
+                 key_prefix: str = '', touch_interval: float = 1.0,
+                 counter_flush_interval: float = 5.0):
+        super().__init__(default_timeout=default_timeout)
+        self.path = path
+        self.threshold = threshold
+        self.max_bytes = max_bytes
+        self.key_prefix = key_prefix
+        self.touch_interval = touch_interval
+        self.counter_flush_interval = counter_flush_interval
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(COUNTERS, 0)
+        self._unflushed = dict.fromkeys(COUNTERS, 0)
+        self._next_flush = 0.0
+        self._conn()  # create the schema eagerly
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        kwargs.update(
+            path=config.get('CACHE_SQLITE_PATH', DEFAULT_CACHE_PATH),
+            threshold=config['CACHE_THRESHOLD'],
+            key_prefix=config['CACHE_KEY_PREFIX'],
+        )
+        return cls(*args, **kwargs)
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread and per process (connections don't survive fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        check_private_file(self.path)
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(SCHEMA)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _expires_at(self, timeout: Optional[int]) -> float:
+        timeout = self._normalize_timeout(timeout)
+        return time.time() + timeout if timeout > 0 else 0.0
+
+    # ============== Counters ==============
+
+    def _count(self, name: str, amount: int = 1):
+        if not amount:
+            return
+        with self._lock:
+            self._counts[name] += amount
+            self._unflushed[name] += amount
+
+    def _flush_counters(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now < self._next_flush:
+            return
+        with self._lock:
+            self._next_flush = now + self.counter_flush_interval
+            pending = [(name, value) for name, value in self._unflushed.items() if value]
+            self._unflushed = dict.fromkeys(COUNTERS, 0)
+        if not pending:
+            return
+        try:
+            self._conn().executemany(
+                'INSERT INTO counters (name, value) VALUES (?, ?) '
+                'ON CONFLICT (name) DO UPDATE SET value = value + excluded.value',
+                pending
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Cache counter flush failed: {e}")
+
+    # ============== Cache API ==============
+
+    def get(self, key: str) -> Any:
+        now = time.time()
+        try:
+            row = self._conn().execute(
+                'SELECT value, expires, accessed FROM entries WHERE key = ?', (self.key_prefix + key,)
+            ).fetchone()
+            if row is None or (row[1] and row[1] <= now):
+                self._count('misses')
+                return None
+            value = pickle.loads(row[0])
+            if now - row[2] > self.touch_interval:
+                self._conn().execute(
+                    'UPDATE entries SET accessed = ? WHERE key = ?', (now, self.key_prefix + key)
+                )
+        except (sqlite3.Error, pickle.UnpicklingError, AttributeError, ImportError, EOFError) as e:
+            # A value pickled by an older deploy is treated as a miss
+            logger.warning(f"Cache read failed for {key!r}: {e}")
+            self._count('misses')
+            return None
+        finally:
+            self._flush_counters()
+        self._count('hits')
+        return value
+
+    def has(self, key: str) -> bool:
+        row = self._conn().execute(
+            'SELECT 1 FROM entries WHERE key = ? AND (expires = 0 OR expires > ?)',
+            (self.key_prefix + key, time.time())
+        ).fetchone()
+        return row is not None
+
+    def _store(self, key: str, value: Any, timeout: Optional[int], overwrite: bool) -> bool:
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if not overwrite:
+                conn.execute(
+                    'DELETE FROM entries WHERE key = ? AND expires != 0 AND expires <= ?',
+                    (self.key_prefix + key, now)
+                )
+            cursor = conn.execute(
+                f"INSERT OR {'REPLACE' if overwrite else 'IGNORE'} INTO entries "
+                '(key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)',
+                (self.key_prefix + key, blob, len(blob), self._expires_at(timeout), now)
+            )
+            stored = cursor.rowcount > 0
+            if stored:
+                self._prune(conn, now, self.key_prefix + key)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        if stored:
+            self._count('sets')
+        self._flush_counters()
+        return stored
+
+    def _prune(self, conn: sqlite3.Connection, now: float, keep: str):
+        """Drop expired entries, then least-recently-used ones until within bounds"""
+        self._count('expirations', conn.execute(
+            'DELETE FROM entries WHERE expires != 0 AND expires <= ?', (now,)
+        ).rowcount)
+
+        count, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        if count <= self.threshold and total <= self.max_bytes:
+            return
+        evicted = 0
+        rows = conn.execute('SELECT key, size FROM entries ORDER BY accessed').fetchall()
+        for key, size in rows:
+            if key == keep:
+                continue
+            if count <= self.threshold and total <= self.max_bytes:
+                break
+            conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            count -= 1
+            total -= size
+            evicted += 1
+        self._count('evictions', evicted)
+
+    def set(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        try:
+            return self._store(key, value, timeout, overwrite=True)
+        except sqlite3.Error as e:
+            logger.warning(f"Cache write failed for {key!r}: {e}")
+            return False
+
+    def add(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        try:
+            return self._store(key, value, timeout, overwrite=False)
+        except sqlite3.Error as e:
+            logger.warning(f"Cache write failed for {key!r}: {e}")
+            return False
+
+    def delete(self, key: str) -> bool:
+        try:
+            cursor = self._conn().execute('DELETE FROM entries WHERE key = ?', (self.key_prefix + key,))
+        except sqlite3.Error:
+            return False
+        return cursor.rowcount > 0
+
+    def delete_many(self, *keys: str):
+        try:
+            self._conn().executemany(
+                'DELETE FROM entries WHERE key = ?', [(self.key_prefix + key,) for key in keys]
+            )
+        except sqlite3.Error:
+            return []
+        return list(keys)
+
+    def clear(self) -> bool:
+        """Remove every entry under this cache's key prefix"""
+        prefix = self.key_prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        try:
+            self._conn().execute("DELETE FROM entries WHERE key LIKE ? ESCAPE '\\'", (prefix + '%',))
+        except sqlite3.Error:
+            return False
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for this process and for every process sharing the file"""
+        self._flush_counters(force=True)
+        with self._lock:
+            process = dict(self._counts)
+        lookups = process['hits'] + process['misses']
+        process['hit_ratio'] = round(process['hits'] / lookups, 3) if lookups else None
+
+        conn = self._conn()
+        host = dict.fromkeys(COUNTERS, 0)
+        host.update(conn.execute('SELECT name, value FROM counters').fetchall())
+        lookups = host['hits'] + host['misses']
+        host['hit_ratio'] = round(host['hits'] / lookups, 3) if lookups else None
+        entries, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+
+        return {
+            'entries': entries,
+            'bytes': size,
+            'threshold': self.threshold,
+            'max_bytes': self.max_bytes,
+            'process': process,
+            'host': host,
+        }
@@ -0,0 +1,325 @@
+"""
+Contact Submission Spool
+Durable local write-behind log for contact messages, drained into MongoDB
+
+Submissions are appended as JSON lines to segment files under
+CONTACT_SPOOL_DIR; a background syncer fsyncs the active segment in
+batches (group commit) and a background replayer upserts sealed segments
+into the contacts collection, deleting each segment once it is stored.
+Every record carries a dedupe key, so replaying a segment twice (after a
+crash mid-replay, or from two workers) never creates duplicates.
+
+The spool is disabled when no database is configured (there is nothing
+to replay into), and appends fail with OSError once the directory holds
+CONTACT_SPOOL_MAX_BYTES, so a long outage can't fill the disk.
+"""
+import os
+import errno
+import json
+import time
+import uuid
+import atexit
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable, Iterator
+
+from db import save_contact_messages
+from utils import owned_by_dead_process
+
+logger = logging.getLogger('app.spool')
+
+DEFAULT_SPOOL_DIR = os.path.join(os.path.dirname(__file__), 'spool', 'contacts')
+
+ACTIVE_SUFFIX = '.log'
+SEALED_SUFFIX = '.sealed'
+
+
+class ContactSpool:
+    """
+    Append-only segmented log with fsync batching and a background replayer.
+
+    `writer` receives a list of spooled records and returns the number
+    stored, or None if the database is unavailable (the segment is kept
+    and retried with backoff). `max_bytes` caps the segments on disk
+    across all workers (0 for no limit).
+    """
+
+    def __init__(self, writer: Callable[[List[Dict[str, Any]]], Optional[int]],
+                 directory: str = DEFAULT_SPOOL_DIR, segment_bytes: int = 1_000_000,
+                 segment_age: float = 2.0, fsync_interval: float = 0.05,
+                 replay_interval: float = 1.0, max_backoff: float = 60.0,
+                 batch_size: int = 100, max_bytes: int = 100_000_000,
+                 enabled: bool = True):
+        self._writer = writer
+        self.directory = directory
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.segment_age = segment_age
+        self.fsync_interval = fsync_interval
+        self.replay_interval = replay_interval
+        self.max_backoff = max_backoff
+        self.batch_size = batch_size
+
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._stopping = threading.Event()
+        self._file = None
+        self._path: Optional[str] = None
+        self._size = 0
+        self._opened_at = 0.0
+        self._seq = 0
+        self._dirty = False
+
+        self.appended = 0
+        self.rejected = 0
+        self.replayed = 0
+        self.segments_replayed = 0
+        self.replay_errors = 0
+
+    # ============== Request Path ==============
+
+    def append(self, data: Dict[str, Any]) -> Optional[str]:
+        """
+        Append a submission durably (within fsync_interval); returns its
+        dedupe key, or None if the spool is disabled. Raises OSError if the
+        spool is full or can't be written.
+        """
+        if not self.enabled:
+            return None
+        self._ensure_started()
+        record = dict(data)
+        record['dedupe_key'] = uuid.uuid4().hex
+        record['created_at'] = datetime.utcnow().isoformat()
+        line = (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')
+
+        if self.max_bytes and self.spooled_bytes() + len(line) > self.max_bytes:
+            with self._lock:
+                self.rejected += 1
+            raise OSError(errno.ENOSPC, f"Contact spool is full ({self.max_bytes} bytes)")
+
+        with self._lock:
+            if self._file is None or self._size >= self.segment_bytes:
+                self._seal_locked()
+                self._open_locked()
+            # Unbuffered file: this is one write(2), the fsync happens in the syncer
+            self._file.write(line)
+            self._size += len(line)
+            self._dirty = True
+            self.appended += 1
+        return record['dedupe_key']
+
+    # ============== Segments ==============
+
+    def _open_locked(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._seq += 1
+        self._path = os.path.join(self.directory, f"{os.getpid()}-{time.time_ns()}-{self._seq:06d}{ACTIVE_SUFFIX}")
+        self._file = open(self._path, 'ab', buffering=0)
+        self._size = 0
+        self._opened_at = time.monotonic()
+
+    def _sync_locked(self):
+        if self._file is not None and self._dirty:
+            os.fsync(self._file.fileno())
+            self._dirty = False
+
+    def _seal_locked(self):
+        """Fsync and close the active segment and mark it ready for replay"""
+        if self._file is None:
+            return
+        self._sync_locked()
+        self._file.close()
+        if self._size:
+            os.replace(self._path, self._path[:-len(ACTIVE_SUFFIX)] + SEALED_SUFFIX)
+        else:
+            os.remove(self._path)
+        self._file = None
+        self._path = None
+
+    def _sealed_segments(self) -> List[str]:
+        """Own sealed segments plus any segment whose writer process is gone"""
+        try:
+            names = sorted(os.listdir(self.directory))
+        except FileNotFoundError:
+            return []
+        segments = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if name.endswith(SEALED_SUFFIX) and owned_by_dead_process(name):
+                segments.append(path)
+            elif name.endswith(ACTIVE_SUFFIX) and path != self._path and owned_by_dead_process(name):
+                # Left active by a crashed process: claim it (only one rename can win)
+                claimed = os.path.join(self.directory, f"{os.getpid()}-{name}"[:-len(ACTIVE_SUFFIX)] + SEALED_SUFFIX)
+                try:
+                    os.replace(path, claimed)
+                    segments.append(claimed)
+                except FileNotFoundError:
+                    pass
+        return segments
+
+    @staticmethod
+    def _read_segment(path: str) -> Iterator[Dict[str, Any]]:
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-write
+                    logger.warning(f"Skipping corrupt spool record in {os.path.basename(path)}")
+
+    # ============== Pending Submissions ==============
+
+    def _segment_names(self) -> List[str]:
+        try:
+            return sorted(name for name in os.listdir(self.directory)
+                          if name.endswith((ACTIVE_SUFFIX, SEALED_SUFFIX)))
+        except FileNotFoundError:
+            return []
+
+    def spooled_bytes(self) -> int:
+        """Size of every worker's segments, replayed or not yet"""
+        total = 0
+        for name in self._segment_names():
+            try:
+                total += os.stat(os.path.join(self.directory, name)).st_size
+            except FileNotFoundError:
+                continue
+        return total
+
+    def signature(self) -> tuple:
+        """Changes whenever a segment is written, sealed or replayed (cheap: one stat per segment)"""
+        entries = []
+        for name in self._segment_names():
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((name, stat.st_size, stat.st_mtime_ns))
+        return tuple(entries)
+
+    def pending(self) -> Iterator[Dict[str, Any]]:
+        """Submissions from every worker that are not yet stored in the database (read-only)"""
+        for name in self._segment_names():
+            try:
+                with open(os.path.join(self.directory, name), 'rb') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue  # a line another worker is still writing
+                        if record.get('created_at'):
+                            record['created_at'] = datetime.fromisoformat(record['created_at'])
+                        yield record
+            except FileNotFoundError:
+                continue  # replayed meanwhile
+
+    # ============== Background Threads ==============
+
+    def start(self):
+        """Start this process's syncer and replayer, draining segments left by earlier runs"""
+        if self.enabled:
+            self._ensure_started()
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Never write to a segment opened by the parent process
+            self._file = None
+            self._path = None
+            self._dirty = False
+            self._stopping = threading.Event()
+            self._pid = os.getpid()
+            threading.Thread(target=self._sync_loop, name='spool-syncer', daemon=True).start()
+            threading.Thread(target=self._replay_loop, name='spool-replayer', daemon=True).start()
+
+    def _sync_loop(self):
+        while not self._stopping.wait(self.fsync_interval):
+            with self._lock:
+                if self._file is None or not self._dirty:
+                    continue
+                # fsync a duplicate descriptor outside the lock so appends never wait on the disk
+                fd = os.dup(self._file.fileno())
+                self._dirty = False
+            try:
+                os.fsync(fd)
+            except OSError as e:
+                logger.error(f"Spool fsync failed: {e}")
+            finally:
+                os.close(fd)
+
+    def _replay_loop(self):
+        delay = self.replay_interval
+        while not self._stopping.wait(delay):
+            with self._lock:
+                if self._file is not None and time.monotonic() - self._opened_at >= self.segment_age:
+                    self._seal_locked()
+            delay = self.replay_interval if self.replay() else min(delay * 2, self.max_backoff)
+
+    def replay(self) -> bool:
+        """Drain sealed segments into the database; False if it should back off"""
+        for path in self._sealed_segments():
+            try:
+                batch: List[Dict[str, Any]] = []
+                for record in self._read_segment(path):
+                    batch.append(record)
+                    if len(batch) >= self.batch_size:
+                        if not self._write(batch):
+                            return False
+                        batch = []
+                if batch and not self._write(batch):
+                    return False
+                os.remove(path)
+                self.segments_replayed += 1
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                self.replay_errors += 1
+                logger.error(f"Spool replay failed for {os.path.basename(path)}: {e}")
+                return False
+        return True
+
+    def _write(self, batch: List[Dict[str, Any]]) -> bool:
+        stored = self._writer(batch)
+        if stored is None:
+            return False
+        self.replayed += len(batch)
+        return True
+
+    def close(self):
+        """Seal the active segment so the next process can replay it"""
+        if self._pid != os.getpid():
+            return
+        self._stopping.set()
+        with self._lock:
+            self._seal_locked()
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            backlog = sum(1 for name in os.listdir(self.directory) if name.endswith(SEALED_SUFFIX))
+        except FileNotFoundError:
+            backlog = 0
+        return {
+            'appended': self.appended,
+            'rejected': self.rejected,
+            'replayed': self.replayed,
+            'segments_replayed': self.segments_replayed,
+            'segments_pending': backlog,
+            'replay_errors': self.replay_errors,
+        }
+
+
+contact_spool = ContactSpool(
+    writer=save_contact_messages,
+    directory=os.getenv('CONTACT_SPOOL_DIR', DEFAULT_SPOOL_DIR),
+    fsync_interval=float(os.getenv('CONTACT_SPOOL_FSYNC_INTERVAL', 0.05)),
+    max_bytes=int(os.getenv('CONTACT_SPOOL_MAX_BYTES', 100_000_000)),
+    # Without a database nothing would ever drain the spool
+    enabled=bool(os.getenv('MONGODB_URI')),
+)
+
+atexit.register(contact_spool.close)
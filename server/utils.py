@@ -0,0 +1,45 @@
+"""
+Shared Utilities
+Small process/file helpers used by the background subsystems
+"""
+import os
+
+
+def pid_alive(pid: int) -> bool:
+    """Whether a process with this pid currently exists"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def owned_by_dead_process(filename: str) -> bool:
+    """For '<pid>-...' files: True if the owning process is gone (or the name is ours)"""
+    owner = filename.split('-', 1)[0]
+    if not owner.isdigit():
+        return False
+    return int(owner) == os.getpid() or not pid_alive(int(owner))
+
+
+def check_private_file(path: str):
+    """
+    Create a SQLite file's directory 0700 and refuse a directory or file
+    (including its -wal/-shm companions) that another user could have planted
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    stat = os.stat(directory)
+    # Others may write to the directory only if it's sticky (like /tmp), where
+    # they still can't replace a file of ours
+    if stat.st_uid not in (os.geteuid(), 0) or (stat.st_mode & 0o022 and not stat.st_mode & 0o1000):
+        raise PermissionError(f"Directory {directory} is writable by other users")
+    for name in (path, path + '-wal', path + '-shm'):
+        try:
+            owner = os.stat(name).st_uid
+        except FileNotFoundError:
+            continue
+        if owner != os.geteuid():
+            raise PermissionError(f"File {name} is owned by uid {owner}, not this process")